@@ -0,0 +1,104 @@
+# benchmarks/bench_async.py
+"""
+Benchmark: how long report requests stall an asyncio event loop.
+
+A heartbeat task wakes up every millisecond and records how late it
+was, while report requests run:
+
+- monthly_balance called directly in a coroutine (blocks the loop for
+  the whole aggregation)
+- reports.monthly_balance_async (aggregation in its worker thread), and
+  the same with the event loop's default executor (several threads)
+- AsyncLedger requests (add_expense, monthly_balance and
+  total_by_category awaited from concurrent tasks) on a journaled
+  ledger with fsync='always'
+
+The reports read lists of dicts, the slowest input of monthly_balance.
+The worst and the 99th percentile heartbeat delay are printed for each;
+a thread still holds the GIL for the Python parts of the work, so the
+loop gets a turn every few milliseconds (sys.getswitchinterval) rather
+than running fully in parallel.
+
+Usage:
+    python benchmarks/bench_async.py               # 500k rows per side
+    python benchmarks/bench_async.py --rows 2000000 --requests 20
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+from budgetmaster.analysis.reports import monthly_balance, monthly_balance_async
+from budgetmaster.ledger import AsyncLedger
+
+
+def make_rows(n):
+    return [{"amount": (i % 997) + 0.25, "date": "{:04d}-{:02d}-{:02d}".format(2020 + i % 5, i % 12 + 1, i % 28 + 1)}
+            for i in range(n)]
+
+
+async def heartbeat(delays, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        delays.append(time.perf_counter() - start - 0.001)
+
+
+async def measure(label, work):
+    delays = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(delays, stop))
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    delays.sort()
+    p99 = delays[int(len(delays) * 0.99)] if delays else 0.0
+    print("{:<42s} {:8.3f} s   loop delay max {:8.1f} ms   p99 {:6.1f} ms".format(
+        label, elapsed, delays[-1] * 1000 if delays else 0.0, p99 * 1000))
+
+
+async def main(args):
+    rows = make_rows(args.rows)
+
+    async def blocking():
+        for _ in range(args.requests):
+            monthly_balance(rows, rows)
+            await asyncio.sleep(0)
+
+    async def offloaded():
+        await asyncio.gather(*[monthly_balance_async(rows, rows) for _ in range(args.requests)])
+
+    async def thread_pool():
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(None, monthly_balance, rows, rows)
+                               for _ in range(args.requests)])
+
+    await measure("monthly_balance in the loop", blocking)
+    await measure("monthly_balance_async", offloaded)
+    await measure("monthly_balance, loop's default executor", thread_pool)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        async with AsyncLedger() as household:
+            await household.open_journal(tmp, fsync="always")
+
+            async def request(i):
+                await household.add_expense("food", 1.0, "2025-{:02d}-15".format(i % 12 + 1))
+                await household.monthly_balance()
+                await household.total_by_category()
+
+            async def requests():
+                await asyncio.gather(*[request(i) for i in range(args.writes)])
+
+            await measure("AsyncLedger: {:,} journaled requests".format(args.writes), requests)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000, help="rows on each side of the report")
+    parser.add_argument("--requests", type=int, default=5, help="report requests per run")
+    parser.add_argument("--writes", type=int, default=500, help="AsyncLedger requests (add + 2 reports)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,69 @@
+# benchmarks/bench_bulk_ingest.py
+"""
+Benchmark: loading a bank export with add_expense one row at a time vs
+add_expenses_bulk, for the dict and the columnar storage backends.
+
+Usage:
+    python benchmarks/bench_bulk_ingest.py               # 1M rows
+    python benchmarks/bench_bulk_ingest.py --rows 200000
+
+The target for the columnar backend with column input is > 1M rows/sec.
+"""
+
+import argparse
+import time
+
+from budgetmaster.expense import entry as expense_entry
+
+CATEGORIES = ["food", "housing", "transportation", "entertainment", "other"]
+
+
+def make_columns(n):
+    return {
+        "category": [CATEGORIES[i % len(CATEGORIES)] for i in range(n)],
+        "amount": [(i % 997) + 0.25 for i in range(n)],
+        "date": ["{:04d}-{:02d}-{:02d}".format(2020 + i % 5, i % 12 + 1, i % 28 + 1) for i in range(n)],
+        "description": ["card payment #{}".format(i % 2000) for i in range(n)],
+    }
+
+
+def reset(backend):
+    expense_entry.set_storage_backend(backend)
+    expense_entry._expenses.clear()
+
+
+def timed(label, n, func, *args):
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    print("{:<44s} {:8.3f} s {:>12,.0f} rows/s".format(label, elapsed, n / elapsed))
+
+
+def row_at_a_time(columns):
+    for row in zip(columns["category"], columns["amount"], columns["date"], columns["description"]):
+        expense_entry.add_expense(*row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    columns = make_columns(args.rows)
+    rows = list(zip(columns["category"], columns["amount"], columns["date"], columns["description"]))
+
+    for backend in ("dict", "columnar"):
+        reset(backend)
+        timed("{}: add_expense loop".format(backend), args.rows, row_at_a_time, columns)
+        reset(backend)
+        timed("{}: add_expenses_bulk(rows)".format(backend), args.rows,
+              expense_entry.add_expenses_bulk, rows)
+        reset(backend)
+        timed("{}: add_expenses_bulk(columns)".format(backend), args.rows,
+              expense_entry.add_expenses_bulk, columns)
+        assert len(expense_entry.view_expenses()) == args.rows
+    reset("dict")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/bench_categorize.py
+"""
+Benchmark: expense categorization with a few hundred merchant rules.
+
+Compares, on the same descriptions:
+
+- the old way: lowercase the description and test every keyword of
+  every rule with `in`, rule after rule
+- the rules compiled into one matcher (analysis.rules), matched again
+  for every record (RuleSet.categorize)
+- categorize_expense, one call per record: repeated descriptions are
+  answered by the LRU category cache
+- categorize_expenses on the whole batch (each distinct description is
+  looked up once)
+
+Usage:
+    python benchmarks/bench_categorize.py                  # 1M descriptions
+    python benchmarks/bench_categorize.py --rows 200000 --distinct 50000
+"""
+
+import argparse
+import random
+import time
+
+from budgetmaster.analysis import utils
+from budgetmaster.analysis.rules import DEFAULT_RULES
+
+CATEGORIES = [
+    "groceries", "restaurants", "coffee", "fuel", "transit", "rideshare",
+    "airlines", "hotels", "streaming", "software", "phone", "internet",
+    "utilities", "insurance", "pharmacy", "clothing", "electronics",
+    "home", "pets", "fitness", "books", "games", "charity", "fees",
+]
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "zo", "ve", "pi", "so", "da", "qu", "fe", "gi", "ba"]
+
+
+def make_rules(count, rng):
+    # merchant-like keywords spread over the categories, after the
+    # default rules so those keep their priority
+    rules = {category: list(keywords) for category, keywords in DEFAULT_RULES.items()}
+    keywords = set()
+    while len(keywords) < count:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        keywords.add(word + rng.choice(["", " mart", " co", " store", " pay"]))
+    for i, keyword in enumerate(sorted(keywords)):
+        rules.setdefault(CATEGORIES[i % len(CATEGORIES)], []).append(keyword)
+    return rules
+
+
+def make_descriptions(rows, distinct, rules, rng):
+    keywords = [k for words in rules.values() for k in words]
+    pool = []
+    for i in range(distinct):
+        if i % 5 == 0:
+            # no rule matches
+            name = "".join(rng.choice(SYLLABLES) for _ in range(3)).upper() + "X"
+        else:
+            name = rng.choice(keywords).upper()
+        pool.append("POS {} #{:04d} {}".format(name, rng.randrange(10000), rng.choice(["VANCOUVER BC", "KELOWNA BC", "ONLINE"])))
+    return [pool[rng.randrange(distinct)] for _ in range(rows)]
+
+
+def keyword_chain(expense, rules):
+    # the old categorize_expense, with the rule list written as data
+    desc = str(expense.get("description", "")).lower()
+    for category, keywords in rules.items():
+        for keyword in keywords:
+            if keyword in desc:
+                return category
+    return "other"
+
+
+def timed(label, func, rows):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print("{:<40s} {:8.3f} s {:12,.0f} rows/s".format(label, elapsed, rows / elapsed))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--distinct", type=int, default=5_000,
+                        help="number of different descriptions (above the cache size "
+                             "of {:,} the cache mostly misses)".format(utils.CATEGORY_CACHE_SIZE))
+    parser.add_argument("--rules", type=int, default=300, help="number of merchant keywords")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    rules = make_rules(args.rules, rng)
+    records = [{"description": d} for d in make_descriptions(args.rows, args.distinct, rules, rng)]
+    start = time.perf_counter()
+    utils.set_category_rules(rules)
+    print("{:,} descriptions ({:,} distinct), {} keywords in {} rules, compiled in {:.3f} s".format(
+        args.rows, args.distinct, sum(map(len, rules.values())), len(rules), time.perf_counter() - start))
+
+    expected = timed("keyword chain (`in` per keyword)",
+                     lambda: [keyword_chain(rec, rules) for rec in records], args.rows)
+    rules = utils.get_category_rules()
+    result = timed("compiled rules, no cache",
+                   lambda: [rules.categorize(rec["description"]) for rec in records], args.rows)
+    assert result == expected
+    utils.clear_category_cache()
+    result = timed("categorize_expense per record (cached)",
+                   lambda: [utils.categorize_expense(rec) for rec in records], args.rows)
+    assert result == expected
+    info = utils.category_cache_info()
+    print("  cache: {:,} hits, {:,} misses, {:,} of {:,} entries used".format(
+        info.hits, info.misses, info.currsize, info.maxsize))
+    result = timed("categorize_expenses (batch)", lambda: utils.categorize_expenses(records), args.rows)
+    assert result == expected
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/bench_concurrency.py
+"""
+Benchmark: write throughput with N writer threads while M reader
+threads keep asking for reports.
+
+Each writer adds `--ops` expenses (add_expense, or add_expenses_bulk
+with `--batch` rows per call) and incomes; each reader loops over
+monthly_balance, total_by_category and income_by_source until the
+writers are done. Two layouts are measured:
+
+- shared : every writer and reader uses the same Ledger (all threads
+  take the same two locks)
+- tenants: every writer has its own Ledger (one household per thread),
+  readers pick ledgers round-robin, so threads rarely share a lock
+
+At the end the ids of every ledger are checked to be 1..n without
+duplicates and the totals to match the number of adds.
+
+Usage:
+    python benchmarks/bench_concurrency.py                      # 1,2,4,8 writers, 2 readers
+    python benchmarks/bench_concurrency.py --writers 1,16 --readers 4 --backend columnar
+    python benchmarks/bench_concurrency.py --batch 100
+"""
+
+import argparse
+import threading
+import time
+
+from budgetmaster.ledger import Ledger
+
+
+def writer(ledger, ops, batch, worker):
+    date = "2025-{:02d}-15".format(worker % 12 + 1)
+    if batch > 1:
+        rows = [("food", 1.0, date)] * batch
+        for _ in range(ops // batch):
+            ledger.add_expenses_bulk(rows)
+            ledger.add_income("salary", float(batch), date)
+    else:
+        for _ in range(ops):
+            ledger.add_expense("food", 1.0, date)
+            ledger.add_income("salary", 1.0, date)
+
+
+def reader(ledgers, done, counter):
+    reads = 0
+    while not done.is_set():
+        ledger = ledgers[reads % len(ledgers)]
+        ledger.monthly_balance()
+        ledger.total_by_category()
+        ledger.income_by_source()
+        reads += 1
+    counter.append(reads)
+
+
+def run(layout, writers, readers, ops, batch, backend):
+    count = 1 if layout == "shared" else writers
+    ledgers = [Ledger(backend) for _ in range(count)]
+    done = threading.Event()
+    reads = []
+    readers = [threading.Thread(target=reader, args=(ledgers, done, reads)) for _ in range(readers)]
+    writers = [threading.Thread(target=writer, args=(ledgers[w % count], ops, batch, w)) for w in range(writers)]
+
+    for thread in readers:
+        thread.start()
+    start = time.perf_counter()
+    for thread in writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    for thread in readers:
+        thread.join()
+
+    added = len(writers) * (ops // batch) * batch
+    check(ledgers, added)
+    for ledger in ledgers:
+        ledger.close()
+    return added / elapsed, sum(reads) / elapsed
+
+
+def check(ledgers, added):
+    expenses = 0
+    for ledger in ledgers:
+        ids = [rec["expense_id"] for rec in ledger.get_all_expenses()]
+        assert sorted(ids) == list(range(1, len(ids) + 1)), "duplicate or missing ids"
+        assert sum(ledger.total_by_category().values()) == len(ids)
+        expenses += len(ids)
+    assert expenses == added, (expenses, added)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", default="1,2,4,8", help="comma-separated writer thread counts")
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--ops", type=int, default=20_000, help="expenses added per writer")
+    parser.add_argument("--batch", type=int, default=1, help="rows per add_expenses_bulk call (1: add_expense)")
+    parser.add_argument("--backend", default="dict", choices=("dict", "columnar", "sqlite"))
+    args = parser.parse_args()
+
+    print("{} backend, {:,} expenses (+ incomes) per writer, batch {}, {} readers".format(
+        args.backend, args.ops, args.batch, args.readers))
+    print("{:<8s} {:>8s} {:>16s} {:>14s}".format("layout", "writers", "expenses/s", "reports/s"))
+    for writers in [int(n) for n in args.writers.split(",")]:
+        for layout in ("shared", "tenants"):
+            writes, reads = run(layout, writers, args.readers, args.ops, args.batch, args.backend)
+            print("{:<8s} {:>8d} {:>16,.0f} {:>14,.0f}".format(layout, writers, writes, reads))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/bench_date_keys.py
+"""
+Benchmark: month grouping on date keys checked at insert time
+(storage.dates) vs slicing every date string on every call.
+
+Measures:
+
+- monthly_balance on lists of dicts: the old loop (isinstance check and
+  date[:7] per row) vs the engine (each distinct date parsed once)
+- monthly_balance on views of the default dict stores: grouping every
+  record per call vs the month totals the stores keep from insert time
+- the insert-time cost of checking the dates (add_incomes_bulk and
+  add_expenses_bulk into the dict stores)
+
+Usage:
+    python benchmarks/bench_date_keys.py               # 1M rows per side
+    python benchmarks/bench_date_keys.py --rows 200000
+"""
+
+import argparse
+import time
+
+from budgetmaster.analysis import aggregate
+from budgetmaster.analysis.reports import monthly_balance
+from budgetmaster.expense import entry as expense_entry
+from budgetmaster.income import entry as income_entry
+
+
+def slicing_month_totals(records):
+    # the per-row month grouping used before dates were checked on insert
+    totals = {}
+    for rec in records:
+        date = rec.get("date", "")
+        if isinstance(date, str) and len(date) >= 7:
+            month = date[:7]
+            totals[month] = totals.get(month, 0.0) + rec.get("amount", 0.0)
+    return totals
+
+
+def slicing_monthly_balance(incomes, expenses):
+    income_by_month = slicing_month_totals(incomes)
+    expense_by_month = slicing_month_totals(expenses)
+    months = sorted(set(income_by_month) | set(expense_by_month))
+    return {m: income_by_month.get(m, 0.0) - expense_by_month.get(m, 0.0) for m in months}
+
+
+def make_columns(n):
+    # dates spread over 5 years, amounts with cents
+    return {
+        "source": ["salary"] * n,
+        "category": ["food"] * n,
+        "amount": [(i % 997) + 0.25 for i in range(n)],
+        "date": ["{:04d}-{:02d}-{:02d}".format(2020 + i % 5, i % 12 + 1, i % 28 + 1) for i in range(n)],
+    }
+
+
+def timed(label, func, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print("{:<52s} {:8.3f} s".format(label, best))
+    return result
+
+
+def check(result, expected):
+    assert result.keys() == expected.keys()
+    for month in expected:
+        assert abs(result[month] - expected[month]) < 1e-6 * max(1.0, abs(expected[month]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000,
+                        help="rows on each side (incomes and expenses)")
+    args = parser.parse_args()
+
+    columns = make_columns(args.rows)
+    rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+    print("{:,} incomes and {:,} expenses".format(args.rows, args.rows))
+
+    expected = timed("lists: date[:7] per row", slicing_monthly_balance, rows, rows)
+    check(timed("lists: monthly_balance (dates parsed once)", monthly_balance, rows, rows), expected)
+    del rows
+
+    incomes = {"source": columns["source"], "amount": columns["amount"], "date": columns["date"]}
+    expenses = {"category": columns["category"], "amount": columns["amount"], "date": columns["date"]}
+    timed("bulk add, both sides (dates checked)", _fill, incomes, expenses, repeat=1)
+
+    views = (income_entry.view_incomes(), expense_entry.view_expenses())
+    check(timed("dict stores: date[:7] per record", slicing_monthly_balance, *views), expected)
+    check(timed("dict stores: group every record per call",
+                lambda i, e: _balance(aggregate._record_month_totals(i), aggregate._record_month_totals(e)),
+                *views), expected)
+    check(timed("dict stores: monthly_balance (month index)", monthly_balance, *views), expected)
+
+
+def _fill(incomes, expenses):
+    income_entry.incomes.clear()
+    expense_entry._expenses.clear()
+    income_entry.add_incomes_bulk(incomes)
+    expense_entry.add_expenses_bulk(expenses)
+
+
+def _balance(income_by_month, expense_by_month):
+    months = sorted(set(income_by_month) | set(expense_by_month))
+    return {m: income_by_month.get(m, 0.0) - expense_by_month.get(m, 0.0) for m in months}
+
+
+if __name__ == "__main__":
+    main()
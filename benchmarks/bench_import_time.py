@@ -0,0 +1,52 @@
+# benchmarks/bench_import_time.py
+"""
+Benchmark: how long it takes a fresh interpreter to import the
+non-plotting parts of budgetmaster, compared with loading the plots.
+
+Usage:
+    python benchmarks/bench_import_time.py [--repeat 5]
+
+Each import runs in a new process so nothing is cached in sys.modules.
+tests/test_analysis_reports.py guards that matplotlib and numpy are not
+imported by `budgetmaster.analysis.reports`.
+"""
+
+import argparse
+import subprocess
+import sys
+
+STATEMENTS = [
+    "import budgetmaster.analysis",
+    "import budgetmaster.analysis.reports",
+    "import budgetmaster.income.summary, budgetmaster.expense.entry",
+    "import budgetmaster.analysis.reports as r; r.plot_monthly_balance",
+]
+
+TIMER = (
+    "import time; start = time.perf_counter(); {stmt}; "
+    "print((time.perf_counter() - start) * 1000)"
+)
+
+
+def best_of(stmt, repeat):
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", TIMER.format(stmt=stmt)],
+            capture_output=True, text=True, check=True,
+        )
+        times.append(float(out.stdout.strip()))
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for stmt in STATEMENTS:
+        print("{:>9.1f} ms  {}".format(best_of(stmt, args.repeat), stmt))
+
+
+if __name__ == "__main__":
+    main()
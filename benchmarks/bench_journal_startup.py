@@ -0,0 +1,81 @@
+# benchmarks/bench_journal_startup.py
+"""
+Benchmark: durable income storage (storage.journal).
+
+Measures how long a restart takes when the ledger has to be replayed
+from a log of single add_income calls vs loaded from a snapshot, and
+what each fsync policy costs per add_income call.
+
+Usage:
+    python benchmarks/bench_journal_startup.py               # 200k rows
+    python benchmarks/bench_journal_startup.py --rows 50000
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+from budgetmaster.income import entry as income_entry
+
+SOURCES = ["salary", "freelance", "bonus", "interest"]
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    print("{:<44s} {:8.3f} s".format(label, elapsed))
+    return elapsed
+
+
+def fill(rows):
+    for i in range(rows):
+        date = "{:04d}-{:02d}-{:02d}".format(2020 + i % 5, i % 12 + 1, i % 28 + 1)
+        income_entry.add_income(SOURCES[i % len(SOURCES)], (i % 997) + 0.25, date)
+
+
+def reopen(directory):
+    income_entry.close_journal()
+    income_entry.incomes.clear()
+    income_entry.open_journal(directory, snapshot_every=None)
+
+
+def add_singles(count):
+    for i in range(count):
+        income_entry.add_income("salary", 100.0, "2025-01-01")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--singles", type=int, default=500)
+    args = parser.parse_args()
+
+    for backend in ("dict", "columnar"):
+        income_entry.set_storage_backend(backend)
+        directory = tempfile.mkdtemp()
+        try:
+            income_entry.open_journal(directory, fsync="never", snapshot_every=None)
+            fill(args.rows)
+            timed("{}: restart, replay log".format(backend), reopen, directory)
+            income_entry.incomes.snapshot()
+            timed("{}: restart, load snapshot".format(backend), reopen, directory)
+            assert len(income_entry.incomes) == args.rows
+
+            for policy in ("always", "batch", "never"):
+                income_entry.close_journal()
+                income_entry.incomes.clear()
+                income_entry.open_journal(directory, fsync=policy, snapshot_every=None)
+                elapsed = timed("{}: {} add_income, fsync={}".format(backend, args.singles, policy),
+                                add_singles, args.singles)
+                print("{:<44s} {:8.1f} us/call".format("", elapsed / args.singles * 1e6))
+        finally:
+            income_entry.close_journal()
+            shutil.rmtree(directory)
+    income_entry.incomes.clear()
+    income_entry.set_storage_backend("dict")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/bench_ledgers.py
+"""
+Benchmark: many households in one process, one Ledger each.
+
+For each storage backend, creates `--households` ledgers, fills each
+with `--rows` incomes and expenses (bulk adds), then reads every
+ledger's monthly balance. Prints the time of both steps and the memory
+a household takes (traced Python allocations divided by the number of
+ledgers), and checks that dropping the ledgers gives the memory back.
+
+Usage:
+    python benchmarks/bench_ledgers.py                     # 2,000 households
+    python benchmarks/bench_ledgers.py --households 10000 --rows 50
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from budgetmaster.ledger import Ledger
+
+
+def make_rows(n, household):
+    # a few months of salary and spending, different for every household
+    incomes = [("salary", 2000.0 + household % 500, "2025-{:02d}-28".format(i % 12 + 1)) for i in range(n)]
+    expenses = [("food", (i * 7 + household) % 90 + 0.5, "2025-{:02d}-{:02d}".format(i % 12 + 1, i % 28 + 1))
+                for i in range(n)]
+    return incomes, expenses
+
+
+def fill(backend, data):
+    ledgers = []
+    for incomes, expenses in data:
+        ledger = Ledger(backend)
+        ledger.add_incomes_bulk(incomes)
+        ledger.add_expenses_bulk(expenses)
+        ledgers.append(ledger)
+    return ledgers
+
+
+def run(backend, households, rows):
+    data = [make_rows(rows, h) for h in range(households)]
+    # one household first, so imports and the shared date caches are warm
+    fill(backend, data[:1])[0].monthly_balance()
+
+    start = time.perf_counter()
+    ledgers = fill(backend, data)
+    filled = time.perf_counter() - start
+    start = time.perf_counter()
+    for ledger in ledgers:
+        ledger.monthly_balance()
+    reports = time.perf_counter() - start
+    del ledgers, ledger
+
+    # memory is measured on a second run, tracing slows everything down
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    ledgers = fill(backend, data)
+    used = tracemalloc.get_traced_memory()[0] - base
+    del ledgers
+    gc.collect()
+    left = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    print("{:<9s} fill {:7.3f} s   balances {:7.3f} s   {:8,.0f} bytes/household   {:,} bytes left after drop".format(
+        backend, filled, reports, used / households, left))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--households", type=int, default=2_000)
+    parser.add_argument("--rows", type=int, default=100, help="incomes and expenses per household")
+    args = parser.parse_args()
+
+    print("{:,} households, {:,} incomes and {:,} expenses each".format(args.households, args.rows, args.rows))
+    for backend in ("dict", "columnar"):
+        run(backend, args.households, args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# benchmarks/bench_mapped_ledger.py
+"""
+Benchmark: cold load of a large income/expense ledger (storage.mapped).
+
+Compares getting a saved ledger back into the program and answering the
+usual summaries (income_by_source, total_by_category, monthly_balance):
+
+- parsing a CSV export with add_incomes_bulk / add_expenses_bulk
+- loading a journal snapshot (JSON, storage.journal)
+- mapping a binary ledger file with load_ledger
+
+Usage:
+    python benchmarks/bench_mapped_ledger.py               # 500k rows per side
+    python benchmarks/bench_mapped_ledger.py --rows 100000
+"""
+
+import argparse
+import csv
+import os
+import shutil
+import tempfile
+import time
+
+from budgetmaster.analysis import reports
+from budgetmaster.expense import entry as expense_entry
+from budgetmaster.income import entry as income_entry
+from budgetmaster.income import summary as income_summary
+
+SOURCES = ["salary", "freelance", "bonus", "interest"]
+CATEGORIES = ["rent", "food", "transport", "fun", "utilities", "health"]
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    print("{:<44s} {:8.3f} s".format(label, elapsed))
+    return result
+
+
+def make_rows(rows, names):
+    return [
+        (names[i % len(names)], (i % 997) + 0.25,
+         "{:04d}-{:02d}-{:02d}".format(2020 + i % 5, i % 12 + 1, i % 28 + 1))
+        for i in range(rows)
+    ]
+
+
+def reset():
+    # empty the stores before switching, so no rows are copied
+    for entry in (income_entry, expense_entry):
+        entry.close_journal()
+    income_entry.incomes.clear()
+    expense_entry._expenses.clear()
+    for entry in (income_entry, expense_entry):
+        entry.set_storage_backend("columnar")
+
+
+def summaries():
+    income_summary.income_by_source()
+    expense_entry.total_by_category()
+    return reports.monthly_balance(income_entry.view_incomes(), expense_entry.view_expenses())
+
+
+def load_csv(directory):
+    reset()
+    for name, entry, add in (("incomes.csv", income_entry, income_entry.add_incomes_bulk),
+                             ("expenses.csv", expense_entry, expense_entry.add_expenses_bulk)):
+        with open(os.path.join(directory, name), newline="") as f:
+            add([(a, float(b), c) for a, b, c in csv.reader(f)])
+
+
+def load_snapshot(directory):
+    reset()
+    income_entry.open_journal(os.path.join(directory, "incomes"), snapshot_every=None)
+    expense_entry.open_journal(os.path.join(directory, "expenses"), snapshot_every=None)
+
+
+def load_mapped(directory):
+    reset()
+    income_entry.load_ledger(os.path.join(directory, "incomes.bml"))
+    expense_entry.load_ledger(os.path.join(directory, "expenses.bml"))
+
+
+def save_ledgers(directory):
+    income_entry.save_ledger(os.path.join(directory, "incomes.bml"))
+    expense_entry.save_ledger(os.path.join(directory, "expenses.bml"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        incomes = make_rows(args.rows, SOURCES)
+        expenses = make_rows(args.rows, CATEGORIES)
+        for name, rows in (("incomes.csv", incomes), ("expenses.csv", expenses)):
+            with open(os.path.join(directory, name), "w", newline="") as f:
+                csv.writer(f).writerows(rows)
+
+        # the same ledger as a journal snapshot and as binary ledger files
+        reset()
+        income_entry.open_journal(os.path.join(directory, "incomes"), fsync="never", snapshot_every=None)
+        expense_entry.open_journal(os.path.join(directory, "expenses"), fsync="never", snapshot_every=None)
+        income_entry.add_incomes_bulk(incomes)
+        expense_entry.add_expenses_bulk(expenses)
+        income_entry.incomes.snapshot()
+        expense_entry._expenses.snapshot()
+        expected = summaries()
+        timed("write binary ledgers (save_ledger)", save_ledgers, directory)
+
+        for label, load in (("csv", load_csv), ("json snapshot", load_snapshot), ("mapped ledger", load_mapped)):
+            timed("{}: load".format(label), load, directory)
+            balance = timed("{}: summaries".format(label), summaries)
+            assert balance == expected
+    finally:
+        reset()
+        for entry in (income_entry, expense_entry):
+            entry.set_storage_backend("dict")
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/bench_monthly_balance.py
+"""
+Benchmark: monthly_balance with the old per-row loop vs the shared
+aggregation engine (analysis.aggregate).
+
+Usage:
+    python benchmarks/bench_monthly_balance.py                 # 1M rows
+    python benchmarks/bench_monthly_balance.py --rows 10000000 # 10M rows
+
+The 10M run needs several GB of memory for the list-of-dicts input.
+"""
+
+import argparse
+import time
+
+from budgetmaster.analysis.reports import monthly_balance
+from budgetmaster.income.store import ColumnarIncomeStore
+from budgetmaster.expense.store import ColumnarExpenseStore
+
+
+def legacy_monthly_balance(incomes, expenses):
+    # the per-row loop monthly_balance used before the aggregation engine
+    income_by_month = {}
+    expense_by_month = {}
+    for rec in incomes:
+        date = rec.get("date", "")
+        if isinstance(date, str) and len(date) >= 7:
+            month = date[:7]
+            if month not in income_by_month:
+                income_by_month[month] = 0.0
+            income_by_month[month] += rec.get("amount", 0.0)
+    for rec in expenses:
+        date = rec.get("date", "")
+        if isinstance(date, str) and len(date) >= 7:
+            month = date[:7]
+            if month not in expense_by_month:
+                expense_by_month[month] = 0.0
+            expense_by_month[month] += rec.get("amount", 0.0)
+    all_months = sorted(set(income_by_month) | set(expense_by_month))
+    return {m: income_by_month.get(m, 0.0) - expense_by_month.get(m, 0.0) for m in all_months}
+
+
+def make_rows(n, id_key):
+    # dates spread over 5 years, amounts with cents
+    rows = []
+    for i in range(n):
+        rows.append({
+            id_key: i + 1,
+            "source": "salary",
+            "category": "food",
+            "amount": (i % 997) + 0.25,
+            "date": "{:04d}-{:02d}-{:02d}".format(2020 + i % 5, i % 12 + 1, i % 28 + 1),
+        })
+    return rows
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    print("{:<40s} {:8.3f} s".format(label, elapsed))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000,
+                        help="rows on each side (incomes and expenses)")
+    args = parser.parse_args()
+
+    print("building {:,} incomes and {:,} expenses...".format(args.rows, args.rows))
+    incomes = make_rows(args.rows, "income_id")
+    expenses = make_rows(args.rows, "expense_id")
+
+    expected = timed("legacy loop (list of dict)", legacy_monthly_balance, incomes, expenses)
+    result = timed("engine (list of dict)", monthly_balance, incomes, expenses)
+    assert result.keys() == expected.keys()
+
+    income_store = ColumnarIncomeStore()
+    expense_store = ColumnarExpenseStore()
+    for rec in incomes:
+        income_store.add(rec)
+    for rec in expenses:
+        expense_store.add(rec)
+    del incomes, expenses
+
+    result = timed("engine (columnar stores)", monthly_balance, income_store, expense_store)
+    assert result.keys() == expected.keys()
+    for month in expected:
+        assert abs(result[month] - expected[month]) < 1e-6 * max(1.0, abs(expected[month]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_parallel_aggregate.py
+"""
+Benchmark: month and month x category totals of a large columnar
+ledger, summed by 1 to N worker processes (analysis.parallel).
+
+For each process count the script prints the time of
+
+- month_totals            (one pass over amount, date and alive)
+- month_group_totals      (the month x category matrix)
+
+after a warm-up request, which starts the pool and copies the columns
+into shared memory; that one-off cost is printed separately. For
+comparison it also times the same numpy pass in this process
+(processes=1) and the store's running totals (store.totals_for, which
+analysis.aggregate.month_totals reads), which answer without reading
+the rows at all.
+
+The speed-up is bounded by the number of cores (os.cpu_count()) and by
+memory bandwidth: a pass reads about 17 bytes per row.
+
+Usage:
+    python benchmarks/bench_parallel_aggregate.py                     # 10M rows, 1,2,4,8,16 processes
+    python benchmarks/bench_parallel_aggregate.py --rows 50000000 --processes 1,4,16
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from budgetmaster.analysis.parallel import ParallelAggregator
+from budgetmaster.expense.store import ColumnarExpenseStore
+
+CATEGORIES = ["food", "rent", "transportation", "entertainment", "utilities", "health", "travel", "gifts"]
+
+
+def make_store(n):
+    store = ColumnarExpenseStore()
+    days = np.arange(n) % (365 * 10) + np.datetime64("2015-01-01", "D").astype(np.int64)
+    store.add_columns({
+        "expense_id": range(1, n + 1),
+        "category": [CATEGORIES[i % len(CATEGORIES)] for i in range(n)],
+        "amount": ((np.arange(n) % 997) + 0.25).tolist(),
+        "date": np.datetime_as_string(days.astype("datetime64[D]")).tolist(),
+    })
+    return store
+
+
+def best_of(repeat, func):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--processes", default="1,2,4,8,16", help="comma-separated process counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = make_store(args.rows)
+    print("{:,} rows built in {:.1f} s, {} CPUs".format(args.rows, time.perf_counter() - start, os.cpu_count()))
+
+    with ParallelAggregator(store, processes=1) as in_process:
+        serial = best_of(args.repeat, in_process.month_totals)
+    running = best_of(args.repeat, lambda: store.totals_for("month"))
+    print("serial numpy month totals   {:8.3f} s".format(serial))
+    print("running totals (no scan)    {:8.3f} s".format(running))
+
+    print("{:>9s} {:>10s} {:>12s} {:>10s} {:>14s}".format("processes", "setup s", "months s", "speed-up", "months x cat s"))
+    base = None
+    for processes in [int(n) for n in args.processes.split(",")]:
+        with ParallelAggregator(store, processes=processes, min_rows=0) as parallel:
+            start = time.perf_counter()
+            expected = parallel.month_totals()
+            parallel.month_group_totals("category")
+            setup = time.perf_counter() - start
+            months = best_of(args.repeat, parallel.month_totals)
+            matrix = best_of(args.repeat, lambda: parallel.month_group_totals("category"))
+            assert expected.keys() == store.totals_for("month").keys()
+        base = base or months
+        print("{:>9d} {:>10.3f} {:>12.3f} {:>9.2f}x {:>14.3f}".format(processes, setup, months, base / months, matrix))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/bench_parallel_import.py
+"""
+Benchmark: importing many monthly statement files (importer.parallel).
+
+Writes --files CSV statements and imports them
+- one after another with import_statement
+- with import_statements and 1, 2, ... --max-workers worker processes
+
+and prints how many bytes one file's batch takes when pickled, packed
+(as the workers send it) vs as a list of dicts.
+
+Usage:
+    python benchmarks/bench_parallel_import.py               # 240 files x 20k rows
+    python benchmarks/bench_parallel_import.py --files 60 --rows 5000
+"""
+
+import argparse
+import csv
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+from budgetmaster.expense import entry as expense_entry
+from budgetmaster.income import entry as income_entry
+from budgetmaster.importer import parallel, statements
+
+DESCRIPTIONS = ["Monthly rent", "Coffee shop", "Grocery store", "Uber trip", "Restaurant", "Bookstore"]
+
+
+def write_files(directory, files, rows):
+    paths = []
+    for n in range(files):
+        year, month = 2005 + n // 12, n % 12 + 1
+        path = os.path.join(directory, "{:04d}-{:02d}.csv".format(year, month))
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["date", "description", "amount"])
+            for i in range(rows):
+                date = "{:04d}-{:02d}-{:02d}".format(year, month, i % 28 + 1)
+                if i % 20 == 0:
+                    writer.writerow([date, "ACME payroll", "{:.2f}".format(2000 + i % 97)])
+                else:
+                    writer.writerow([date, "{} #{}".format(DESCRIPTIONS[i % 6], i % 50), "-{:.2f}".format(i % 313 + 0.5)])
+        paths.append(path)
+    return paths
+
+
+def reset():
+    income_entry.incomes.clear()
+    expense_entry._expenses.clear()
+
+
+def timed(label, func, *args, **kwargs):
+    reset()
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    print("{:<40s} {:8.2f} s".format(label, elapsed))
+    return income_entry.get_all_incomes()[-3:], expense_entry.get_all_expenses()[-3:]
+
+
+def serial(paths):
+    for path in paths:
+        statements.import_statement(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=240)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backend", default="columnar")
+    args = parser.parse_args()
+
+    income_entry.set_storage_backend(args.backend)
+    expense_entry.set_storage_backend(args.backend)
+    directory = tempfile.mkdtemp()
+    try:
+        paths = write_files(directory, args.files, args.rows)
+        print("{} files x {:,d} rows, {} CPUs".format(args.files, args.rows, os.cpu_count()))
+
+        job = (paths[0], {
+            "chunk_size": statements.DEFAULT_CHUNK_SIZE, "format": None, "columns": None,
+            "date_format": None, "kind": None, "encoding": "utf-8-sig",
+        })
+        incomes, expenses = parallel._read_file(job)
+        rows = ([dict(zip(incomes, values)) for values in zip(*incomes.values())],
+                [dict(zip(expenses, values)) for values in zip(*expenses.values())])
+        print("one file pickled: packed batch {:,d} bytes, list of dicts {:,d} bytes".format(
+            len(pickle.dumps(parallel._read_packed(job))), len(pickle.dumps(rows))))
+
+        expected = timed("serial import_statement", serial, paths)
+        workers = 1
+        while workers <= args.max_workers:
+            result = timed("import_statements, {} worker(s)".format(workers),
+                           parallel.import_statements, paths, max_workers=workers)
+            assert result == expected
+            workers *= 2
+    finally:
+        reset()
+        income_entry.set_storage_backend("dict")
+        expense_entry.set_storage_backend("dict")
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_sqlite_backend.py
+"""
+Benchmark: the 'sqlite' storage backend against 'dict' and 'columnar'.
+
+For each backend it times a batched insert (add_incomes_bulk /
+add_expenses_bulk) and the summary functions, which the sqlite backend
+answers with SQL aggregates instead of reading rows into Python.
+
+Usage:
+    python benchmarks/bench_sqlite_backend.py               # 1M rows
+    python benchmarks/bench_sqlite_backend.py --rows 200000
+"""
+
+import argparse
+import time
+
+from budgetmaster.analysis import reports
+from budgetmaster.expense import entry as expense_entry
+from budgetmaster.income import entry as income_entry
+from budgetmaster.income import summary as income_summary
+
+CATEGORIES = ["food", "housing", "transportation", "entertainment", "other"]
+SOURCES = ["salary", "freelance", "bonus", "interest"]
+
+
+def make_columns(n, key, values):
+    return {
+        key: [values[i % len(values)] for i in range(n)],
+        "amount": [(i % 997) + 0.25 for i in range(n)],
+        "date": ["{:04d}-{:02d}-{:02d}".format(2020 + i % 5, i % 12 + 1, i % 28 + 1) for i in range(n)],
+    }
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    print("{:<44s} {:8.3f} s".format(label, elapsed))
+
+
+def reset(backend):
+    for entry in (income_entry, expense_entry):
+        entry.set_storage_backend(backend)
+    income_entry.incomes.clear()
+    expense_entry._expenses.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    income_columns = make_columns(args.rows, "source", SOURCES)
+    expense_columns = make_columns(args.rows, "category", CATEGORIES)
+
+    for backend in ("dict", "columnar", "sqlite"):
+        reset(backend)
+        timed("{}: add_incomes_bulk".format(backend), income_entry.add_incomes_bulk, income_columns)
+        timed("{}: add_expenses_bulk".format(backend), expense_entry.add_expenses_bulk, expense_columns)
+        timed("{}: total_monthly_income".format(backend), income_summary.total_monthly_income, "2022-06")
+        timed("{}: income_by_source".format(backend), income_summary.income_by_source)
+        timed("{}: total_by_category".format(backend), expense_entry.total_by_category)
+        timed("{}: monthly_balance(views)".format(backend), reports.monthly_balance,
+              income_entry.view_incomes(), expense_entry.view_expenses())
+    reset("dict")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# benchmarks/bench_statement_import.py
+"""
+Benchmark: streaming bank statement import (importer.statements).
+
+Writes a large CSV statement and measures, each in a fresh process so
+the peak RSS of one run does not hide another:
+
+- the old way: csv.DictReader with categorize_expense and one
+  add_expense / add_income call per row (on the first --baseline-rows
+  rows only)
+- read_statement + split_chunk alone: parsing and categorizing, nothing
+  stored (shows the bounded memory of the streaming reader)
+- import_statement into the stores (columnar backend by default)
+
+Usage:
+    python benchmarks/bench_statement_import.py                 # ~2 GB file
+    python benchmarks/bench_statement_import.py --size-mb 200
+"""
+
+import argparse
+import csv
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+DESCRIPTIONS = [
+    "Monthly rent", "Coffee shop", "Grocery store", "Uber trip", "Bus pass",
+    "Restaurant", "Bookstore", "Gym membership", "Gas station", "Pharmacy",
+]
+INCOME_DESCRIPTIONS = ["ACME payroll", "Freelance invoice", "Interest"]
+
+
+def write_statement(path, size_mb):
+    rows = 0
+    target = size_mb * 1024 * 1024
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["date", "description", "amount", "category"])
+        while f.tell() < target:
+            block = []
+            for i in range(rows, rows + 100_000):
+                date = "{:04d}-{:02d}-{:02d}".format(2015 + i % 10, i % 12 + 1, i % 28 + 1)
+                if i % 10 == 0:
+                    block.append((date, INCOME_DESCRIPTIONS[i % 3], "{:.2f}".format(1000 + i % 997), ""))
+                else:
+                    category = "fun" if i % 7 == 0 else ""
+                    block.append((date, DESCRIPTIONS[i % 10], "{:.2f}".format(-(i % 313) - 0.5), category))
+            writer.writerows(block)
+            rows += len(block)
+    return rows
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_baseline(path, rows):
+    from itertools import islice
+    from budgetmaster.analysis.utils import categorize_expense
+    from budgetmaster.expense import entry as expense_entry
+    from budgetmaster.income import entry as income_entry
+
+    start = time.perf_counter()
+    with open(path, newline="") as f:
+        for row in islice(csv.DictReader(f), rows):
+            amount = float(row["amount"])
+            if amount < 0:
+                category = categorize_expense(row)
+                expense_entry.add_expense(category, -amount, row["date"], row["description"])
+            else:
+                income_entry.add_income(row["description"], amount, row["date"])
+    return rows, time.perf_counter() - start, peak_rss_mb()
+
+
+def run_parse_only(path, chunk_size):
+    from budgetmaster.importer import statements
+
+    rows = 0
+    start = time.perf_counter()
+    for chunk in statements.read_statement(path, chunk_size):
+        statements.split_chunk(chunk)
+        rows += len(chunk["amount"])
+    return rows, time.perf_counter() - start, peak_rss_mb()
+
+
+def run_import(path, chunk_size, backend):
+    from budgetmaster.expense import entry as expense_entry
+    from budgetmaster.income import entry as income_entry
+    from budgetmaster.importer import statements
+
+    income_entry.set_storage_backend(backend)
+    expense_entry.set_storage_backend(backend)
+    start = time.perf_counter()
+    counts = statements.import_statement(path, chunk_size)
+    return counts["incomes"] + counts["expenses"], time.perf_counter() - start, peak_rss_mb()
+
+
+def in_fresh_process(func, *args):
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(func, *args).result()
+
+
+def report(label, per_row_mb, result):
+    rows, elapsed, rss = result
+    print("{:<34s} {:>10,d} rows {:8.2f} s {:10,.0f} rows/s {:7.1f} MB/s  peak RSS {:7.1f} MB".format(
+        label, rows, elapsed, rows / elapsed, per_row_mb * rows / elapsed, rss))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--baseline-rows", type=int, default=500_000)
+    parser.add_argument("--backend", default="columnar")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "statement.csv")
+        start = time.perf_counter()
+        total_rows = write_statement(path, args.size_mb)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print("wrote {:,d} rows ({:.0f} MB) in {:.1f} s".format(total_rows, size_mb, time.perf_counter() - start))
+        per_row_mb = size_mb / total_rows
+
+        report("row-at-a-time add_expense", per_row_mb,
+               in_fresh_process(run_baseline, path, args.baseline_rows))
+        report("read_statement + split_chunk", per_row_mb,
+               in_fresh_process(run_parse_only, path, args.chunk_size))
+        report("import_statement ({})".format(args.backend), per_row_mb,
+               in_fresh_process(run_import, path, args.chunk_size, args.backend))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_summarize.py
+"""
+Benchmark: the summaries of one report page, computed one by one or
+with a single summarize call.
+
+A report page shows the monthly balance, total by category, income by
+source, average monthly income, savings rate and a month x category
+table. For each backend the script times
+
+- copies     : get_all_incomes / get_all_expenses, then every summary
+               (and the month x category table) computed from the lists
+- functions  : the ledger methods one by one (running totals), plus the
+               month x category table from a view of the expenses
+- summarize  : Ledger.summarize(), one read of each side
+
+and checks that every variant gives the same numbers.
+
+Usage:
+    python benchmarks/bench_summarize.py                 # 200k expenses, dict/columnar/sqlite
+    python benchmarks/bench_summarize.py --rows 1000000 --backends columnar
+"""
+
+import argparse
+import time
+
+from budgetmaster.analysis import aggregate
+from budgetmaster.analysis.reports import monthly_balance, savings_rate, summarize
+from budgetmaster.ledger import Ledger
+
+CATEGORIES = ["food", "rent", "transportation", "entertainment", "utilities", "health"]
+SOURCES = ["salary", "freelance", "gift"]
+
+
+def make_ledger(backend, rows):
+    ledger = Ledger(backend)
+    ledger.add_expenses_bulk([
+        (CATEGORIES[i % len(CATEGORIES)], float(i % 97) + 0.5, "{:04d}-{:02d}-{:02d}".format(2020 + i % 5, i % 12 + 1, i % 28 + 1))
+        for i in range(rows)
+    ])
+    ledger.add_incomes_bulk([
+        (SOURCES[i % len(SOURCES)], float(i % 300) + 1000.0, "{:04d}-{:02d}-28".format(2020 + i % 5, i % 12 + 1))
+        for i in range(max(rows // 20, 1))
+    ])
+    return ledger
+
+
+def from_copies(ledger):
+    incomes = ledger.get_all_incomes()
+    expenses = ledger.get_all_expenses()
+    balance = monthly_balance(incomes, expenses)
+    by_category = {}
+    for rec in expenses:
+        by_category[rec["category"]] = by_category.get(rec["category"], 0.0) + rec["amount"]
+    by_source = {}
+    for rec in incomes:
+        by_source[rec["source"]] = by_source.get(rec["source"], 0.0) + rec["amount"]
+    income_months = aggregate.month_totals(incomes)
+    average = sum(income_months.values()) / len(income_months)
+    rate = savings_rate(sum(rec["amount"] for rec in incomes), sum(rec["amount"] for rec in expenses))
+    matrix = aggregate.month_group_totals(expenses, "category")
+    return balance, by_category, by_source, average, rate, matrix
+
+
+def one_by_one(ledger):
+    balance = ledger.monthly_balance()
+    by_category = ledger.total_by_category()
+    by_source = ledger.income_by_source()
+    average = ledger.average_monthly_income()
+    rate = savings_rate(sum(by_source.values()), sum(by_category.values()))
+    matrix = aggregate.month_group_totals(ledger.view_expenses(), "category")
+    return balance, by_category, by_source, average, rate, matrix
+
+
+def summarized(ledger):
+    summary = ledger.summarize()
+    return (summary.monthly_balance(), summary.total_by_category(), summary.income_by_source(),
+            summary.average_monthly_income(), summary.savings_rate(), summary.expense_matrix)
+
+
+def best_of(repeat, func, ledger):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(ledger)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def same(a, b):
+    # the sums are added in different orders, so compare to a tolerance
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+    if isinstance(a, tuple):
+        return all(same(x, y) for x, y in zip(a, b))
+    return abs(a - b) <= 1e-6 * max(1.0, abs(a))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000, help="expenses (incomes: rows / 20)")
+    parser.add_argument("--backends", default="dict,columnar,sqlite")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print("{:,} expenses, {:,} incomes".format(args.rows, max(args.rows // 20, 1)))
+    print("{:<10s} {:>10s} {:>12s} {:>12s}".format("backend", "copies s", "functions s", "summarize s"))
+    for backend in args.backends.split(","):
+        ledger = make_ledger(backend, args.rows)
+        copies, expected = best_of(args.repeat, from_copies, ledger)
+        functions, result = best_of(args.repeat, one_by_one, ledger)
+        assert same(expected, result)
+        single, result = best_of(args.repeat, summarized, ledger)
+        assert same(expected, result)
+        print("{:<10s} {:>10.3f} {:>12.3f} {:>12.3f}".format(backend, copies, functions, single))
+        ledger.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,4 +7,10 @@ Sub-packages:
 - income   : record and summarize incomes
 - expense  : record expenses (with a simple class + inheritance)
 - analysis : basic reports,plots and helper utilities
+- storage  : indexed in-memory stores used by income and expense
+- importer : streaming import of bank statement files (CSV, OFX)
+
+Modules:
+- ledger   : Ledger, the incomes and expenses of one household; the
+             entry module functions work on the default ledger
 """
\ No newline at end of file
@@ -6,7 +6,11 @@ This part of the package handles higher-level summaries and simple
 visualizations that combine the income and expense data.
 
 Modules:
-- reports : combine income and expenses into simple summaries like monthly balance, savings rate, simple text reports,
+- reports : combine income and expenses into simple summaries like monthly balance, savings rate, a one-pass summarize, simple text reports,
             and a few lightweight plotting functions.
-- utils   : helper functions for formatting and validation
+- plots   : the matplotlib charts; reports loads this module only when a plot function is first used
+- aggregate : month group-by engine (NumPy bincount) shared by the reports and plots
+- parallel : ParallelAggregator class. Month and month x category totals of a large columnar store, summed by a process pool over shared memory
+- utils   : helper functions for formatting, validation and expense categorization
+- rules   : RuleSet class. Ordered keyword rules for categorize_expense, compiled into one regular expression so a description is scanned once
 """ 
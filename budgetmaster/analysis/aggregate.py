@@ -0,0 +1,158 @@
+# budgetmaster/analysis/aggregate.py
+
+"""
+Month group-by engine shared by the report and summary functions.
+
+Rows are turned into small integer month codes and the amounts are
+summed per code with ``numpy.bincount`` instead of updating a Python
+dictionary for every row. Stores already checked and grouped the dates
+when the records were added (see storage.dates), so they answer from
+the running totals of their month index without reading any record
+(SQLite stores sum the months in SQL).
+
+numpy is imported inside the functions, so importing the report module
+(which imports this one) stays fast for callers that never aggregate.
+"""
+
+from budgetmaster.storage.base_store import IndexedStore, StoreView
+from budgetmaster.storage.dates import parse_date, month_key, month_name
+
+
+def month_totals(records):
+    """
+    Sum the amounts of some records for each month.
+
+    Parameters
+    ----------
+    records : iterable of dict, StoreView or store
+        Records with 'date' ('YYYY-MM-DD') and 'amount' fields.
+
+    Returns
+    -------
+    dict
+        Keys are months ('YYYY-MM') in sorted order, values are totals.
+
+    Raises
+    ------
+    ValueError
+        If a record date is not a valid 'YYYY-MM-DD' date (stores check
+        their dates when records are added).
+    """
+    if isinstance(records, StoreView):
+        records = records.store
+    if isinstance(records, IndexedStore):
+        # running totals of the month index, columnar stores included
+        # (SUM(amount) GROUP BY month for SQLite stores)
+        totals = records.totals_for("month")
+    else:
+        totals = _record_month_totals(records)
+    return dict(sorted(totals.items()))
+
+
+def month_totals_pair(incomes, expenses):
+    """
+    Monthly totals of incomes and expenses, lined up on the same months.
+
+    Returns
+    -------
+    tuple
+        (months, income_totals, expense_totals): a sorted list of every
+        month that appears on either side, and two float arrays with one
+        value per month (0.0 where a side has no records).
+    """
+    import numpy as np
+
+    income_by_month = month_totals(incomes)
+    expense_by_month = month_totals(expenses)
+    months = sorted(set(income_by_month) | set(expense_by_month))
+
+    income_vals = np.array([income_by_month.get(m, 0.0) for m in months], dtype=np.float64)
+    expense_vals = np.array([expense_by_month.get(m, 0.0) for m in months], dtype=np.float64)
+    return months, income_vals, expense_vals
+
+
+def month_group_totals(records, field, default=None):
+    """
+    Sum the amounts of some records for each month and each key of a
+    field, for example the month x category matrix of the expenses.
+
+    Parameters
+    ----------
+    records : iterable of dict, StoreView or store
+        Records with 'date', 'amount' and `field` fields.
+    field : str
+        Field to group on. For a store it must be one of its group
+        fields ('source' for incomes, 'category' for expenses).
+    default : optional
+        Key used for a dict record without the field (stores use their
+        own default).
+
+    Returns
+    -------
+    dict
+        {month: {key: total}} with months ('YYYY-MM') in sorted order;
+        only the cells that have records appear.
+
+    Raises
+    ------
+    ValueError
+        If a record date is not a valid 'YYYY-MM-DD' date, or the field
+        is not a group field of the store.
+    """
+    if isinstance(records, StoreView):
+        records = records.store
+    if isinstance(records, IndexedStore):
+        # the store walks its month index (GROUP BY month, field in SQL)
+        return records.month_totals_for(field)
+    return _record_month_group_totals(records, field, default)
+
+
+def _record_month_totals(records):
+    # one Python pass to turn each date into a month code, then one
+    # bincount; every distinct date is parsed once
+    import numpy as np
+
+    # date string -> month code, and month key -> month code
+    code_of = {}
+    table = {}
+    codes = []
+    amounts = []
+    # local names keep the per-row work down to one lookup and two appends
+    lookup = code_of.get
+    add_code = codes.append
+    add_amount = amounts.append
+    for rec in records:
+        date = rec.get("date")
+        code = lookup(date)
+        if code is None:
+            key = month_key(parse_date(date))
+            code = table.setdefault(key, len(table))
+            code_of[date] = code
+        add_code(code)
+        add_amount(rec.get("amount", 0.0))
+
+    if not table:
+        return {}
+    sums = np.bincount(
+        np.array(codes, dtype=np.intp),
+        weights=np.array(amounts, dtype=np.float64),
+        minlength=len(table),
+    )
+    return dict(zip(map(month_name, table), sums.tolist()))
+
+
+def _record_month_group_totals(records, field, default):
+    # one Python pass over dicts; every distinct date is parsed once
+    month_of_date = {}
+    result = {}
+    for rec in records:
+        date = rec.get("date")
+        month = month_of_date.get(date)
+        if month is None:
+            month = month_of_date[date] = month_name(month_key(parse_date(date)))
+        totals = result.get(month)
+        if totals is None:
+            totals = result[month] = {}
+        key = rec.get(field, default)
+        totals[key] = totals.get(key, 0.0) + rec.get("amount", 0.0)
+    return dict(sorted(result.items()))
@@ -0,0 +1,318 @@
+# budgetmaster/analysis/parallel.py
+
+"""
+Parallel aggregation of very large columnar ledgers.
+
+The stores keep running totals per month and per group field, so
+monthly_balance, income_by_source or total_by_category never read every
+record. What does read every row is recomputing totals from the raw
+columns, for example the month x category matrix of a report page, the
+totals of a ledger mapped from a file, or a check of the running totals.
+For tens of millions of rows such a pass is CPU-bound on one core, and
+this module splits it across a process pool.
+
+The columns of a ColumnarStore (or MappedStore) are copied once into
+shared memory blocks (multiprocessing.shared_memory), so the workers
+read them without pickling anything. Each worker sums a range of rows
+into a small (months x keys) matrix with np.bincount; the parent adds
+the matrices up. The copy is kept for as long as the store does not
+change, so repeated reports only pay for the aggregation.
+
+Only dictionary-encoded fields (every group field, like category or
+source, and the encoded fields) can be grouped on; tags are not.
+
+Given the book of a ledger side (IncomeBook or ExpenseBook), the
+aggregator holds the book's lock while it reads or copies the columns,
+so other threads can keep adding records; the workers then sum the copy
+without the lock. Given a bare store, nothing may change it meanwhile:
+a change seen during the copy raises RuntimeError.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from budgetmaster.expense.entry import ExpenseBook
+from budgetmaster.income.entry import IncomeBook
+from budgetmaster.storage.base_store import StoreView
+from budgetmaster.storage.columnar import ColumnarStore
+from budgetmaster.storage.journal import JournaledStore
+from budgetmaster.storage.dates import month_name
+
+# below this many rows the sums are computed in this process, where
+# they take less time than starting the workers
+MIN_PARALLEL_ROWS = 1_000_000
+
+# dtype of each shared column
+_DTYPES = {"amount": "float64", "date": "int32", "alive": "uint8", "codes": "uint32"}
+
+# worker side: the shared blocks of the current job, name -> (block, array)
+_attached = {}
+
+
+class ParallelAggregator:
+    """
+    Month and group totals of one columnar store, computed by a pool of
+    worker processes.
+
+    Parameters
+    ----------
+    store : ColumnarStore, StoreView of one, or IncomeBook / ExpenseBook
+        The ledger side to aggregate (for example income_entry.incomes
+        with the 'columnar' backend, or a ledger loaded with load_ledger).
+        Pass the book (ledger.income, ledger.expense) when other threads
+        change it: its current store is then read under its lock.
+    processes : int, optional
+        Number of worker processes (default: one per CPU).
+    min_rows : int
+        Stores with fewer rows are aggregated in this process.
+
+    Raises
+    ------
+    TypeError
+        If the store is not columnar (the dict and SQLite stores keep no
+        columns to share; use the 'columnar' backend for large ledgers).
+        For a book this is checked again on every request.
+
+    The aggregator owns the pool and the shared memory: use it in a
+    `with` block or call close().
+    """
+
+    def __init__(self, store, processes=None, min_rows=MIN_PARALLEL_ROWS):
+        if isinstance(store, StoreView):
+            store = store.store
+        self.book = None
+        self.lock = nullcontext()
+        if isinstance(store, (IncomeBook, ExpenseBook)):
+            self.book = store
+            self.lock = store.lock
+        self.store = _columnar(store)
+        self.processes = processes
+        self.min_rows = min_rows
+        self._pool = None
+        # name of the column -> SharedMemory, copied from self.store at
+        # version _version (dropped when the book's store is replaced)
+        self._blocks = {}
+        self._version = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def month_totals(self):
+        """
+        Return {month: total amount}, months in sorted order (the same
+        as analysis.aggregate.month_totals of the store).
+        """
+        months, _, sums, counts = self._sums(None)
+        totals = sums[:, 0].tolist()
+        return {month: total for month, total, count in zip(months, totals, counts[:, 0].tolist()) if count}
+
+    def group_totals(self, field):
+        """
+        Return {key: total amount} for a dictionary-encoded field, for
+        example 'category' (the same as store.totals_for(field)).
+        """
+        _, keys, sums, counts = self._sums(field)
+        totals = sums.sum(axis=0).tolist()
+        return {key: total for key, total, count in zip(keys, totals, counts.sum(axis=0).tolist()) if count}
+
+    def month_group_totals(self, field):
+        """
+        Return {month: {key: total amount}} for a dictionary-encoded
+        field: the per-month per-key matrix, with only the cells that
+        have records. Months are in sorted order.
+        """
+        months, keys, sums, counts = self._sums(field)
+        result = {}
+        for month, row, row_counts in zip(months, sums.tolist(), counts.tolist()):
+            cells = {key: total for key, total, count in zip(keys, row, row_counts) if count}
+            if cells:
+                result[month] = cells
+        return result
+
+    def close(self):
+        """
+        Stop the worker processes and free the shared memory.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self._free()
+
+    def _sums(self, field):
+        # (month names, keys, sums matrix, counts matrix) of the whole store
+        import numpy as np
+
+        with self.lock:
+            if self.book is not None:
+                # set_storage_backend or load_ledger may have replaced it;
+                # a new store can have the same version as the copied one
+                store = _columnar(self.book)
+                if store is not self.store:
+                    self._free()
+                    self.store = store
+            store = self.store
+            columns = store.columns()
+            rows = len(columns["amount"])
+            codes, keys = (None, [None]) if field is None else store.encoded_column(field)
+            keys = list(keys)
+            size = max(len(keys), 1)
+
+            if rows < self.min_rows or self.processes == 1:
+                return _merge([_partial_sums(
+                    np.frombuffer(columns["amount"], dtype=np.float64),
+                    np.frombuffer(columns["date"], dtype=np.int32),
+                    np.frombuffer(columns["alive"], dtype=np.uint8),
+                    None if codes is None else np.frombuffer(codes, dtype=np.uint32),
+                    size,
+                )], keys, size)
+            names = self._share(columns, field, codes)
+
+        # the workers read the copy, so the lock is not held meanwhile
+        workers = self.processes or _cpu_count()
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=workers)
+        # a few ranges per worker, so a slow one does not hold up the rest
+        bounds = np.linspace(0, rows, workers * 4 + 1).astype(np.int64).tolist()
+        jobs = [(names, rows, start, stop, size) for start, stop in zip(bounds, bounds[1:]) if stop > start]
+        return _merge(list(self._pool.map(_sum_range, jobs)), keys, size)
+
+    def _share(self, columns, field, codes):
+        # copy the columns into shared memory (once per store version)
+        # and return the block names of the columns a job needs
+        import numpy as np
+        from multiprocessing import shared_memory
+
+        if self._version != self.store.version:
+            self._free()
+            self._version = self.store.version
+        version = self._version
+        wanted = {"amount": columns["amount"], "date": columns["date"], "alive": columns["alive"]}
+        if field is not None:
+            wanted["codes:" + field] = codes
+        for name, column in wanted.items():
+            if name in self._blocks:
+                continue
+            dtype = _DTYPES[name.split(":")[0]]
+            source = np.frombuffer(column, dtype=dtype)
+            block = shared_memory.SharedMemory(create=True, size=max(source.nbytes, 1))
+            target = np.ndarray(source.shape, dtype=dtype, buffer=block.buf)
+            target[:] = source
+            # the array must be gone before the block can be closed
+            del target
+            self._blocks[name] = block
+        if self.store.version != version:
+            # changed while being copied: the blocks may mix two versions
+            self._free()
+            raise RuntimeError("Store changed while its columns were copied; "
+                               "pass its book so the copy is made under the book's lock.")
+        names = {"amount": self._blocks["amount"].name, "date": self._blocks["date"].name,
+                 "alive": self._blocks["alive"].name}
+        if field is not None:
+            names["codes"] = self._blocks["codes:" + field].name
+        return names
+
+    def _free(self):
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+        self._blocks = {}
+        self._version = None
+
+
+def _columnar(store):
+    # the columnar store behind a book, a journal or the store itself
+    if isinstance(store, IncomeBook):
+        store = store.incomes
+    elif isinstance(store, ExpenseBook):
+        store = store.expenses
+    if isinstance(store, JournaledStore):
+        store = store.inner
+    if not isinstance(store, ColumnarStore):
+        raise TypeError("Parallel aggregation needs a columnar store, got {}.".format(type(store).__name__))
+    return store
+
+
+def _partial_sums(amounts, days, alive, codes, size):
+    # (first month, sums, counts) of some rows: sums and counts are
+    # (months x size) matrices starting at month `first` (months since
+    # 1970-01); dead rows are left out
+    import numpy as np
+
+    if not alive.all():
+        keep = alive.view(bool)
+        amounts, days = amounts[keep], days[keep]
+        if codes is not None:
+            codes = codes[keep]
+    if not days.size:
+        return 0, np.zeros((0, size)), np.zeros((0, size), dtype=np.int64)
+    months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    first = int(months.min())
+    span = int(months.max()) - first + 1
+    index = months - first
+    if codes is not None:
+        index = index * size + codes
+    sums = np.bincount(index, weights=amounts, minlength=span * size).reshape(span, size)
+    counts = np.bincount(index, minlength=span * size).reshape(span, size)
+    return first, sums, counts
+
+
+def _merge(parts, keys, size):
+    # add the partial matrices up on one month axis
+    import numpy as np
+
+    parts = [part for part in parts if len(part[1])]
+    if not parts:
+        return [], keys, np.zeros((0, size)), np.zeros((0, size), dtype=np.int64)
+    first = min(part[0] for part in parts)
+    span = max(part[0] + len(part[1]) for part in parts) - first
+    sums = np.zeros((span, size))
+    counts = np.zeros((span, size), dtype=np.int64)
+    for start, part_sums, part_counts in parts:
+        offset = start - first
+        sums[offset:offset + len(part_sums)] += part_sums
+        counts[offset:offset + len(part_counts)] += part_counts
+    # months since 1970-01 -> month keys -> names from the month table
+    months = [month_name((m // 12 + 1970) * 100 + m % 12 + 1) for m in range(first, first + span)]
+    return months, keys, sums, counts
+
+
+def _sum_range(job):
+    # worker: partial sums of rows start:stop of the shared columns
+    names, rows, start, stop, size = job
+    arrays = _attach(names, rows)
+    return _partial_sums(
+        arrays["amount"][start:stop],
+        arrays["date"][start:stop],
+        arrays["alive"][start:stop],
+        arrays["codes"][start:stop] if "codes" in arrays else None,
+        size,
+    )
+
+
+def _attach(names, rows):
+    # map the shared blocks of a job, keeping them for the next jobs;
+    # blocks of an older store version are let go
+    import numpy as np
+    from multiprocessing import shared_memory
+
+    current = set(names.values())
+    for name in list(_attached):
+        if name not in current:
+            block, _ = _attached.pop(name)
+            block.close()
+    arrays = {}
+    for column, name in names.items():
+        if name not in _attached:
+            block = shared_memory.SharedMemory(name=name)
+            _attached[name] = (block, np.ndarray((rows,), dtype=_DTYPES[column], buffer=block.buf))
+        arrays[column] = _attached[name][1]
+    return arrays
+
+
+def _cpu_count():
+    import os
+
+    return os.cpu_count() or 1
@@ -0,0 +1,130 @@
+# budgetmaster/analysis/plots.py
+
+"""
+Plotting functions for the analysis reports.
+
+They live in their own module because importing matplotlib takes a few
+hundred milliseconds. analysis.reports still exposes them under the same
+names and only imports this module the first time one is used.
+"""
+
+import matplotlib.pyplot as plt
+from collections import defaultdict
+
+from .aggregate import month_totals_pair
+
+
+def plot_monthly_balance(balance_data):
+    """
+    Visualize monthly net balance (income - expense) as a simple bar chart.
+
+    Parameters
+    ----------
+    balance_data : dict
+        Keys are months 'YYYY-MM', values are balance amounts.
+
+    Notes
+    -----
+    This function is intentionally simple since the project
+    only requires lightweight examples.
+    """
+    if not balance_data:
+        print("No balance data to plot.")
+        return
+
+    # sort months so the x-axis is ordered
+    months = sorted(balance_data.keys())
+    values = [balance_data[m] for m in months]
+
+    plt.figure(figsize=(7, 4))
+    bars = plt.bar(months, values)
+
+    # Add horizontal line at zero
+    plt.axhline(0, color="black", linewidth=1)
+
+    plt.title("Monthly Net Balance (Income - Expense)")
+    plt.xlabel("Month")
+    plt.ylabel("Balance Amount")
+
+    # Add labels on top of each bar
+    for bar in bars:
+        height = bar.get_height()
+        plt.text(
+            bar.get_x() + bar.get_width() / 2,
+            height,
+            f"{height:.0f}",
+            ha="center",
+            va="bottom"
+        )
+
+    plt.tight_layout()
+    plt.show()
+
+
+def plot_income_vs_expense(incomes, expenses):
+    """
+    Create a grouped bar chart comparing monthly income and monthly expenses.
+
+    Parameters
+    ----------
+    incomes : list of dict, or a store view
+    expenses : list of dict, or a store view
+
+    Notes
+    -----
+    We use the month ('YYYY-MM') part of the date instead of full
+    datetime parsing to keep the project simple.
+    """
+
+    # group income and expense by month, lined up on the same months
+    all_months, inc_vals, exp_vals = month_totals_pair(incomes, expenses)
+
+    if not all_months:
+        print("No income or expense data to plot.")
+        return
+
+    x = range(len(all_months))
+    width = 0.35
+
+    plt.figure(figsize=(7, 4))
+    plt.bar([i - width / 2 for i in x], inc_vals, width, label="Income")
+    plt.bar([i + width / 2 for i in x], exp_vals, width, label="Expense")
+
+    plt.xticks(list(x), all_months)
+    plt.ylabel("Amount")
+    plt.title("Monthly Income vs Expense")
+    plt.legend()
+    plt.tight_layout()
+    plt.show()
+
+
+def plot_category_expense(expenses):
+    """
+    Plot a simple pie chart showing total expense amounts by category.
+
+    Parameters
+    ----------
+    expenses : list of dict, or a store view
+    """
+    totals = defaultdict(float)
+    for rec in expenses:
+        cat = rec.get("category", "other")
+        totals[cat] += rec.get("amount", 0.0)
+
+    if not totals:
+        print("No expense data to plot.")
+        return
+
+    labels = list(totals.keys())
+    sizes = list(totals.values())
+
+    plt.figure(figsize=(6, 6))
+    plt.pie(
+        sizes,
+        labels=labels,
+        autopct="%1.1f%%",
+        startangle=90,
+    )
+    plt.title("Expense Breakdown by Category")
+    plt.tight_layout()
+    plt.show()
@@ -1,7 +1,20 @@
 # budgetmaster/analysis/reports.py
 
-import matplotlib.pyplot as plt
-from collections import defaultdict
+from budgetmaster.expense.store import ExpenseStore
+from budgetmaster.income.store import IncomeStore
+
+from .aggregate import month_group_totals, month_totals_pair
+
+# plotting functions that are loaded from analysis.plots on first use,
+# so importing this module does not import matplotlib
+_PLOT_FUNCTIONS = (
+    "plot_monthly_balance",
+    "plot_income_vs_expense",
+    "plot_category_expense",
+)
+
+# single worker thread of monthly_balance_async, created on first use
+_report_executor = None
 
 
 def monthly_balance(incomes, expenses):
@@ -10,47 +23,180 @@ def monthly_balance(incomes, expenses):
 
     Parameters
     ----------
-    incomes : list of dict
-    expenses : list of dict
+    incomes : list of dict, or a store view (see income.entry.view_incomes)
+    expenses : list of dict, or a store view (see expense.entry.view_expenses)
+
+    Returns
+    -------
+    dict
+        Keys are months (like '2025-11') in sorted order and values are
+        net balances.
+    """
+    # group both sides by month with the shared aggregation engine
+    months, inc_totals, exp_totals = month_totals_pair(incomes, expenses)
+    return dict(zip(months, (inc_totals - exp_totals).tolist()))
+
+
+async def monthly_balance_async(incomes, expenses, executor=None):
+    """
+    Same as monthly_balance, for asyncio code: the grouping runs in an
+    executor thread, so the event loop keeps serving other tasks while a
+    large ledger is aggregated.
+
+    Parameters
+    ----------
+    incomes, expenses
+        As for monthly_balance. They are read in the executor thread, so
+        they must not be changed until the result is ready; to report on
+        a ledger that other tasks keep writing to, use
+        AsyncLedger.monthly_balance (see budgetmaster.ledger), which
+        holds the ledger's locks.
+    executor : concurrent.futures.Executor, optional
+        Where to run it. By default every call goes to one shared
+        worker thread: the grouping holds the GIL for its Python parts,
+        so several of them at once are not faster and leave the event
+        loop waiting longer for its turn.
 
     Returns
     -------
     dict
-        Keys are months (like '2025-11') and values are net balances.
+        Keys are months in sorted order, values are net balances.
+    """
+    import asyncio
+
+    if executor is None:
+        executor = _get_report_executor()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, monthly_balance, incomes, expenses)
+
+
+def _get_report_executor():
+    global _report_executor
+    if _report_executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _report_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="budgetmaster-report")
+    return _report_executor
+
+
+class Summary:
+    """
+    Everything a report page shows about a ledger, built by summarize
+    from one month x key matrix per side. The methods are named after
+    the functions they stand in for and return new dicts.
+
+    Attributes
+    ----------
+    months : list of str
+        Every month with incomes or expenses, sorted.
+    income_matrix : dict
+        {month: {source: total}}, only the cells with records.
+    expense_matrix : dict
+        {month: {category: total}}, only the cells with records.
+    income_by_month, expense_by_month : dict
+        {month: total} of the months with records on that side.
+    total_income, total_expense : float
+        Totals of the whole ledger.
+    """
+
+    def __init__(self, income_matrix, expense_matrix):
+        self.income_matrix = income_matrix
+        self.expense_matrix = expense_matrix
+        self.income_by_month = {month: sum(cells.values()) for month, cells in income_matrix.items()}
+        self.expense_by_month = {month: sum(cells.values()) for month, cells in expense_matrix.items()}
+        self.months = sorted(set(income_matrix) | set(expense_matrix))
+        self.total_income = float(sum(self.income_by_month.values()))
+        self.total_expense = float(sum(self.expense_by_month.values()))
+        self._by_source = _column_totals(income_matrix)
+        self._by_category = _column_totals(expense_matrix)
+
+    def monthly_balance(self):
+        """
+        Same as monthly_balance: {month: income - expense}, sorted.
+        """
+        income, expense = self.income_by_month, self.expense_by_month
+        return {month: income.get(month, 0.0) - expense.get(month, 0.0) for month in self.months}
+
+    def income_by_source(self):
+        """
+        Same as income.summary.income_by_source: {source: total}.
+        """
+        return dict(self._by_source)
+
+    def total_by_category(self):
+        """
+        Same as expense.entry.total_by_category: {category: total}.
+        """
+        return dict(self._by_category)
+
+    def total_monthly_income(self, month):
+        """
+        Same as income.summary.total_monthly_income for a 'YYYY-MM' month.
+        """
+        return float(self.income_by_month.get(month, 0.0))
+
+    def average_monthly_income(self):
+        """
+        Same as income.summary.average_monthly_income: the average over
+        the months that have incomes (0.0 if there are none).
+        """
+        if not self.income_by_month:
+            return 0.0
+        return float(self.total_income / len(self.income_by_month))
+
+    def savings_rate(self):
+        """
+        savings_rate of the whole ledger's income and expense totals.
+        """
+        return savings_rate(self.total_income, self.total_expense)
+
+    def report(self):
+        """
+        generate_report of the monthly balance.
+        """
+        return generate_report(self.monthly_balance())
+
+
+def summarize(incomes, expenses):
+    """
+    Compute every summary of a report page at once: the monthly
+    balance, income by source, total by category, average monthly
+    income, savings rate, and the month x source and month x category
+    matrices.
+
+    Each side is read once into its matrix (stores walk their month
+    index, SQLite stores run one GROUP BY, columnar stores use NumPy)
+    and everything else is derived from the two small matrices, instead
+    of one scan, and often one copy, of the ledger per function.
+
+    Parameters
+    ----------
+    incomes : list of dict, or a store view (see income.entry.view_incomes)
+    expenses : list of dict, or a store view (see expense.entry.view_expenses)
+
+    Returns
+    -------
+    Summary
+        The matrices, month totals and ledger totals, with methods named
+        after the functions they replace (monthly_balance,
+        total_by_category, income_by_source, ...).
+
+    Raises
+    ------
+    ValueError
+        If a record date is not a valid 'YYYY-MM-DD' date.
     """
-    income_by_month = {}
-    expense_by_month = {}
-
-    # sum incomes by month
-    for rec in incomes:
-        date = rec.get("date", "")
-        if isinstance(date, str) and len(date) >= 7:
-            month = date[:7]
-            amount = rec.get("amount", 0.0)
-            if month not in income_by_month:
-                income_by_month[month] = 0.0
-            income_by_month[month] += amount
-
-    # sum expenses by month
-    for rec in expenses:
-        date = rec.get("date", "")
-        if isinstance(date, str) and len(date) >= 7:
-            month = date[:7]
-            amount = rec.get("amount", 0.0)
-            if month not in expense_by_month:
-                expense_by_month[month] = 0.0
-            expense_by_month[month] += amount
-
-    # use sorted months so later plots look nicer
-    all_months = sorted(set(income_by_month.keys()) | set(expense_by_month.keys()))
-    result = {}
-
-    for m in all_months:
-        inc_total = income_by_month.get(m, 0.0)
-        exp_total = expense_by_month.get(m, 0.0)
-        result[m] = inc_total - exp_total
-
-    return result
+    income_matrix = month_group_totals(incomes, "source", IncomeStore.group_fields["source"])
+    expense_matrix = month_group_totals(expenses, "category", ExpenseStore.group_fields["category"])
+    return Summary(income_matrix, expense_matrix)
+
+
+def _column_totals(matrix):
+    # {month: {key: total}} -> {key: total over all months}
+    totals = {}
+    for cells in matrix.values():
+        for key, total in cells.items():
+            totals[key] = totals.get(key, 0.0) + total
+    return totals
 
 
 def savings_rate(incomes_total, expenses_total):
@@ -99,138 +245,14 @@ def generate_report(balance_data):
     return "\n".join(lines)
 
 
-def plot_monthly_balance(balance_data):
-    """
-    Visualize monthly net balance (income - expense) as a simple bar chart.
-
-    Parameters
-    ----------
-    balance_data : dict
-        Keys are months 'YYYY-MM', values are balance amounts.
-
-    Notes
-    -----
-    This function is intentionally simple since the project
-    only requires lightweight examples.
-    """
-    if not balance_data:
-        print("No balance data to plot.")
-        return
-
-    # sort months so the x-axis is ordered
-    months = sorted(balance_data.keys())
-    values = [balance_data[m] for m in months]
-
-    plt.figure(figsize=(7, 4))
-    bars = plt.bar(months, values)
-
-    # Add horizontal line at zero
-    plt.axhline(0, color="black", linewidth=1)
-
-    plt.title("Monthly Net Balance (Income - Expense)")
-    plt.xlabel("Month")
-    plt.ylabel("Balance Amount")
-
-    # Add labels on top of each bar
-    for bar in bars:
-        height = bar.get_height()
-        plt.text(
-            bar.get_x() + bar.get_width() / 2,
-            height,
-            f"{height:.0f}",
-            ha="center",
-            va="bottom"
-        )
-
-    plt.tight_layout()
-    plt.show()
-
-
-def plot_income_vs_expense(incomes, expenses):
-    """
-    Create a grouped bar chart comparing monthly income and monthly expenses.
-
-    Parameters
-    ----------
-    incomes : list of dict
-    expenses : list of dict
-
-    Notes
-    -----
-    We use string slicing on the date (YYYY-MM) instead of full
-    datetime parsing to keep the project simple.
-    """
-
-    # Group income by month
-    monthly_income = defaultdict(float)
-    for rec in incomes:
-        date = rec.get("date", "")
-        if isinstance(date, str) and len(date) >= 7:
-            month = date[:7]
-            monthly_income[month] += rec.get("amount", 0.0)
-
-    # Group expense by month
-    monthly_exp = defaultdict(float)
-    for rec in expenses:
-        date = rec.get("date", "")
-        if isinstance(date, str) and len(date) >= 7:
-            month = date[:7]
-            monthly_exp[month] += rec.get("amount", 0.0)
-
-    if not monthly_income and not monthly_exp:
-        print("No income or expense data to plot.")
-        return
-
-    # Ensure consistent month order
-    all_months = sorted(set(monthly_income.keys()) | set(monthly_exp.keys()))
-
-    inc_vals = [monthly_income[m] for m in all_months]
-    exp_vals = [monthly_exp[m] for m in all_months]
-
-    x = range(len(all_months))
-    width = 0.35
-
-    plt.figure(figsize=(7, 4))
-    plt.bar([i - width / 2 for i in x], inc_vals, width, label="Income")
-    plt.bar([i + width / 2 for i in x], exp_vals, width, label="Expense")
-
-    plt.xticks(list(x), all_months)
-    plt.ylabel("Amount")
-    plt.title("Monthly Income vs Expense")
-    plt.legend()
-    plt.tight_layout()
-    plt.show()
-
-
-def plot_category_expense(expenses):
-    """
-    Plot a simple pie chart showing total expense amounts by category.
-
-    Parameters
-    ----------
-    expenses : list of dict
-    """
-    totals = defaultdict(float)
-    for rec in expenses:
-        cat = rec.get("category", "other")
-        totals[cat] += rec.get("amount", 0.0)
-
-    if not totals:
-        print("No expense data to plot.")
-        return
-
-    labels = list(totals.keys())
-    sizes = list(totals.values())
-
-    plt.figure(figsize=(6, 6))
-    plt.pie(
-        sizes,
-        labels=labels,
-        autopct="%1.1f%%",
-        startangle=90,
-    )
-    plt.title("Expense Breakdown by Category")
-    plt.tight_layout()
-    plt.show()
+def __getattr__(name):
+    # module-level __getattr__ (PEP 562): only called for names that are
+    # not defined above, i.e. the plotting functions
+    if name in _PLOT_FUNCTIONS:
+        from . import plots
+        return getattr(plots, name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
 
 
+def __dir__():
+    return sorted(list(globals().keys()) + list(_PLOT_FUNCTIONS))
@@ -0,0 +1,139 @@
+# budgetmaster/analysis/rules.py
+
+"""
+Keyword rules for guessing expense categories.
+
+A rule set is an ordered list of (category, keywords) pairs: the first
+rule with a keyword inside the normalized description (see
+normalize_description) wins. Instead of testing every keyword with
+`in`, all keywords are compiled into one regular expression shaped like
+a trie (keywords with a common start share it, for example 'bus' and
+'bus pass' become 'bus(?: pass)?'), so a description is scanned once
+whatever the number of rules.
+
+The expression sits in a lookahead, so it is tried at every position
+of the description and finds overlapping keywords too. At one position
+it returns the longest keyword; every shorter keyword that also matches
+there is a prefix of it, so each keyword is stored with the best rule
+among its prefixes and the result is the same as checking the rules one
+after another.
+"""
+
+import re
+
+# runs of whitespace, collapsed to one space by the normalization
+_SPACES = re.compile(r"\s+")
+
+# the rules categorize_expense used before they became configurable
+DEFAULT_RULES = {
+    "housing": ("rent", "mortgage"),
+    "transportation": ("uber", "bus", "train", "gas"),
+    "food": ("grocery", "restaurant", "coffee"),
+}
+
+
+def normalize_description(description):
+    """
+    Return the form of a description the rules are matched against:
+    lowercase, with runs of whitespace collapsed to one space and no
+    leading or trailing spaces. 'POS  Coffee Shop ' and 'pos coffee shop'
+    are the same description.
+    """
+    return " ".join(description.lower().split())
+
+
+class RuleSet:
+    """
+    Ordered keyword rules compiled into one matcher.
+
+    Parameters
+    ----------
+    rules : dict or iterable of (str, iterable of str)
+        Category -> keywords, in priority order. Keywords are matched
+        anywhere in the description, ignoring case and repeated spaces.
+    default : str
+        Category of descriptions that match no rule.
+
+    Raises
+    ------
+    ValueError
+        If a keyword is empty.
+    """
+
+    def __init__(self, rules, default="other"):
+        if isinstance(rules, dict):
+            rules = rules.items()
+        self.rules = [(category, tuple(keywords)) for category, keywords in rules]
+        self.default = default
+        self.categories = [category for category, _ in self.rules]
+
+        # keyword -> position of the first rule that has it
+        priority = {}
+        for position, (category, keywords) in enumerate(self.rules):
+            for keyword in keywords:
+                keyword = _SPACES.sub(" ", keyword.lower())
+                if not keyword:
+                    raise ValueError("Empty keyword in rule '{}'.".format(category))
+                priority.setdefault(keyword, position)
+        # keyword -> best rule among the keywords it starts with
+        self._best = {
+            keyword: min(priority[keyword[:size]] for size in range(1, len(keyword) + 1)
+                         if keyword[:size] in priority)
+            for keyword in priority
+        }
+        self._finditer = None
+        if priority:
+            self._finditer = re.compile("(?=({}))".format(_trie_pattern(priority))).finditer
+
+    def __len__(self):
+        return len(self.rules)
+
+    def categorize(self, description):
+        """
+        Return the category of one description (self.default if no
+        rule matches).
+        """
+        return self.match(normalize_description(description))
+
+    def match(self, text):
+        """
+        Same as categorize, for a description that is already
+        normalized (see normalize_description).
+        """
+        if self._finditer is None:
+            return self.default
+        best = None
+        lookup = self._best
+        for found in self._finditer(text):
+            position = lookup[found.group(1)]
+            if best is None or position < best:
+                best = position
+                if best == 0:
+                    break
+        if best is None:
+            return self.default
+        return self.categories[best]
+
+
+def _trie_pattern(words):
+    # regular expression matching any of the words, built from a trie so
+    # words with a common start share it
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        # "" marks the end of a word
+        node[""] = {}
+    return _node_pattern(trie)
+
+
+def _node_pattern(node):
+    branches = [re.escape(char) + _node_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:{})".format("|".join(branches))
+    if "" in node:
+        # a word ends here: the longer words are tried first (greedy)
+        return "(?:{})?".format(body)
+    return body
@@ -1,5 +1,10 @@
 # budgetmaster/analysis/utils.py
 
+from array import array
+from functools import lru_cache
+
+from .rules import RuleSet, DEFAULT_RULES, normalize_description
+
 class InvalidAmountError(ValueError):
     """
     Custom error raised when a numeric amount is invalid (for example,
@@ -9,10 +14,31 @@ class InvalidAmountError(ValueError):
     pass
 
 
+# keyword rules used by categorize_expense (see analysis.rules)
+_rules = RuleSet(DEFAULT_RULES)
+
+# number of normalized descriptions whose category is remembered
+CATEGORY_CACHE_SIZE = 8192
+
+
+def _match_category(text):
+    return _rules.match(text)
+
+
+# normalized description -> category, least recently used dropped first;
+# cleared whenever the rules change
+_cached_category = lru_cache(maxsize=CATEGORY_CACHE_SIZE)(_match_category)
+
+
 def categorize_expense(expense):
     """
     Try to guess a category for the expense based on its description.
 
+    The description is matched against the current rules (see
+    set_category_rules) in one pass. Categories are cached per
+    normalized description (see category_cache_info), so a description
+    seen recently is a single dictionary lookup.
+
     Parameters
     ----------
     expense : dict
@@ -26,16 +52,101 @@ def categorize_expense(expense):
     if "category" in expense and expense["category"]:
         return expense["category"]
 
-    desc = str(expense.get("description", "")).lower()
+    return _cached_category(normalize_description(str(expense.get("description", ""))))
+
+
+def categorize_expenses(records):
+    """
+    Guess the categories of many expenses at once, for example the rows
+    of a bank export.
+
+    Same result as calling categorize_expense on each record, but every
+    distinct description of the batch is only looked up once (in the
+    same cache as categorize_expense).
+
+    Parameters
+    ----------
+    records : iterable of dict
+
+    Returns
+    -------
+    list of str
+        One category per record, in order.
+    """
+    # description -> category, for this batch
+    seen = {}
+    categories = []
+    add = categories.append
+    for expense in records:
+        category = expense.get("category")
+        if not category:
+            description = str(expense.get("description", ""))
+            category = seen.get(description)
+            if category is None:
+                category = seen[description] = _cached_category(normalize_description(description))
+        add(category)
+    return categories
+
+
+def set_category_rules(rules, default="other"):
+    """
+    Replace the keyword rules used by categorize_expense. The category
+    cache is cleared, so no answer of the old rules is reused.
+
+    Parameters
+    ----------
+    rules : dict or iterable of (str, iterable of str)
+        Category -> keywords, in priority order: the first rule with a
+        keyword in the description wins, for example
+        {"housing": ["rent", "mortgage"], "food": ["coffee"]}.
+        Keywords are matched anywhere in the description, ignoring case.
+    default : str
+        Category used when no rule matches.
+
+    Returns
+    -------
+    RuleSet
+        The compiled rules.
+    """
+    global _rules
+    _rules = RuleSet(rules, default)
+    _cached_category.cache_clear()
+    return _rules
+
+
+def get_category_rules():
+    """
+    Return the RuleSet currently used by categorize_expense.
+    """
+    return _rules
+
+
+def category_cache_info():
+    """
+    Return the counters of the category cache.
+
+    Returns
+    -------
+    namedtuple
+        (hits, misses, maxsize, currsize), see functools.lru_cache.
+    """
+    return _cached_category.cache_info()
+
+
+def clear_category_cache():
+    """
+    Empty the category cache and reset its counters.
+    """
+    _cached_category.cache_clear()
 
-    if "rent" in desc or "mortgage" in desc:
-        return "housing"
-    if "uber" in desc or "bus" in desc or "train" in desc or "gas" in desc:
-        return "transportation"
-    if "grocery" in desc or "restaurant" in desc or "coffee" in desc:
-        return "food"
 
-    return "other"
+def set_category_cache_size(maxsize):
+    """
+    Change how many normalized descriptions the category cache keeps
+    (None for no limit, 0 to turn the cache off). The cache starts empty.
+    """
+    global _cached_category
+    _cached_category = lru_cache(maxsize=maxsize)(_match_category)
 
 
 def format_currency(amount):
@@ -64,5 +175,29 @@ def validate_amount(amount):
         raise InvalidAmountError("Amount must be non-negative.")
 
 
+def validate_amounts(amounts):
+    """
+    Check a whole column of amounts at once (used by the bulk add
+    functions).
+
+    Parameters
+    ----------
+    amounts : sequence of float or int
 
+    Returns
+    -------
+    array.array
+        The amounts as a float array ('d').
 
+    Raises
+    ------
+    InvalidAmountError
+        If any amount is negative. The message gives the first bad row.
+    """
+    values = array("d", amounts)
+    # min() runs in C, so the common (all valid) case is one fast pass
+    if values and min(values) < 0:
+        for row, amount in enumerate(values):
+            if amount < 0:
+                raise InvalidAmountError("Amount must be non-negative (row {}).".format(row))
+    return values
@@ -4,5 +4,6 @@ Expense sub-package.
 
 Modules:
 - base_transaction : BaseTransaction class. It defines a basic transaction class with: amount, date, and description. It also includes update and dictionary methods. This class is the parent for all expense objects.
-- entry            : Expense class (inherits from BaseTransaction) and simple helper functions for expenses, such as add expenses, delete expenses, view all expenses,check whether spending goes over a budget limit. Users can also add tags to organize spending.
+- entry            : Expense class (inherits from BaseTransaction) and simple helper functions for expenses, such as add expenses, delete expenses, view all expenses,check whether spending goes over a budget limit. Users can also add tags to organize spending. The helper functions are the methods of ExpenseBook, one per ledger (see budgetmaster.ledger).
+- store            : ExpenseStore class. It keeps expense records indexed by id, category and month so lookups and deletes do not scan the whole list.
 """
\ No newline at end of file
@@ -1,9 +1,24 @@
 
 # budgetmaster/expense/base_transaction.py
 
-class BaseTransaction:
+from collections.abc import Mapping
+
+
+class BaseTransaction(Mapping):
     """
-    Base class for transaction-like objects. 
+    Base class for transaction-like objects.
+
+    Instances use __slots__ (no per-object __dict__) because they are the
+    stored form of every record. They can also be read like a read-only
+    dictionary -- rec["amount"], rec.get("date"), dict(rec) -- so code
+    written for dictionary records keeps working. to_dict() gives a
+    plain dictionary when one is needed.
+
+    A store keeps its transactions read-only (see freeze): they are
+    indexed and totalled by their fields, so a stored record is changed
+    through the store (update_income, tag_expense, ...), which builds a
+    new object. Like plain objects, transactions compare and hash by
+    identity, not like dictionaries.
 
     Attributes
     ----------
@@ -12,6 +27,11 @@ class BaseTransaction:
     description : str
     """
 
+    __slots__ = ("amount", "date", "description")
+
+    # keys of the dictionary form, in order; subclasses extend it
+    _fields = ("amount", "date", "description")
+
     def __init__(self, amount, date, description=""):
         if amount < 0:
             raise ValueError("Amount must be non-negative.")
@@ -19,9 +39,25 @@ class BaseTransaction:
         self.date = date
         self.description = description
 
+    @classmethod
+    def from_record(cls, record):
+        """
+        Build a transaction from a dictionary record (or any mapping).
+        """
+        return cls(record["amount"], record["date"], record.get("description", ""))
+
+    # Mapping would compare by value and make the objects unhashable
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
     def update(self, new_amount=None, new_date=None, new_description=None):
         """
         Update the transaction fields in-place.
+
+        Raises
+        ------
+        AttributeError
+            If the transaction is kept by a store (see freeze).
         """
         if new_amount is not None:
             if new_amount < 0:
@@ -32,12 +68,69 @@ class BaseTransaction:
         if new_description is not None:
             self.description = new_description
 
+    def freeze(self):
+        """
+        Make this transaction read-only and return it. Setting any field
+        afterwards raises AttributeError; copy.copy() gives a writable copy.
+
+        The stores call this on the objects they keep.
+        """
+        self.__class__ = _read_only_class(type(self))
+        return self
+
     def to_dict(self):
         """
         Convert this transaction to a dictionary.
         """
-        return {
-            "amount": self.amount,
-            "date": self.date,
-            "description": self.description,
-        }
+        return {field: self[field] for field in self._fields}
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        # same as Mapping.get, written out because it is on the hot path
+        # of the stores' indexing
+        if key in self._fields:
+            return getattr(self, key)
+        return default
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __repr__(self):
+        values = ", ".join("{}={!r}".format(field, self[field]) for field in self._fields)
+        return "{}({})".format(type(self).__name__, values)
+
+
+# class -> read-only subclass of it, built on first use by freeze()
+_READ_ONLY = {}
+
+
+def _read_only_class(cls):
+    frozen = _READ_ONLY.get(cls)
+    if frozen is None:
+        def refuse(self, *args):
+            raise AttributeError(
+                "Stored {} records are read-only; change them through "
+                "their store.".format(cls.__name__)
+            )
+
+        def reduce(self):
+            # copies and pickles are writable objects of the original class
+            return cls.from_record, (self.to_dict(),)
+
+        # no new slots, so an object can switch to it in place
+        frozen = type(cls.__name__, (cls,), {
+            "__slots__": (),
+            "__module__": cls.__module__,
+            "__setattr__": refuse,
+            "__delattr__": refuse,
+            "__reduce__": reduce,
+        })
+        _READ_ONLY[cls] = _READ_ONLY[frozen] = frozen
+    return frozen
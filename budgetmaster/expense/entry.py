@@ -1,24 +1,84 @@
 # budgetmaster/expense/entry.py
 
+import sys
+import threading
+
 from .base_transaction import BaseTransaction
-from budgetmaster.analysis.utils import validate_amount
+from .store import ExpenseStore, ColumnarExpenseStore, SQLiteExpenseStore, MappedExpenseStore
+from budgetmaster.analysis.utils import validate_amount, validate_amounts
+from budgetmaster.storage.base_store import to_columns
+from budgetmaster.storage.journal import JournaledStore
+from budgetmaster.storage.locking import locked
 
-# in-memory storage
-_expenses = []
-_next_expense_id = 1
+# storage backends that can be chosen with set_storage_backend
+_BACKENDS = {
+    "dict": ExpenseStore,
+    "columnar": ColumnarExpenseStore,
+    "sqlite": SQLiteExpenseStore,
+}
 
 
 class Expense(BaseTransaction):
     """
     Expense class that inherits from BaseTransaction and adds a category
     and simple tag support. And, it represents a single expense item.
+
+    Expense objects are what the default store keeps, one per record
+    (read-only once stored, see BaseTransaction.freeze).
+    Tags are kept as a small tuple of interned strings, in the order they
+    were added, so every expense with a tag shares one string object and
+    an expense without tags costs no more than the empty tuple. to_dict()
+    gives them as a list like the dict records.
     """
 
-    def __init__(self, category, amount, date, description=""):
+    __slots__ = ("category", "_tags", "expense_id")
+
+    _fields = ("amount", "date", "description", "category", "tags", "expense_id")
+
+    def __init__(self, category, amount, date, description="", expense_id=None):
         # call the parent __init__
         BaseTransaction.__init__(self, amount, date, description)
         self.category = category
-        self.tags = []
+        self._tags = ()
+        self.expense_id = expense_id
+
+    @classmethod
+    def from_record(cls, record):
+        """
+        Build an Expense from a dictionary record (or any mapping).
+        """
+        expense = cls(
+            record.get("category", "uncategorized"),
+            record["amount"],
+            record["date"],
+            record.get("description", ""),
+            record.get("expense_id"),
+        )
+        tags = record.get("tags")
+        if tags:
+            expense.tags = tags
+        return expense
+
+    @property
+    def tags(self):
+        """
+        Tags of this expense, as a tuple of strings.
+        """
+        return self._tags
+
+    @tags.setter
+    def tags(self, tags):
+        # in the order given, without repeats; interned strings are shared
+        # by every expense and freed once no expense uses them
+        self._tags = tuple(map(sys.intern, dict.fromkeys(tags)))
+
+    def to_dict(self):
+        """
+        Convert this expense to a dictionary (tags as a new list).
+        """
+        record = BaseTransaction.to_dict(self)
+        record["tags"] = list(self.tags)
+        return record
 
     def is_over_budget(self, category_limit):
         """
@@ -29,66 +89,402 @@ class Expense(BaseTransaction):
     def add_tag(self, tag):
         """
         Add a tag string to this expense (if not already present).
+
+        A stored expense is read-only; use tag_expense, so the store's
+        tag index sees the change.
+        """
+        if tag not in self._tags:
+            self._tags += (sys.intern(tag),)
+
+    def has_tags(self, *tags):
+        """
+        Check if this expense has every one of the given tags.
         """
-        if tag not in self.tags:
-            self.tags.append(tag)
+        own = self._tags
+        return all(tag in own for tag in tags)
 
 
-def add_expense(category, amount, date, description=""):
+class ExpenseBook:
     """
-    Create an expense object, store it in the in-memory list, and return
-    the stored dictionary record.
+    The expense side of a ledger: one expense store, which also hands
+    out the expense ids, and the operations on it. The module functions
+    below (add_expense, total_by_category, ...) are the methods of the
+    default book; budgetmaster.ledger.Ledger puts a book next to an
+    IncomeBook for every household.
+
+    Parameters
+    ----------
+    backend : str
+        Storage backend, see set_storage_backend ('dict' by default).
+    **options
+        Passed to the store, for example path='ledger.db' for 'sqlite'.
+
+    Attributes
+    ----------
+    expenses : ExpenseStore
+        The store, replaced by set_storage_backend, open_journal and
+        load_ledger.
+    lock : threading.RLock
+        Held by every method, so the book can be shared by threads.
     """
-    global _next_expense_id
-    
-    # make sure the amountes are  non-negative 
-    validate_amount(amount)
 
-    expense = Expense(category, amount, date, description)
-    record = expense.to_dict()
-    record["category"] = expense.category
-    record["tags"] = list(expense.tags)
-    record["expense_id"] = _next_expense_id
+    def __init__(self, backend="dict", **options):
+        # held by every method below (see storage.locking)
+        self.lock = threading.RLock()
+        if backend not in _BACKENDS:
+            raise ValueError("Unknown storage backend: {}".format(backend))
+        # Expense objects indexed by expense id, category, month and tag
+        self.expenses = _BACKENDS[backend](Expense, **options)
 
-    _expenses.append(record)
-    _next_expense_id += 1
-    return record
+    @locked
+    def add_expense(self, category, amount, date, description=""):
+        """
+        Create an expense record, store it, and return it as a new dictionary.
 
+        The dictionary is a copy: changing it does not change the store
+        (use tag_expense or delete_expense for that).
 
-def get_all_expenses():
-    """
-    Return a list of all stored expense records.
-    """
-    return list(_expenses)
+        Raises
+        ------
+        ValueError
+            If the amount is negative or the date is not a valid
+            'YYYY-MM-DD' date.
+        """
+        # make sure the amountes are  non-negative 
+        validate_amount(amount)
 
+        expense_id = self.expenses.allocate_ids(1)[0]
+        return _as_dict(self.expenses.add({
+            "amount": float(amount),
+            "date": date,
+            "description": description,
+            "category": category,
+            "tags": [],
+            "expense_id": expense_id,
+        }))
 
-def delete_expense(expense_id):
-    """
-    Delete an expense by its id. If the id does not exist, then do nothing.
-    """
-    global _expenses
-    new_list = []
-    for rec in _expenses:
-        if rec.get("expense_id") != expense_id:
-            new_list.append(rec)
-    _expenses = new_list
+    @locked
+    def add_expenses_bulk(self, records):
+        """
+        Add many expenses at once, for example the rows of a bank export.
 
+        All amounts are validated in one pass, one block of ids is handed
+        out, and the store indexes and totals are updated once per batch.
+        If any amount is negative or any date is not a valid 'YYYY-MM-DD'
+        date, nothing is added.
 
-def total_by_category():
-    """
-    Compute total expense amount for each category.
+        Parameters
+        ----------
+        records : iterable or dict
+            Either rows -- dicts with 'category', 'amount', 'date' and
+            (optional) 'description' and 'tags' keys, or tuples in that
+            order -- or a dict of columns like {'category': [...], ...}.
 
-    Returns
-    -------
-    dict
-        Keys are categories, values are total expense amounts.
-    """
-    totals = {}
-    for rec in _expenses:
-        category = rec.get("category", "uncategorized")
-        amount = rec.get("amount", 0.0)
-        if category not in totals:
-            totals[category] = 0.0
-        totals[category] += amount
-    return totals
+        Returns
+        -------
+        range
+            The expense ids given to the new records, in order.
+        """
+        columns = to_columns(
+            records,
+            ("category", "amount", "date", "description", "tags"),
+            {"description": "", "tags": ()},
+        )
+        amounts = validate_amounts(columns["amount"])
+
+        ids = self.expenses.allocate_ids(len(amounts))
+        batch = {
+            "amount": amounts,
+            "date": columns["date"],
+            "description": columns["description"],
+            "category": columns["category"],
+            "expense_id": ids,
+        }
+        # tags are a sparse field, so the column is only passed when needed
+        if any(tags is not None and len(tags) for tags in columns["tags"]):
+            batch["tags"] = columns["tags"]
+        self.expenses.add_columns(batch)
+        return ids
+
+    @locked
+    def get_all_expenses(self):
+        """
+        Return a list of all stored expense records as new dictionaries.
+        """
+        return [_as_dict(rec) for rec in self.expenses]
+
+    @locked
+    def view_expenses(self):
+        """
+        Return a read-only view of all expense records without copying them.
+
+        The view can be passed to the report functions and iterated many
+        times. Iterating it raises RuntimeError if expenses are changed
+        meanwhile. Use get_all_expenses() when a mutable list is needed.
+        """
+        return self.expenses.view()
+
+    @locked
+    def get_expense(self, expense_id):
+        """
+        Return the expense record with the given id as a new dictionary,
+        or None if it does not exist.
+        """
+        record = self.expenses.get(expense_id)
+        return None if record is None else _as_dict(record)
+
+    @locked
+    def delete_expense(self, expense_id):
+        """
+        Delete an expense by its id. If the id does not exist, then do nothing.
+        """
+        self.expenses.delete(expense_id)
+
+    @locked
+    def delete_expenses(self, ids=None, where=None, date_range=None):
+        """
+        Delete many expense records in one pass and return how many were removed.
+
+        Records must match every condition that is given.
+
+        Parameters
+        ----------
+        ids : iterable, optional
+            Expense ids to delete (found through the id index, no scan).
+        where : callable, optional
+            Predicate that gets each record, for example
+            lambda rec: rec["amount"] == 0.
+        date_range : tuple, optional
+            (start, end), both inclusive, as dates ('2025-01-31') or whole
+            months ('2025-01'). Only the months in the range are read.
+
+        Raises
+        ------
+        ValueError
+            If no condition is given (to avoid deleting everything by accident).
+        """
+        records = self.expenses.select(ids=ids, where=where, date_range=date_range)
+        return self.expenses.delete_many([rec["expense_id"] for rec in records])
+
+    @locked
+    def tag_expense(self, expense_id, *tags):
+        """
+        Add tags to a stored expense and update the store's tag index.
+        Tags the expense already has are ignored. Returns the updated
+        record as a new dictionary.
+
+        Raises
+        ------
+        ValueError
+            If the given expense_id is not found.
+        """
+        record = self.expenses.get(expense_id)
+        if record is None:
+            raise ValueError("No expense found with id = {}".format(expense_id))
+        current = tuple(record["tags"])
+        new_tags = [tag for tag in dict.fromkeys(tags) if tag not in current]
+        if new_tags:
+            record = self.expenses.update(expense_id, tags=current + tuple(new_tags))
+        return _as_dict(record)
+
+    @locked
+    def expenses_tagged(self, *tags, month=None):
+        """
+        Return the expense records that have every one of the given tags,
+        as new dictionaries, for example
+        expenses_tagged("work", "travel", month="2025-03").
+
+        Only the ids under the rarest tag (or the month) are checked, through
+        the store's tag index, instead of scanning every expense.
+        """
+        return [_as_dict(rec) for rec in self.expenses.by_tags(tags, month=month)]
+
+    @locked
+    def total_by_category(self):
+        """
+        Compute total expense amount for each category.
+
+        Returns
+        -------
+        dict
+            Keys are categories, values are total expense amounts.
+        """
+        # the store keeps running totals per category, so this does not
+        # need to look at every record
+        return self.expenses.totals_for("category")
+
+    @locked
+    def total_by_tag(self):
+        """
+        Compute total expense amount for each tag. An expense with several
+        tags counts toward each of them.
+
+        Returns
+        -------
+        dict
+            Keys are tags, values are total expense amounts.
+        """
+        return self.expenses.totals_for("tags")
+
+    @locked
+    def set_storage_backend(self, name, **options):
+        """
+        Choose how expense records are stored. Existing records are copied
+        into the new store.
+
+        Parameters
+        ----------
+        name : str
+            'dict' (default, one Expense object per record) or 'columnar'
+            (array-backed, much smaller per record; returned dictionaries
+            are copies of the stored data),
+            or 'sqlite' (a SQLite database; the totals are computed by SQL).
+        **options
+            Passed to the store, for example path='ledger.db' for 'sqlite'
+            (default ':memory:'). Ids continue after the largest id already
+            in the new store.
+
+        Raises
+        ------
+        ValueError
+            If the backend name is unknown.
+        """
+        if name not in _BACKENDS:
+            raise ValueError("Unknown storage backend: {}".format(name))
+        new_store = _BACKENDS[name](Expense, **options)
+        for rec in self.expenses:
+            new_store.add(rec)
+        # a database file may already hold records with higher ids
+        new_store.reserve_ids(self.expenses.next_id())
+        old_store = self.expenses
+        if isinstance(self.expenses, JournaledStore):
+            # same records, so the files on disk stay valid
+            old_store = self.expenses.inner
+            self.expenses.inner = new_store
+        else:
+            self.expenses = new_store
+        if isinstance(old_store, (SQLiteExpenseStore, MappedExpenseStore)):
+            old_store.close()
+
+    @locked
+    def open_journal(self, directory, fsync="always", fsync_every=100, snapshot_every=10000):
+        """
+        Keep expense records on disk, so they survive a restart.
+
+        Every change is appended to a log in `directory` and a compacted
+        snapshot is written every `snapshot_every` changes (see
+        storage.journal). The journal wraps the current store, so its
+        backend and options are kept. A new journal starts with the
+        expenses already in memory; an existing one is loaded -- the latest
+        snapshot plus the log written after it -- into the store, which
+        must then be empty. New ids continue after the largest stored one.
+
+        Parameters
+        ----------
+        directory : str
+            Folder for the expense snapshot and log (created if needed).
+        fsync : str
+            'always' (every change is on disk when the call returns),
+            'batch' (fsync every `fsync_every` changes) or 'never' (left
+            to the operating system).
+
+        Raises
+        ------
+        ValueError
+            If the fsync policy is unknown, the log is damaged, or the
+            directory holds a journal while expenses are in memory.
+        """
+        self.close_journal()
+        self.expenses = JournaledStore(
+            self.expenses, directory,
+            fsync=fsync, fsync_every=fsync_every, snapshot_every=snapshot_every,
+        )
+        return self.expenses
+
+    @locked
+    def close_journal(self):
+        """
+        Sync and close the expense journal opened with open_journal. The
+        records stay in memory; later changes are no longer written to disk.
+        Does nothing if no journal is open.
+        """
+        if isinstance(self.expenses, JournaledStore):
+            self.expenses.close()
+            self.expenses = self.expenses.inner
+
+    @locked
+    def save_ledger(self, path):
+        """
+        Write every expense record to a binary ledger file (see
+        storage.mapped) that load_ledger can map back without parsing.
+
+        Returns
+        -------
+        int
+            Number of records written.
+        """
+        store = self.expenses.inner if isinstance(self.expenses, JournaledStore) else self.expenses
+        return MappedExpenseStore.write(store, path)
+
+    @locked
+    def load_ledger(self, path):
+        """
+        Replace the expense records with the ones in a ledger file written
+        by save_ledger.
+
+        The file is memory-mapped rather than read, so this takes about the
+        same time for any ledger size, and the summary functions
+        (total_by_category, total_by_tag, ...) and monthly_balance work on
+        the mapped columns directly. The first change copies the columns into
+        memory (see storage.mapped). A journal opened with open_journal is
+        closed first, and new ids continue after the largest stored one.
+
+        Raises
+        ------
+        ValueError
+            If the file is not a ledger file of expense records.
+        """
+        self.close_journal()
+        new_store = MappedExpenseStore(Expense, path)
+        old_store, self.expenses = self.expenses, new_store
+        if isinstance(old_store, (SQLiteExpenseStore, MappedExpenseStore)):
+            old_store.close()
+        return new_store
+
+
+# the book of the default ledger; the module functions work on it
+_book = ExpenseBook()
+# hold it to read the default expenses consistently across several calls
+lock = _book.lock
+
+add_expense = _book.add_expense
+add_expenses_bulk = _book.add_expenses_bulk
+get_all_expenses = _book.get_all_expenses
+view_expenses = _book.view_expenses
+get_expense = _book.get_expense
+delete_expense = _book.delete_expense
+delete_expenses = _book.delete_expenses
+tag_expense = _book.tag_expense
+expenses_tagged = _book.expenses_tagged
+total_by_category = _book.total_by_category
+total_by_tag = _book.total_by_tag
+set_storage_backend = _book.set_storage_backend
+open_journal = _book.open_journal
+close_journal = _book.close_journal
+save_ledger = _book.save_ledger
+load_ledger = _book.load_ledger
+
+
+def __getattr__(name):
+    # module-level __getattr__ (PEP 562): `_expenses` is the store of the
+    # default book, looked up on every access because set_storage_backend,
+    # open_journal and load_ledger replace it
+    if name == "_expenses":
+        return _book.expenses
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def _as_dict(rec):
+    # stored Expense objects are converted; columnar rows are new dicts already
+    return rec if isinstance(rec, dict) else rec.to_dict()
 
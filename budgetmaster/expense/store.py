@@ -0,0 +1,98 @@
+# budgetmaster/expense/store.py
+
+"""
+Indexed in-memory storage for expense records.
+
+Records are kept in a dictionary keyed by ``expense_id`` so looking up or
+deleting one expense does not need to scan the whole list. Secondary
+indexes (category, month and tag) map a key to the ids stored under it;
+the tag index is inverted, an expense is listed under each of its tags.
+"""
+
+from budgetmaster.storage.base_store import IndexedStore
+from budgetmaster.storage.columnar import ColumnarStore
+from budgetmaster.storage.mapped import MappedStore
+from budgetmaster.storage.sqlite_store import SQLiteStore
+
+
+class ExpenseStore(IndexedStore):
+    """
+    Hash-indexed container for expense records. It inherits from
+    IndexedStore and indexes the 'category' field, the month and every
+    tag.
+    """
+
+    id_key = "expense_id"
+    group_fields = {"category": "uncategorized"}
+    sparse_fields = {"tags": list}
+    multi_fields = ("tags",)
+    fields = ("amount", "date", "description", "category", "tags", "expense_id")
+
+    def by_category(self, category):
+        """
+        Return the records of one category, in insertion order.
+        """
+        return self.records_for("category", category)
+
+    def by_month(self, month):
+        """
+        Return the records of one month ('YYYY-MM'), in insertion order.
+        """
+        return self.records_for("month", month)
+
+    def categories(self):
+        """
+        Return the list of categories that currently have records.
+        """
+        return self.keys_for("category")
+
+    def months(self):
+        """
+        Return the sorted list of months that currently have records.
+        """
+        return sorted(self.keys_for("month"))
+
+    def by_tags(self, tags, month=None):
+        """
+        Return the records that have every tag in `tags`, optionally
+        only those of one month ('YYYY-MM').
+        """
+        keys = [("tags", tag) for tag in tags]
+        if month is not None:
+            keys.append(("month", month))
+        return self.records_for_all(keys)
+
+    def tag_names(self):
+        """
+        Return the list of tags that currently have records.
+        """
+        return self.keys_for("tags")
+
+
+class ColumnarExpenseStore(ColumnarStore, ExpenseStore):
+    """
+    Array-backed version of ExpenseStore for very large ledgers.
+    Categories and descriptions are dictionary-encoded, tags are only
+    stored (and indexed by row) for expenses that have some, and record
+    dictionaries are built on demand.
+    """
+
+    encoded_fields = {"description": ""}
+
+
+class SQLiteExpenseStore(SQLiteStore, ExpenseStore):
+    """
+    SQLite version of ExpenseStore (table 'expenses', tags in the side
+    table 'expenses_tags'). Category, month and tag totals are computed
+    by SQL aggregates.
+    """
+
+    table = "expenses"
+
+
+class MappedExpenseStore(MappedStore, ColumnarExpenseStore):
+    """
+    ColumnarExpenseStore read from a memory-mapped ledger file (see
+    storage.mapped). Category, month and tag totals are read from the
+    file without decoding any row.
+    """
@@ -0,0 +1,11 @@
+# budgetmaster/importer/__init__.py
+"""
+Importer sub-package.
+
+This part of the package reads bank statement files and adds their
+transactions to the income and expense stores.
+
+Modules:
+- statements : streaming CSV/OFX reader. Files are parsed in chunks of a fixed number of rows, expenses are categorized per chunk and every chunk is added with the bulk add functions, so memory use does not grow with the file size.
+- parallel   : import_statements. Parses many files in a process pool, sends compact columnar batches back and adds them in file order, so ids are deterministic.
+"""
@@ -0,0 +1,341 @@
+# budgetmaster/importer/statements.py
+
+"""
+Streaming import of bank statement files (CSV and OFX).
+
+A statement is read in chunks of `chunk_size` transactions. Each chunk
+is parsed into columns (date, amount, description, category), split
+into incomes and expenses by the sign of the amount, the expenses are
+categorized with analysis.utils.categorize_expense (once per distinct
+description in the chunk), and both parts are added with
+add_incomes_bulk / add_expenses_bulk. Only one chunk is in memory at a
+time, so a multi-GB file is imported with the same memory as a small
+one (plus whatever the stores keep).
+
+CSV files need a header row. The columns are found by name (date,
+amount, description and category, in any letter case) or given with
+`columns`. OFX (and QFX) files are read as a stream of <STMTTRN>
+blocks; DTPOSTED, TRNAMT and NAME (or MEMO) are used.
+"""
+
+import csv
+import html
+import os
+import re
+from datetime import datetime
+from itertools import compress, islice
+from operator import not_
+
+from budgetmaster.analysis.utils import categorize_expense
+from budgetmaster.ledger import get_default_ledger
+from budgetmaster.storage.dates import parse_date
+
+# columns of a parsed chunk
+FIELDS = ("date", "amount", "description", "category")
+
+DEFAULT_CHUNK_SIZE = 10000
+
+# characters that banks put into amounts ('$1,234.50')
+_AMOUNT_JUNK = str.maketrans("", "", "$, ")
+
+# one OFX tag with the text after it: ('/' or '', name, value)
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+# characters read from an OFX file at a time
+_OFX_BLOCK = 1 << 16
+
+
+def read_statement(path, chunk_size=DEFAULT_CHUNK_SIZE, format=None, columns=None,
+                   date_format=None, encoding="utf-8-sig"):
+    """
+    Read a bank statement file in chunks.
+
+    Parameters
+    ----------
+    path : str
+        CSV or OFX/QFX file.
+    chunk_size : int
+        Number of transactions per chunk.
+    format : str, optional
+        'csv' or 'ofx'. By default it is guessed from the file extension
+        (.ofx and .qfx are OFX, everything else CSV).
+    columns : dict, optional
+        CSV only: field -> header name, for example
+        {'date': 'Posting Date', 'description': 'Payee'}. Fields that are
+        not given are looked up by their own name.
+    date_format : str, optional
+        CSV only: strptime format of the dates, for example '%m/%d/%Y'.
+        Dates are converted to 'YYYY-MM-DD'. By default they are kept
+        as written and must already be 'YYYY-MM-DD' dates.
+    encoding : str
+        Text encoding of the file (the default also skips a UTF-8 BOM).
+
+    Yields
+    ------
+    dict
+        Columns of one chunk: 'date', 'amount' (signed floats,
+        negative for money going out), 'description' and 'category'
+        ('' where the file has none).
+
+    Raises
+    ------
+    ValueError
+        If the format is unknown, a required CSV column is missing or
+        an amount or date cannot be parsed. The message names the row
+        and the file; a chunk is only yielded once every row of it has
+        been checked, so nothing of a bad chunk reaches the stores.
+    """
+    if format is None:
+        format = _guess_format(path)
+    if format == "csv":
+        chunks = _csv_chunks(path, chunk_size, columns, encoding)
+    elif format == "ofx":
+        chunks = _ofx_chunks(path, chunk_size, encoding)
+    else:
+        raise ValueError("Unknown statement format: {}".format(format))
+
+    first_row = 1
+    for chunk in chunks:
+        chunk["amount"] = _parse_amounts(chunk["amount"], first_row, path)
+        if date_format is not None and format == "csv":
+            chunk["date"] = _parse_dates(chunk["date"], date_format, first_row, path)
+        else:
+            _check_dates(chunk["date"], first_row, path)
+        first_row += len(chunk["amount"])
+        yield chunk
+
+
+def split_chunk(chunk, kind=None):
+    """
+    Turn one chunk from read_statement into income and expense columns.
+
+    Parameters
+    ----------
+    chunk : dict
+        Columns as yielded by read_statement.
+    kind : str, optional
+        None (default) to split by sign: negative amounts are expenses,
+        the others incomes. 'expense' or 'income' to treat every row as
+        that kind (for files that list only one kind with positive
+        amounts). Amounts are stored as absolute values.
+
+    Returns
+    -------
+    tuple
+        (incomes, expenses): column dicts for add_incomes_bulk
+        (source, amount, date) and add_expenses_bulk (category, amount,
+        date, description). Expenses without a category get one from
+        categorize_expense; incomes use the description as source.
+    """
+    amounts = chunk["amount"]
+    if kind is None:
+        # row masks, so every column is split with compress() in C
+        is_expense = [amount < 0 for amount in amounts]
+        is_income = list(map(not_, is_expense))
+    elif kind in ("expense", "income"):
+        is_expense = [kind == "expense"] * len(amounts)
+        is_income = list(map(not_, is_expense))
+    else:
+        raise ValueError("Unknown kind: {}".format(kind))
+
+    def split(values, mask):
+        return list(compress(values, mask))
+
+    incomes = {
+        "source": [description or category or "unknown" for description, category in zip(
+            split(chunk["description"], is_income), split(chunk["category"], is_income))],
+        "amount": list(map(abs, compress(amounts, is_income))),
+        "date": split(chunk["date"], is_income),
+    }
+
+    descriptions = split(chunk["description"], is_expense)
+    given = split(chunk["category"], is_expense)
+    # bank descriptions repeat a lot, so each distinct one is only
+    # categorized once per chunk
+    guessed = {
+        description: categorize_expense({"description": description})
+        for description in dict.fromkeys(compress(descriptions, map(not_, given)))
+    }
+    expenses = {
+        "category": [category or guessed[description]
+                     for description, category in zip(descriptions, given)],
+        "amount": list(map(abs, compress(amounts, is_expense))),
+        "date": split(chunk["date"], is_expense),
+        "description": descriptions,
+    }
+    return incomes, expenses
+
+
+def import_statement(path, chunk_size=DEFAULT_CHUNK_SIZE, format=None, columns=None,
+                     date_format=None, kind=None, encoding="utf-8-sig", ledger=None):
+    """
+    Import a bank statement file into the income and expense stores of
+    a ledger.
+
+    The file is streamed with read_statement, every chunk is split and
+    categorized with split_chunk, and the two parts are added with
+    add_incomes_bulk and add_expenses_bulk. Each chunk is added as a
+    whole; if a later chunk fails to parse, the chunks before it stay
+    imported.
+
+    Parameters
+    ----------
+    path, chunk_size, format, columns, date_format, encoding
+        See read_statement.
+    kind : str, optional
+        See split_chunk.
+    ledger : Ledger, optional
+        Ledger to import into (see budgetmaster.ledger); by default the
+        default ledger, the one of the entry module functions.
+
+    Returns
+    -------
+    dict
+        {'incomes': number added, 'expenses': number added}
+    """
+    if ledger is None:
+        ledger = get_default_ledger()
+    counts = {"incomes": 0, "expenses": 0}
+    for chunk in read_statement(path, chunk_size, format, columns, date_format, encoding):
+        incomes, expenses = split_chunk(chunk, kind)
+        if incomes["amount"]:
+            counts["incomes"] += len(ledger.add_incomes_bulk(incomes))
+        if expenses["amount"]:
+            counts["expenses"] += len(ledger.add_expenses_bulk(expenses))
+    return counts
+
+
+def _guess_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    return "ofx" if extension in (".ofx", ".qfx") else "csv"
+
+
+def _csv_chunks(path, chunk_size, columns, encoding):
+    columns = columns or {}
+    with open(path, newline="", encoding=encoding) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        names = [name.strip().lower() for name in header]
+        positions = {}
+        for field in FIELDS:
+            name = columns.get(field, field).strip().lower()
+            if name in names:
+                positions[field] = names.index(name)
+            elif field in ("date", "amount") or field in columns:
+                raise ValueError("Missing column '{}' in {}".format(columns.get(field, field), path))
+            else:
+                positions[field] = None
+
+        while True:
+            # blank lines come out of csv.reader as empty lists; they are
+            # dropped and the chunk is topped up
+            rows = [row for row in islice(reader, chunk_size) if row]
+            while len(rows) < chunk_size:
+                more = list(islice(reader, chunk_size - len(rows)))
+                if not more:
+                    break
+                rows.extend(row for row in more if row)
+            if not rows:
+                return
+            chunk = {}
+            try:
+                for field, position in positions.items():
+                    if position is None:
+                        chunk[field] = [""] * len(rows)
+                    else:
+                        chunk[field] = [row[position] for row in rows]
+            except IndexError:
+                raise ValueError("Row with too few values near line {} of {}".format(reader.line_num, path))
+            yield chunk
+
+
+def _ofx_chunks(path, chunk_size, encoding):
+    transactions = _ofx_transactions(path, encoding)
+    while True:
+        rows = list(islice(transactions, chunk_size))
+        if not rows:
+            return
+        yield dict(zip(FIELDS, map(list, zip(*rows))))
+
+
+def _ofx_transactions(path, encoding):
+    # OFX 1.x (SGML, element tags are not closed) and OFX 2.x (XML) are
+    # both a sequence of <TAG>value pieces, so the file is read in blocks
+    # and cut before the last '<' of each block; the rest is carried over
+    # to the next block.
+    with open(path, encoding=encoding, errors="replace") as f:
+        pending = ""
+        record = None
+        while True:
+            block = f.read(_OFX_BLOCK)
+            text = pending + block
+            if block:
+                cut = text.rfind("<")
+                if cut < 0:
+                    # header lines before the first tag
+                    pending = ""
+                    continue
+                text, pending = text[:cut], text[cut:]
+            for closing, tag, value in _OFX_TAG.findall(text):
+                tag = tag.upper()
+                if tag == "STMTTRN":
+                    if record is not None:
+                        yield _ofx_row(record)
+                    record = None if closing else {}
+                elif record is not None and not closing:
+                    value = value.strip()
+                    record[tag] = html.unescape(value) if "&" in value else value
+            if not block:
+                if record is not None:
+                    yield _ofx_row(record)
+                return
+
+
+def _ofx_row(record):
+    # (date, amount, description, category) of one <STMTTRN> block
+    posted = record.get("DTPOSTED", "")
+    if len(posted) >= 8 and posted[:8].isdigit():
+        posted = "{}-{}-{}".format(posted[:4], posted[4:6], posted[6:8])
+    description = record.get("NAME") or record.get("MEMO", "")
+    return posted, record.get("TRNAMT", ""), description, ""
+
+
+def _parse_amounts(values, first_row, path):
+    # float() of the whole column in one map(); a failure is looked up
+    # afterwards to give a useful message
+    try:
+        return list(map(float, values))
+    except ValueError:
+        pass
+    amounts = []
+    for row, value in enumerate(values):
+        try:
+            amounts.append(float(value.translate(_AMOUNT_JUNK)))
+        except ValueError:
+            raise ValueError("Bad amount {!r} in row {} of {}".format(value, first_row + row, path))
+    return amounts
+
+
+def _parse_dates(values, date_format, first_row, path):
+    # each distinct date string is parsed once
+    parsed = {}
+    for row, value in enumerate(values):
+        if value not in parsed:
+            try:
+                parsed[value] = datetime.strptime(value.strip(), date_format).date().isoformat()
+            except ValueError:
+                raise ValueError("Bad date {!r} in row {} of {}".format(value, first_row + row, path))
+    return list(map(parsed.__getitem__, values))
+
+
+def _check_dates(values, first_row, path):
+    # dates kept as written must be what the stores accept; parse_date
+    # caches the strings it has seen, so repeated dates are cheap
+    for row, value in enumerate(values):
+        try:
+            parse_date(value)
+        except ValueError:
+            raise ValueError("Bad date {!r} in row {} of {}, expected 'YYYY-MM-DD' "
+                             "(see date_format)".format(value, first_row + row, path))
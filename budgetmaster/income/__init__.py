@@ -3,7 +3,8 @@
 Income sub-package.
 
 Modules:
-- entry   : basic operations for incomes, like  add income, update income, delete income, and list all income records
+- entry   : basic operations for incomes, like  add income, update income, delete income, and list all income records. They are the methods of IncomeBook, one per ledger (see budgetmaster.ledger)
+- store   : IncomeStore class. It keeps income records indexed by id, source and month so updates and deletes do not walk the whole list.
 - summary : simple summary statistics for incomes such as: total income for a month, average monthly income and income grouped by source. This helps users understand how they earn money.
 """
 
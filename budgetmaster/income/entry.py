@@ -1,91 +1,394 @@
 # budgetmaster/income/entry.py
 
-from budgetmaster.analysis.utils import validate_amount
-# simple in-memory storage (list of dictionaries). 
-# since this project only needs lightweight examples.
+import threading
 
-incomes = []
-next_income_id = 1
+from budgetmaster.analysis.utils import validate_amount, validate_amounts
+from budgetmaster.storage.base_store import to_columns
+from budgetmaster.storage.journal import JournaledStore
+from budgetmaster.storage.locking import locked
+from budgetmaster.expense.base_transaction import BaseTransaction
+from .store import IncomeStore, ColumnarIncomeStore, SQLiteIncomeStore, MappedIncomeStore
 
+# storage backends that can be chosen with set_storage_backend
+_BACKENDS = {
+    "dict": IncomeStore,
+    "columnar": ColumnarIncomeStore,
+    "sqlite": SQLiteIncomeStore,
+}
 
 
-def add_income(source, amount, date):
+class Income(BaseTransaction):
     """
-    Add a new income record.
+    A single income record, the stored form of incomes in the default
+    store (read-only once stored, see BaseTransaction.freeze). It reads
+    like the income dictionaries (rec["source"], rec.get("amount")) and
+    to_dict() gives a plain dict copy.
+    """
+
+    __slots__ = ("source", "income_id")
+
+    _fields = ("income_id", "source", "amount", "date")
+
+    def __init__(self, source, amount, date, income_id=None):
+        BaseTransaction.__init__(self, amount, date)
+        self.source = source
+        self.income_id = income_id
+
+    @classmethod
+    def from_record(cls, record):
+        """
+        Build an Income from a dictionary record (or any mapping).
+        """
+        return cls(record.get("source", "unknown"), record["amount"],
+                   record["date"], record.get("income_id"))
+
+
+class IncomeBook:
+    """
+    The income side of a ledger: one income store, which also hands out
+    the income ids, and the operations on it. The module functions below
+    (add_income, get_all_incomes, ...) are the methods of the default
+    book; budgetmaster.ledger.Ledger puts a book next to an ExpenseBook
+    for every household.
 
     Parameters
     ----------
-    source : str
-        Where the income comes from. For example, come from salary, freelance, etc.
-    amount : float
-        Income amount (must be non-negative).
-    date : str
-        Date string, for example '2025-12-02'.
-
-    Returns
-    -------
-    dict
-        The created income record.
+    backend : str
+        Storage backend, see set_storage_backend ('dict' by default).
+    **options
+        Passed to the store, for example path='ledger.db' for 'sqlite'.
+
+    Attributes
+    ----------
+    incomes : IncomeStore
+        The store, replaced by set_storage_backend, open_journal and
+        load_ledger.
+    lock : threading.RLock
+        Held by every method, so the book can be shared by threads.
     """
-    global next_income_id
 
-    if amount < 0:
-        raise ValueError("Income amount must be non-negative.")
+    def __init__(self, backend="dict", **options):
+        # held by every method below (see storage.locking)
+        self.lock = threading.RLock()
+        if backend not in _BACKENDS:
+            raise ValueError("Unknown storage backend: {}".format(backend))
+        # Income objects indexed by income id, source and month
+        self.incomes = _BACKENDS[backend](Income, **options)
 
-    record = {
-        "income_id": next_income_id,
-        "source": source,
-        "amount": float(amount),
-        "date": date,
-    }
-    incomes.append(record)
-    next_income_id += 1
-    return record
+    @locked
+    def add_income(self, source, amount, date):
+        """
+        Add a new income record.
 
+        Parameters
+        ----------
+        source : str
+            Where the income comes from. For example, come from salary, freelance, etc.
+        amount : float
+            Income amount (must be non-negative).
+        date : str
+            Date string in 'YYYY-MM-DD' form, for example '2025-12-02'.
 
-def update_income(income_id, new_source=None, new_amount=None, new_date=None):
-    """
-    Update an existing income record. Returns the updated record.
+        Returns
+        -------
+        dict
+            A copy of the stored record; change the record with
+            update_income.
 
-    Raises
-    ------
-    ValueError
-        If the given income_id is not found.
-    """
-    for rec in incomes:
-        if rec["income_id"] == income_id:
-            if new_source is not None:
-                rec["source"] = new_source
-            if new_amount is not None:
-                # we want to make sure updated amounts are also valid
-                validate_amount(new_amount)
-                rec["amount"] = float(new_amount)
-            if new_date is not None:
-                rec["date"] = new_date
-            return rec
-
-    raise ValueError("No income found with id = {}".format(income_id))
-
-
-def delete_income(income_id):
-    """
-    Delete an income record by id. If the id does not exist, then nothing happens.
-    """
-    global incomes
-    new_list = []
-    for rec in incomes:
-        if rec["income_id"] != income_id:
-            new_list.append(rec)
-    incomes = new_list
+        Raises
+        ------
+        ValueError
+            If the amount is negative or the date is not a valid
+            'YYYY-MM-DD' date.
+        """
+        if amount < 0:
+            raise ValueError("Income amount must be non-negative.")
 
+        income_id = self.incomes.allocate_ids(1)[0]
+        return _as_dict(self.incomes.add({
+            "income_id": income_id,
+            "source": source,
+            "amount": float(amount),
+            "date": date,
+        }))
 
-def get_all_incomes():
-    """
-    Return a list of all current income records.
-    """
-    # return a shallow copy to avoid accidental external changes
-    return list(incomes)
+    @locked
+    def add_incomes_bulk(self, records):
+        """
+        Add many income records at once, for example the rows of a bank export.
+
+        All amounts are validated in one pass, one block of ids is handed
+        out, and the store indexes and totals are updated once per batch.
+        If any amount is negative or any date is not a valid 'YYYY-MM-DD'
+        date, nothing is added.
+
+        Parameters
+        ----------
+        records : iterable or dict
+            Either rows -- dicts with 'source', 'amount' and 'date' keys, or
+            (source, amount, date) tuples -- or a dict of columns like
+            {'source': [...], 'amount': [...], 'date': [...]}.
+
+        Returns
+        -------
+        range
+            The income ids given to the new records, in order.
+        """
+        columns = to_columns(records, ("source", "amount", "date"))
+        amounts = validate_amounts(columns["amount"])
+
+        ids = self.incomes.allocate_ids(len(amounts))
+        self.incomes.add_columns({
+            "income_id": ids,
+            "source": columns["source"],
+            "amount": amounts,
+            "date": columns["date"],
+        })
+        return ids
+
+    @locked
+    def update_income(self, income_id, new_source=None, new_amount=None, new_date=None):
+        """
+        Update an existing income record. Returns the updated record as
+        a new dictionary.
+
+        Raises
+        ------
+        ValueError
+            If the given income_id is not found or the new date is not a
+            valid 'YYYY-MM-DD' date.
+        """
+        if income_id not in self.incomes:
+            raise ValueError("No income found with id = {}".format(income_id))
+
+        changes = {}
+        if new_source is not None:
+            changes["source"] = new_source
+        if new_amount is not None:
+            # we want to make sure updated amounts are also valid
+            validate_amount(new_amount)
+            changes["amount"] = float(new_amount)
+        if new_date is not None:
+            changes["date"] = new_date
+        return _as_dict(self.incomes.update(income_id, **changes))
+
+    @locked
+    def delete_income(self, income_id):
+        """
+        Delete an income record by id. If the id does not exist, then nothing happens.
+        """
+        self.incomes.delete(income_id)
+
+    @locked
+    def delete_incomes(self, ids=None, where=None, date_range=None):
+        """
+        Delete many income records in one pass and return how many were removed.
+
+        Records must match every condition that is given.
+
+        Parameters
+        ----------
+        ids : iterable, optional
+            Income ids to delete (found through the id index, no scan).
+        where : callable, optional
+            Predicate that gets each record, for example
+            lambda rec: rec["amount"] == 0.
+        date_range : tuple, optional
+            (start, end), both inclusive, as dates ('2025-01-31') or whole
+            months ('2025-01'). Only the months in the range are read.
+
+        Raises
+        ------
+        ValueError
+            If no condition is given (to avoid deleting everything by accident).
+        """
+        records = self.incomes.select(ids=ids, where=where, date_range=date_range)
+        return self.incomes.delete_many([rec["income_id"] for rec in records])
+
+    @locked
+    def get_all_incomes(self):
+        """
+        Return a list of all current income records as new dictionaries.
+        """
+        # return copies to avoid accidental external changes
+        return [_as_dict(rec) for rec in self.incomes]
+
+    @locked
+    def view_incomes(self):
+        """
+        Return a read-only view of all income records without copying them.
+
+        The view can be passed to the report functions (for example
+        monthly_balance) and iterated many times. Iterating it raises
+        RuntimeError if incomes are added, updated or deleted meanwhile.
+        Use get_all_incomes() when a separate, mutable list is needed.
+        """
+        return self.incomes.view()
+
+    @locked
+    def get_income(self, income_id):
+        """
+        Return the income record with the given id as a new dictionary,
+        or None if it does not exist.
+        """
+        record = self.incomes.get(income_id)
+        return None if record is None else _as_dict(record)
+
+    @locked
+    def set_storage_backend(self, name, **options):
+        """
+        Choose how income records are stored. Existing records are copied
+        into the new store.
+
+        Parameters
+        ----------
+        name : str
+            'dict' (default, one Income object per record) or 'columnar'
+            (array-backed, much smaller per record; returned dictionaries
+            are copies, so change records with update_income),
+            or 'sqlite' (a SQLite database; the totals are computed by SQL).
+        **options
+            Passed to the store, for example path='ledger.db' for 'sqlite'
+            (default ':memory:'). Ids continue after the largest id already
+            in the new store.
+
+        Raises
+        ------
+        ValueError
+            If the backend name is unknown.
+        """
+        if name not in _BACKENDS:
+            raise ValueError("Unknown storage backend: {}".format(name))
+        new_store = _BACKENDS[name](Income, **options)
+        for rec in self.incomes:
+            new_store.add(rec)
+        # a database file may already hold records with higher ids
+        new_store.reserve_ids(self.incomes.next_id())
+        old_store = self.incomes
+        if isinstance(self.incomes, JournaledStore):
+            # same records, so the files on disk stay valid
+            old_store = self.incomes.inner
+            self.incomes.inner = new_store
+        else:
+            self.incomes = new_store
+        if isinstance(old_store, (SQLiteIncomeStore, MappedIncomeStore)):
+            old_store.close()
+
+    @locked
+    def open_journal(self, directory, fsync="always", fsync_every=100, snapshot_every=10000):
+        """
+        Keep income records on disk, so they survive a restart.
+
+        Every change is appended to a log in `directory` and a compacted
+        snapshot is written every `snapshot_every` changes (see
+        storage.journal). The journal wraps the current store, so its
+        backend and options are kept. A new journal starts with the
+        incomes already in memory; an existing one is loaded -- the latest
+        snapshot plus the log written after it -- into the store, which
+        must then be empty. New ids continue after the largest stored one.
+
+        Parameters
+        ----------
+        directory : str
+            Folder for the income snapshot and log (created if needed).
+        fsync : str
+            'always' (every change is on disk when the call returns),
+            'batch' (fsync every `fsync_every` changes) or 'never' (left
+            to the operating system).
+
+        Raises
+        ------
+        ValueError
+            If the fsync policy is unknown, the log is damaged, or the
+            directory holds a journal while incomes are in memory.
+        """
+        self.close_journal()
+        self.incomes = JournaledStore(
+            self.incomes, directory,
+            fsync=fsync, fsync_every=fsync_every, snapshot_every=snapshot_every,
+        )
+        return self.incomes
+
+    @locked
+    def close_journal(self):
+        """
+        Sync and close the income journal opened with open_journal. The
+        records stay in memory; later changes are no longer written to disk.
+        Does nothing if no journal is open.
+        """
+        if isinstance(self.incomes, JournaledStore):
+            self.incomes.close()
+            self.incomes = self.incomes.inner
+
+    @locked
+    def save_ledger(self, path):
+        """
+        Write every income record to a binary ledger file (see
+        storage.mapped) that load_ledger can map back without parsing.
+
+        Returns
+        -------
+        int
+            Number of records written.
+        """
+        store = self.incomes.inner if isinstance(self.incomes, JournaledStore) else self.incomes
+        return MappedIncomeStore.write(store, path)
+
+    @locked
+    def load_ledger(self, path):
+        """
+        Replace the income records with the ones in a ledger file written
+        by save_ledger.
+
+        The file is memory-mapped rather than read, so this takes about the
+        same time for any ledger size, and the summary functions
+        (total_monthly_income, income_by_source, ...) and monthly_balance work on
+        the mapped columns directly. The first change copies the columns into
+        memory (see storage.mapped). A journal opened with open_journal is
+        closed first, and new ids continue after the largest stored one.
+
+        Raises
+        ------
+        ValueError
+            If the file is not a ledger file of income records.
+        """
+        self.close_journal()
+        new_store = MappedIncomeStore(Income, path)
+        old_store, self.incomes = self.incomes, new_store
+        if isinstance(old_store, (SQLiteIncomeStore, MappedIncomeStore)):
+            old_store.close()
+        return new_store
+
+
+# the book of the default ledger; the module functions work on it
+_book = IncomeBook()
+# hold it to read the default incomes consistently across several calls
+lock = _book.lock
+
+add_income = _book.add_income
+add_incomes_bulk = _book.add_incomes_bulk
+update_income = _book.update_income
+delete_income = _book.delete_income
+delete_incomes = _book.delete_incomes
+get_all_incomes = _book.get_all_incomes
+view_incomes = _book.view_incomes
+get_income = _book.get_income
+set_storage_backend = _book.set_storage_backend
+open_journal = _book.open_journal
+close_journal = _book.close_journal
+save_ledger = _book.save_ledger
+load_ledger = _book.load_ledger
 
 
+def __getattr__(name):
+    # module-level __getattr__ (PEP 562): `incomes` is the store of the
+    # default book, looked up on every access because set_storage_backend,
+    # open_journal and load_ledger replace it
+    if name == "incomes":
+        return _book.incomes
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
 
 
+def _as_dict(rec):
+    # stored Income objects are converted; columnar rows are new dicts already
+    return rec if isinstance(rec, dict) else rec.to_dict()
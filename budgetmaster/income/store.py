@@ -0,0 +1,74 @@
+# budgetmaster/income/store.py
+
+"""
+Indexed in-memory storage for income records.
+
+Records are kept in a dictionary keyed by ``income_id`` so updating or
+deleting one income does not need to walk the whole list. Two secondary
+indexes (source and month) map a key to the ids stored under it.
+"""
+
+from budgetmaster.storage.base_store import IndexedStore
+from budgetmaster.storage.columnar import ColumnarStore
+from budgetmaster.storage.mapped import MappedStore
+from budgetmaster.storage.sqlite_store import SQLiteStore
+
+
+class IncomeStore(IndexedStore):
+    """
+    Hash-indexed container for income dictionaries. It inherits from
+    IndexedStore and indexes the 'source' field and the month.
+    """
+
+    id_key = "income_id"
+    group_fields = {"source": "unknown"}
+    fields = ("income_id", "source", "amount", "date")
+
+    def by_source(self, source):
+        """
+        Return the records of one source, in insertion order.
+        """
+        return self.records_for("source", source)
+
+    def by_month(self, month):
+        """
+        Return the records of one month ('YYYY-MM'), in insertion order.
+        """
+        return self.records_for("month", month)
+
+    def sources(self):
+        """
+        Return the list of sources that currently have records.
+        """
+        return self.keys_for("source")
+
+    def months(self):
+        """
+        Return the sorted list of months that currently have records.
+        """
+        return sorted(self.keys_for("month"))
+
+
+class ColumnarIncomeStore(ColumnarStore, IncomeStore):
+    """
+    Array-backed version of IncomeStore for very large ledgers. Sources
+    are dictionary-encoded and record dictionaries are built on demand,
+    so changing a returned dictionary does not change the store.
+    """
+
+
+class SQLiteIncomeStore(SQLiteStore, IncomeStore):
+    """
+    SQLite version of IncomeStore (table 'incomes'). Source and month
+    totals are computed by SQL aggregates.
+    """
+
+    table = "incomes"
+
+
+class MappedIncomeStore(MappedStore, ColumnarIncomeStore):
+    """
+    ColumnarIncomeStore read from a memory-mapped ledger file (see
+    storage.mapped). Source and month totals are read from the file
+    without decoding any row.
+    """
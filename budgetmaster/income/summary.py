@@ -1,24 +1,51 @@
 # budgetmaster/income/summary.py
 
-from budgetmaster.income.entry import get_all_incomes
+from contextlib import nullcontext
 
+from budgetmaster.income import entry as income_entry
 
-def filter_by_month(month):
+
+def filter_by_month(month, incomes=None):
     """
     Helper: pick incomes whose date starts with the given month.
 
     month format: 'YYYY-MM', for example '2025-11'
+
+    Incomes are bucketed by month in the store, so only the buckets that
+    can match are read. A shorter prefix (like '2025') or a single day
+    ('2025-11-03') also works.
+
+    Like every function here, it reads the incomes of the default ledger
+    unless an income store is given (see ledger.Ledger). The records are
+    returned as plain dicts, like get_all_incomes does.
     """
-    all_incomes = get_all_incomes()
-    result = []
-    for rec in all_incomes:
-        date = rec.get("date", "")
-        if isinstance(date, str) and date.startswith(month):
-            result.append(rec)
-    return result
+    with _reading(incomes):
+        return [income_entry._as_dict(rec) for rec in _in_month(_store(incomes), month)]
 
 
-def total_monthly_income(month):
+def filter_by_date_range(start, end, incomes=None):
+    """
+    Pick incomes whose date is between start and end (both inclusive).
+
+    Parameters
+    ----------
+    start, end : str
+        Dates like '2025-11-03' or whole months like '2025-11'.
+        '2025-01' to '2025-03' covers every day of January to March.
+    incomes : IncomeStore, optional
+        Store to read (default: the incomes of the default ledger).
+
+    Returns
+    -------
+    list of dict
+        Matching incomes, ordered by month. Only the months in the range
+        are read.
+    """
+    with _reading(incomes):
+        return [income_entry._as_dict(rec) for rec in _store(incomes).records_between(start, end)]
+
+
+def total_monthly_income(month, incomes=None):
     """
     Calculate total income for a given month.
 
@@ -26,54 +53,67 @@ def total_monthly_income(month):
     ----------
     month : str
         Month in 'YYYY-MM' format, for example '2025-11'
+    incomes : IncomeStore, optional
+        Store to read (default: the incomes of the default ledger).
 
     Returns
     -------
     float
         Sum of all income amounts for that month.
     """
-    records = filter_by_month(month)
-    total = 0.0
-    for rec in records:
-        total += rec.get("amount", 0.0)
-    return float(total)
+    with _reading(incomes):
+        if len(month) == 7:
+            # running total of the month bucket, no records are read
+            return float(_store(incomes).total_for("month", month))
 
+        # the totals only read the amounts, so the records are not copied
+        records = _in_month(_store(incomes), month)
+        total = 0.0
+        for rec in records:
+            total += rec.get("amount", 0.0)
+        return float(total)
 
-def average_monthly_income():
+
+def total_income_between(start, end, incomes=None):
     """
-    Compute the average monthly income across all months in the data.
+    Calculate total income for every date between start and end
+    (both inclusive), for example a quarter: ('2025-01', '2025-03').
 
     Returns
     -------
     float
-        Average monthly income. Returns 0.0 if no data.
+        Sum of the matching income amounts.
     """
-    all_incomes = get_all_incomes()
-    if not all_incomes:
-        return 0.0
+    with _reading(incomes):
+        total = 0.0
+        for rec in _store(incomes).records_between(start, end):
+            total += rec.get("amount", 0.0)
+        return float(total)
 
-    month_totals = {}
 
-    for rec in all_incomes:
-        date = rec.get("date", "")
-        if isinstance(date, str) and len(date) >= 7:
-            month = date[:7]  # 'YYYY-MM'
-            amount = rec.get("amount", 0.0)
-            if month not in month_totals:
-                month_totals[month] = 0.0
-            month_totals[month] += amount
+def average_monthly_income(incomes=None):
+    """
+    Compute the average monthly income across all months in the data.
 
-    if not month_totals:
-        return 0.0
+    Returns
+    -------
+    float
+        Average monthly income. Returns 0.0 if no data.
+    """
+    with _reading(incomes):
+        # running per-month totals kept by the income store
+        totals = _store(incomes).totals_for("month")
+        if not totals:
+            return 0.0
 
-    total = 0.0
-    for m in month_totals:
-        total += month_totals[m]
+        total = 0.0
+        for m in totals:
+            total += totals[m]
 
-    return float(total / len(month_totals))
+        return float(total / len(totals))
 
 
-def income_by_source():
+def income_by_source(incomes=None):
     """
     Group total income by source.
 
@@ -82,13 +122,33 @@ def income_by_source():
     dict
         Keys are sources, values are total amounts.
     """
-    all_incomes = get_all_incomes()
-    result = {}
-    for rec in all_incomes:
-        source = rec.get("source", "unknown")
-        amount = rec.get("amount", 0.0)
-        if source not in result:
-            result[source] = 0.0
-        result[source] += amount
+    with _reading(incomes):
+        # running per-source totals kept by the income store
+        return _store(incomes).totals_for("source")
+
+
+def _in_month(store, month):
+    # records of the store whose date starts with month, read from the
+    # month buckets that can match
+    if len(month) == 7:
+        return store.by_month(month)
+
+    result = []
+    for key in store.months():
+        if key.startswith(month) or month.startswith(key):
+            for rec in store.by_month(key):
+                if rec["date"].startswith(month):
+                    result.append(rec)
     return result
 
+
+def _reading(incomes):
+    # the incomes of the default ledger are read under its lock; a store
+    # that is passed in is locked by the caller (see ledger.Ledger)
+    return income_entry.lock if incomes is None else nullcontext()
+
+
+def _store(incomes):
+    # the income store of the default ledger unless one is given
+    return income_entry.incomes if incomes is None else incomes
+
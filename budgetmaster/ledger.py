@@ -0,0 +1,342 @@
+# budgetmaster/ledger.py
+
+"""
+Ledgers: the incomes and expenses of one household, kept apart from
+every other household in the same process.
+
+A Ledger owns an IncomeBook and an ExpenseBook (see income.entry and
+expense.entry): two stores, each with its own id counter, indexes and
+running totals. Nothing in a ledger is shared with another one, so a
+server can keep one ledger per household, and dropping a ledger (or
+calling close()) frees all of its memory. The 'columnar' backend keeps
+a large household small, and 'sqlite' with a path keeps it on disk.
+
+The module functions of income.entry, income.summary and expense.entry
+work on the default ledger (get_default_ledger), so code written for
+one household keeps working unchanged.
+
+What stays shared by all ledgers is only bounded, read-mostly data: the
+date and month caches (storage.dates) and the categorization rules with
+their cache (analysis.utils). Tags are interned strings, which Python
+frees once no expense uses them.
+
+A ledger can be used from many threads at once: each side has its own
+lock, held by every operation (see storage.locking). AsyncLedger gives
+the same operations as coroutines for asyncio code.
+"""
+
+import os
+from functools import partial
+
+from budgetmaster.analysis.reports import monthly_balance, summarize
+from budgetmaster.expense import entry as expense_entry
+from budgetmaster.income import entry as income_entry
+from budgetmaster.income import summary as income_summary
+
+# single-side operations, taken from the ledger's books as they are
+_INCOME_OPERATIONS = (
+    "add_income", "add_incomes_bulk", "update_income", "delete_income",
+    "delete_incomes", "get_all_incomes", "view_incomes", "get_income",
+)
+_EXPENSE_OPERATIONS = (
+    "add_expense", "add_expenses_bulk", "get_all_expenses", "view_expenses",
+    "get_expense", "delete_expense", "delete_expenses", "tag_expense",
+    "expenses_tagged", "total_by_category", "total_by_tag",
+)
+# income.summary functions, called on the ledger's income store
+_SUMMARY_FUNCTIONS = (
+    "filter_by_month", "filter_by_date_range", "total_monthly_income",
+    "total_income_between", "average_monthly_income", "income_by_source",
+)
+
+# Ledger methods that touch both sides or the files
+_LEDGER_METHODS = (
+    "monthly_balance", "summarize", "clear", "set_storage_backend", "open_journal",
+    "close_journal", "save_ledger", "load_ledger", "close",
+)
+
+# file names used by save_ledger and load_ledger
+INCOME_FILE = "incomes.ledger"
+EXPENSE_FILE = "expenses.ledger"
+
+
+class Ledger:
+    """
+    The incomes and expenses of one household.
+
+    Besides the methods below, a ledger has every income and expense
+    operation of the entry modules (add_income, add_expenses_bulk,
+    tag_expense, total_by_category, ...) and the income.summary
+    functions (total_monthly_income, income_by_source, ...), with the
+    same arguments, working on this ledger only.
+
+    Parameters
+    ----------
+    backend : str
+        Storage backend of both sides: 'dict' (default), 'columnar' or
+        'sqlite' (see income.entry.set_storage_backend).
+    **options
+        Passed to both stores, for example path='household.db' for
+        'sqlite' (incomes and expenses are separate tables).
+
+    Attributes
+    ----------
+    income : IncomeBook
+        The income side.
+    expense : ExpenseBook
+        The expense side.
+
+    Raises
+    ------
+    ValueError
+        If the backend name is unknown.
+    """
+
+    def __init__(self, backend="dict", **options):
+        self.income = income_entry.IncomeBook(backend, **options)
+        self.expense = expense_entry.ExpenseBook(backend, **options)
+
+    @classmethod
+    def from_books(cls, income, expense):
+        """
+        Build a ledger around an existing IncomeBook and ExpenseBook
+        (this is how the default ledger wraps the books of the entry
+        modules).
+        """
+        ledger = cls.__new__(cls)
+        ledger.income = income
+        ledger.expense = expense
+        return ledger
+
+    def __getattr__(self, name):
+        # only called for names not defined on the class: the operations
+        # of the books and the income summaries
+        if name in _INCOME_OPERATIONS:
+            return getattr(self.income, name)
+        if name in _EXPENSE_OPERATIONS:
+            return getattr(self.expense, name)
+        if name in _SUMMARY_FUNCTIONS:
+            return partial(_summary, getattr(income_summary, name), self.income)
+        raise AttributeError("{!r} object has no attribute {!r}".format(type(self).__name__, name))
+
+    def __dir__(self):
+        return sorted(set(object.__dir__(self)) | set(_INCOME_OPERATIONS)
+                      | set(_EXPENSE_OPERATIONS) | set(_SUMMARY_FUNCTIONS))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def incomes(self):
+        """
+        The income store (changes with set_storage_backend, open_journal
+        and load_ledger).
+        """
+        return self.income.incomes
+
+    @property
+    def expenses(self):
+        """
+        The expense store (changes with set_storage_backend, open_journal
+        and load_ledger).
+        """
+        return self.expense.expenses
+
+    def monthly_balance(self):
+        """
+        Compute (income - expense) for each month of this ledger (see
+        analysis.reports.monthly_balance). Uses the month totals the
+        stores keep, so no record is read.
+        """
+        # the income lock is always taken first, so two threads can never
+        # wait for each other
+        with self.income.lock, self.expense.lock:
+            return monthly_balance(self.income.incomes.view(), self.expense.expenses.view())
+
+    def summarize(self):
+        """
+        Compute every report page summary of this ledger at once (see
+        analysis.reports.summarize): the returned Summary answers
+        monthly_balance, total_by_category, income_by_source, ... and
+        holds the month x source and month x category matrices. Both
+        sides are read under their locks, so the numbers agree.
+        """
+        with self.income.lock, self.expense.lock:
+            return summarize(self.income.incomes.view(), self.expense.expenses.view())
+
+    def clear(self):
+        """
+        Remove every income and expense; ids start over at 1.
+        """
+        with self.income.lock, self.expense.lock:
+            self.income.incomes.clear()
+            self.expense.expenses.clear()
+
+    def set_storage_backend(self, name, **options):
+        """
+        Move both sides to another storage backend (see
+        income.entry.set_storage_backend). Existing records are copied.
+
+        Raises
+        ------
+        ValueError
+            If the backend name is unknown.
+        """
+        self.income.set_storage_backend(name, **options)
+        self.expense.set_storage_backend(name, **options)
+
+    def open_journal(self, directory, fsync="always", fsync_every=100, snapshot_every=10000):
+        """
+        Keep this ledger on disk (see income.entry.open_journal). Incomes
+        and expenses get their own journal in the 'incomes' and
+        'expenses' folders of `directory`. New journals start with the
+        records in memory; existing ones are loaded into empty stores.
+
+        Raises
+        ------
+        ValueError
+            If the fsync policy is unknown, a log is damaged, or a
+            journal is found while records of that side are in memory.
+        """
+        options = {"fsync": fsync, "fsync_every": fsync_every, "snapshot_every": snapshot_every}
+        self.income.open_journal(os.path.join(directory, "incomes"), **options)
+        try:
+            self.expense.open_journal(os.path.join(directory, "expenses"), **options)
+        except Exception:
+            self.income.close_journal()
+            raise
+
+    def close_journal(self):
+        """
+        Sync and close the journals opened with open_journal. Does
+        nothing if none is open.
+        """
+        self.income.close_journal()
+        self.expense.close_journal()
+
+    def save_ledger(self, directory):
+        """
+        Write both sides to binary ledger files (see storage.mapped) in
+        `directory`, which is created if needed.
+
+        Returns
+        -------
+        int
+            Number of records written.
+        """
+        os.makedirs(directory, exist_ok=True)
+        return (self.income.save_ledger(os.path.join(directory, INCOME_FILE))
+                + self.expense.save_ledger(os.path.join(directory, EXPENSE_FILE)))
+
+    def load_ledger(self, directory):
+        """
+        Replace the records of this ledger with the files written by
+        save_ledger in `directory` (memory-mapped, see
+        income.entry.load_ledger).
+
+        Raises
+        ------
+        ValueError
+            If a file is not a ledger file of the right kind.
+        """
+        self.income.load_ledger(os.path.join(directory, INCOME_FILE))
+        self.expense.load_ledger(os.path.join(directory, EXPENSE_FILE))
+
+    def close(self):
+        """
+        Close the journals and release the stores (database connections
+        and mapped files). The ledger is empty afterwards, with the
+        'dict' backend.
+        """
+        with self.income.lock, self.expense.lock:
+            self.close_journal()
+            for store in (self.income.incomes, self.expense.expenses):
+                if hasattr(store, "close"):
+                    store.close()
+            # same books (and locks), so the default ledger stays the one
+            # of the modules
+            self.income.incomes = income_entry.IncomeStore(income_entry.Income)
+            self.expense.expenses = expense_entry.ExpenseStore(expense_entry.Expense)
+
+
+class AsyncLedger:
+    """
+    asyncio version of a Ledger: every operation of the ledger (add_expense,
+    monthly_balance, total_by_category, open_journal, ...) is a coroutine
+    with the same arguments, for example
+    `await household.add_expense("food", 20, "2025-01-02")`.
+
+    Each call runs the Ledger method in an executor thread, so neither
+    a large aggregation nor a journal write that waits for fsync blocks
+    the event loop; the ledger's locks keep the calls of concurrent
+    tasks apart (see storage.locking). A call that is cancelled while
+    waiting still finishes in its thread.
+
+    Parameters
+    ----------
+    ledger : Ledger, optional
+        The ledger to work on (default: a new Ledger()).
+    executor : concurrent.futures.Executor, optional
+        Where the operations run (default: the event loop's default
+        executor).
+
+    Attributes
+    ----------
+    ledger : Ledger
+        The wrapped ledger, for synchronous use.
+    """
+
+    def __init__(self, ledger=None, executor=None):
+        self.ledger = Ledger() if ledger is None else ledger
+        self.executor = executor
+
+    def __getattr__(self, name):
+        # only called for names not defined on the class: the operations
+        # of the ledger, turned into coroutines
+        if name not in _LEDGER_METHODS + _INCOME_OPERATIONS + _EXPENSE_OPERATIONS + _SUMMARY_FUNCTIONS:
+            raise AttributeError("{!r} object has no attribute {!r}".format(type(self).__name__, name))
+        method = getattr(self.ledger, name)
+
+        async def operation(*args, **kwargs):
+            return await self._run(partial(method, *args, **kwargs))
+
+        operation.__name__ = name
+        operation.__doc__ = method.__doc__
+        return operation
+
+    def __dir__(self):
+        return sorted(set(object.__dir__(self)) | set(_LEDGER_METHODS) | set(_INCOME_OPERATIONS)
+                      | set(_EXPENSE_OPERATIONS) | set(_SUMMARY_FUNCTIONS))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._run(self.ledger.close)
+
+    async def _run(self, function):
+        import asyncio
+
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function)
+
+
+def _summary(function, book, *args, **kwargs):
+    # an income.summary function run on the store of a book, under its lock
+    with book.lock:
+        return function(*args, incomes=book.incomes, **kwargs)
+
+
+# the ledger the module functions of the entry modules work on
+_default = Ledger.from_books(income_entry._book, expense_entry._book)
+
+
+def get_default_ledger():
+    """
+    Return the default ledger: the one that the module functions
+    (income.entry.add_income, expense.entry.total_by_category, ...)
+    work on.
+    """
+    return _default
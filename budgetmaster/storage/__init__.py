@@ -0,0 +1,17 @@
+# budgetmaster/storage/__init__.py
+"""
+Storage sub-package.
+
+This part of the package holds the containers that income and expense
+records are kept in. The entry modules in `income` and `expense` are
+thin wrappers over these stores.
+
+Modules:
+- base_store : IndexedStore class. A hash table of records keyed by id, with secondary indexes on a few fields (for example category, source or month). The income and expense stores inherit from it.
+- columnar   : ColumnarStore class. An optional array-backed store (one contiguous array per field, dictionary-encoded strings) for ledgers too large to keep as one dictionary per record.
+- journal    : JournaledStore class. Wraps either store and keeps it on disk with an append-only log and compacted snapshots, so records survive a restart.
+- sqlite_store : SQLiteStore class. An optional backend on the standard library sqlite3 module; totals are computed with SQL aggregates.
+- dates      : date parsing. Dates are checked once when a record is stored and turned into day numbers and month keys; month names come from one shared table.
+- mapped     : MappedStore class. A ColumnarStore read from a memory-mapped binary ledger file, so large ledgers load without parsing every row.
+- locking    : the locked decorator. Every income and expense book holds its own lock around each operation, so ledgers can be shared by threads.
+"""
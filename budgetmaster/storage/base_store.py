@@ -0,0 +1,655 @@
+# budgetmaster/storage/base_store.py
+
+"""
+Base class for the indexed in-memory record stores.
+
+Records are kept in a hash table keyed by their id, so looking up,
+updating or deleting one record does not scan the whole ledger. A
+record is a dictionary or any object that reads like one (rec["amount"],
+rec.get("date")), such as the slotted transaction classes.
+
+Subclasses choose which fields get a secondary index; the month
+('YYYY-MM') of the record date is always indexed. Dates must be
+'YYYY-MM-DD' strings: they are checked when a record is stored (see
+storage.dates), and a record with a malformed date is refused instead
+of being left out of the month index. A field can also hold
+several keys (like the tags of an expense); the record is then indexed
+under each of them, which gives an inverted index key -> ids.
+
+Every index also keeps a running total of the 'amount' field per key,
+so summaries like "total per category" are read in O(number of groups)
+instead of being recomputed from every record. Adding a record adds its
+amount to the totals of its keys. Subtracting amounts again would let
+the totals drift from the records (floats round), so a key that loses
+or changes a record is only marked; its total is summed again from its
+bucket (math.fsum) the next time it is read.
+
+A store also hands out the ids of new records (allocate_ids), so every
+ledger has its own id counter; clear() starts it over at 1.
+"""
+
+from math import fsum
+
+from .dates import month_of
+
+
+class StoreView:
+    """
+    Read-only, zero-copy view of a store.
+
+    Iterating the view walks the live store without copying it. If the
+    store is changed (add, update, delete, clear) while an iteration is
+    in progress, the iteration stops with a RuntimeError, like a dict
+    changed during iteration. The records handed out belong to the store
+    and must not be modified.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return len(self.store)
+
+    def __contains__(self, record_id):
+        return record_id in self.store
+
+    def __iter__(self):
+        store = self.store
+        version = store.version
+        for rec in store:
+            if store.version != version:
+                raise RuntimeError("Store changed during iteration.")
+            yield rec
+        if store.version != version:
+            raise RuntimeError("Store changed during iteration.")
+
+    def get(self, record_id, default=None):
+        """
+        Return the record with the given id (or default if missing).
+        """
+        return self.store.get(record_id, default)
+
+
+class IndexedStore:
+    """
+    Hash-indexed container for records.
+
+    Subclasses set the class attributes below.
+
+    Parameters
+    ----------
+    record_type : class, optional
+        Class used as the stored form of a record. It needs a
+        from_record(mapping) class method and a freeze() method. Every
+        record added is copied with from_record and frozen, so the stored
+        objects cannot be changed behind the indexes; update() replaces
+        them. By default records are stored as given and add_columns
+        builds dicts.
+
+    Attributes
+    ----------
+    id_key : str
+        Name of the id field, for example 'expense_id'.
+    group_fields : dict
+        Indexed field name -> value used when a record has no such field.
+    sparse_fields : dict
+        Field name -> factory (for example list) for fields that are
+        often empty and may be left out when adding columns.
+    multi_fields : tuple
+        Fields whose value is a collection of keys (for example tags).
+        The record is indexed, and counted in the running totals, under
+        each key.
+    fields : tuple
+        Key order of the records built by add_columns.
+    version : int
+        Bumped on every change, so views can tell the store was modified.
+    """
+
+    id_key = "id"
+    group_fields = {}
+    sparse_fields = {}
+    multi_fields = ()
+    fields = ()
+
+    # next id handed out by allocate_ids; None means "after max_id()",
+    # worked out on first use so a store filled from a file or a
+    # journal continues after its records
+    _next_id = None
+
+    def __init__(self, record_type=None):
+        self.record_type = record_type
+        # id -> record (insertion ordered)
+        self._records = {}
+        # field -> {key -> {id: None}}; the inner dict is an ordered set
+        self._indexes = {field: {} for field in self.group_fields}
+        for field in self.multi_fields:
+            self._indexes[field] = {}
+        self._indexes["month"] = {}
+        # field -> {key -> running total of 'amount'}
+        self._totals = {field: {} for field in self._indexes}
+        # field -> keys whose total must be summed again (see _unindex)
+        self._stale = {field: set() for field in self._indexes}
+        self.version = 0
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records.values())
+
+    def __contains__(self, record_id):
+        return record_id in self._records
+
+    def add(self, record):
+        """
+        Store a record and return the stored record. The record must
+        already have its id field set.
+
+        Raises
+        ------
+        ValueError
+            If the id is already stored or the date is not a valid
+            'YYYY-MM-DD' date.
+        """
+        if self.record_type is not None:
+            record = self.record_type.from_record(record).freeze()
+        record_id = record[self.id_key]
+        if record_id in self._records:
+            raise ValueError("Duplicate {} = {}".format(self.id_key, record_id))
+        # the keys are computed first, so a bad date stores nothing
+        keys = list(self._group_keys(record))
+        self._records[record_id] = record
+        self._index(record_id, record, keys)
+        self.version += 1
+        return record
+
+    def add_columns(self, columns):
+        """
+        Store many records at once, given as columns.
+
+        Parameters
+        ----------
+        columns : dict
+            Field name -> sequence of values, all of the same length. The
+            id field is required; fields in sparse_fields may be left out.
+
+        Returns
+        -------
+        int
+            Number of records added.
+
+        Raises
+        ------
+        ValueError
+            If the columns have different lengths, an id is repeated or
+            a date is not a valid 'YYYY-MM-DD' date. Nothing is stored
+            in that case.
+        """
+        ids = columns[self.id_key]
+        count = _check_columns(columns, len(ids))
+        if len(set(ids)) != count or any(i in self._records for i in ids):
+            raise ValueError("Duplicate {} in batch.".format(self.id_key))
+        # each distinct date is parsed once (see storage.dates)
+        dates = columns.get("date")
+        months = list(map(month_of, [None] * count if dates is None else dates))
+
+        columns = dict(columns)
+        for field, factory in self.sparse_fields.items():
+            if field not in columns:
+                columns[field] = [factory() for _ in range(count)]
+        fields = [f for f in self.fields if f in columns]
+
+        rows = (dict(zip(fields, values)) for values in zip(*[columns[f] for f in fields]))
+        if self.record_type is not None:
+            from_record = self.record_type.from_record
+            rows = (from_record(row).freeze() for row in rows)
+        self._records.update(zip(ids, rows))
+
+        # the indexes are filled one column at a time, and the running
+        # totals of the batch are merged into the store once at the end
+        batch_totals = {field: {} for field in self._totals}
+        amounts = columns.get("amount")
+        if amounts is None:
+            amounts = [0.0] * count
+        for field, default in self.group_fields.items():
+            keys = columns.get(field)
+            if keys is None:
+                keys = [default] * count
+            self._index_column(field, ids, keys, amounts, batch_totals[field])
+        for field in self.multi_fields:
+            index = self._indexes[field]
+            totals = batch_totals[field]
+            for record_id, keys, amount in zip(ids, columns[field], amounts):
+                for key in dict.fromkeys(() if keys is None else keys):
+                    index.setdefault(key, {})[record_id] = None
+                    totals[key] = totals.get(key, 0.0) + amount
+        self._index_column("month", ids, months, amounts, batch_totals["month"])
+
+        for field, totals in batch_totals.items():
+            store_totals = self._totals[field]
+            for key, total in totals.items():
+                store_totals[key] = store_totals.get(key, 0.0) + total
+        self.version += 1
+        return count
+
+    def get(self, record_id, default=None):
+        """
+        Return the record with the given id (or default if missing).
+        """
+        return self._records.get(record_id, default)
+
+    def max_id(self):
+        """
+        Return the largest stored id, or None if the store is empty.
+        """
+        return max(self._records, default=None)
+
+    def next_id(self):
+        """
+        Return the id that allocate_ids hands out next, without taking it.
+        """
+        if self._next_id is None:
+            self._next_id = (self.max_id() or 0) + 1
+        return self._next_id
+
+    def allocate_ids(self, count=1):
+        """
+        Take `count` new ids for records about to be added and return
+        them as a range. Ids are never handed out twice, even after the
+        record with the largest id was deleted, until clear() is called.
+        """
+        start = self.next_id()
+        self._next_id = start + count
+        return range(start, start + count)
+
+    def reserve_ids(self, next_id):
+        """
+        Make sure allocate_ids does not hand out ids below `next_id`,
+        for example the ones already given out by another store.
+        """
+        self._next_id = max(self.next_id(), next_id)
+
+    def update(self, record_id, **changes):
+        """
+        Change some fields of a stored record and move it to the right
+        index buckets. Returns the updated record: the same dict, or a
+        new object of record_type replacing the stored one.
+
+        Raises
+        ------
+        KeyError
+            If the id is not in the store.
+        ValueError
+            If the new date is not a valid 'YYYY-MM-DD' date.
+        """
+        record = self._records[record_id]
+        if "date" in changes:
+            month_of(changes["date"])
+        if self.record_type is not None:
+            # built before anything is unindexed, so bad values change nothing
+            values = dict(record)
+            values.update(changes)
+            updated = self.record_type.from_record(values).freeze()
+            self._unindex(record_id, record)
+            self._records[record_id] = record = updated
+        else:
+            self._unindex(record_id, record)
+            record.update(changes)
+        self._index(record_id, record)
+        self.version += 1
+        return record
+
+    def delete(self, record_id):
+        """
+        Remove a record by id. Returns the removed record, or None if
+        the id was not found.
+        """
+        record = self._records.pop(record_id, None)
+        if record is not None:
+            self._unindex(record_id, record)
+            self.version += 1
+        return record
+
+    def clear(self):
+        """
+        Remove every record, reset the indexes and start the ids over at 1.
+        """
+        self._records.clear()
+        for index in self._indexes.values():
+            index.clear()
+        for totals in self._totals.values():
+            totals.clear()
+        for stale in self._stale.values():
+            stale.clear()
+        self._next_id = None
+        self.version += 1
+
+    def view(self):
+        """
+        Return a read-only StoreView of this store (no copy is made).
+        """
+        return StoreView(self)
+
+    def records_for(self, field, key):
+        """
+        Return the records whose indexed `field` equals `key`, in
+        insertion order.
+        """
+        ids = self._indexes[field].get(key, {})
+        return [self._records[i] for i in ids]
+
+    def records_for_all(self, keys):
+        """
+        Return the records that are in every given index bucket, for
+        example [('tags', 'work'), ('tags', 'travel'), ('month', '2025-03')].
+
+        The smallest bucket is walked and the others are only probed, so
+        the cost depends on the rarest key, not on the store size.
+
+        Raises
+        ------
+        ValueError
+            If no key is given.
+        """
+        if not keys:
+            raise ValueError("Give at least one (field, key) pair.")
+        buckets = sorted((self._indexes[field].get(key, {}) for field, key in keys), key=len)
+        first, rest = buckets[0], buckets[1:]
+        return [self._records[i] for i in first if all(i in bucket for bucket in rest)]
+
+    def keys_for(self, field):
+        """
+        Return the keys of an index that currently have records.
+        """
+        return list(self._indexes[field].keys())
+
+    def records_between(self, start, end):
+        """
+        Return the records whose date is between `start` and `end`
+        (both inclusive), visiting only the month buckets in that range.
+
+        Parameters
+        ----------
+        start, end : str
+            Dates ('YYYY-MM-DD') or whole months ('YYYY-MM'). A record
+            matches when the same-length prefix of its date is within
+            the bounds, so '2025-01' to '2025-03' covers all of March.
+
+        Returns
+        -------
+        list of dict
+            Matching records, ordered by month and then id, like the
+            columnar and SQLite stores.
+        """
+        first, last = start[:7], end[:7]
+        result = []
+        for month in sorted(self.keys_for("month")):
+            if month < first or month > last:
+                continue
+            for rec in self._month_in_id_order(month):
+                if in_date_range(rec.get("date"), start, end):
+                    result.append(rec)
+        return result
+
+    def _month_in_id_order(self, month):
+        # update() appends a record that changes month to the end of its
+        # new bucket, so the bucket is not always in id order
+        return [self._records[i] for i in sorted(self._indexes["month"].get(month, {}))]
+
+    def select(self, ids=None, where=None, date_range=None):
+        """
+        Return the records that match every given condition.
+
+        Parameters
+        ----------
+        ids : iterable, optional
+            Only records with these ids (looked up by id, no scan).
+        where : callable, optional
+            Predicate called with each candidate record.
+        date_range : tuple, optional
+            (start, end) as in records_between; only those month
+            buckets are read.
+
+        Raises
+        ------
+        ValueError
+            If no condition is given.
+        """
+        if ids is None and where is None and date_range is None:
+            raise ValueError("Give at least one of ids, where or date_range.")
+
+        if ids is not None:
+            candidates = []
+            for record_id in dict.fromkeys(ids):
+                rec = self.get(record_id)
+                if rec is not None:
+                    candidates.append(rec)
+            if date_range is not None:
+                start, end = date_range
+                candidates = [rec for rec in candidates
+                              if in_date_range(rec.get("date"), start, end)]
+        elif date_range is not None:
+            candidates = self.records_between(*date_range)
+        else:
+            candidates = self
+
+        if where is not None:
+            return [rec for rec in candidates if where(rec)]
+        return list(candidates)
+
+    def delete_many(self, record_ids):
+        """
+        Remove many records by id in one go. Missing ids are skipped.
+
+        Returns
+        -------
+        int
+            Number of records removed.
+        """
+        removed = 0
+        for record_id in record_ids:
+            record = self._records.pop(record_id, None)
+            if record is not None:
+                self._unindex(record_id, record)
+                removed += 1
+        if removed:
+            self.version += 1
+        return removed
+
+    def totals_for(self, field):
+        """
+        Return the running 'amount' totals of an index as a new dict
+        (key -> total). Only keys that currently have records appear.
+        """
+        return dict(self._fresh_totals(field))
+
+    def total_for(self, field, key):
+        """
+        Return the running 'amount' total of one index key (0.0 if the
+        key has no records).
+        """
+        return self._fresh_totals(field).get(key, 0.0)
+
+    def month_totals_for(self, field):
+        """
+        Return the 'amount' totals per month and key of a group field
+        (for example 'category'), as {month: {key: total}} with months
+        in sorted order. Only the cells that have records appear.
+
+        The month index is walked, so every record is read once and no
+        date is parsed.
+
+        Raises
+        ------
+        ValueError
+            If the field is not a group field.
+        """
+        if field not in self.group_fields:
+            raise ValueError("Field {!r} is not a group field.".format(field))
+        default = self.group_fields[field]
+        records = self._records
+        months = self._indexes["month"]
+        result = {}
+        for month in sorted(months):
+            totals = result[month] = {}
+            for record_id in months[month]:
+                record = records[record_id]
+                key = record.get(field, default)
+                totals[key] = totals.get(key, 0.0) + record.get("amount", 0.0)
+        return result
+
+    def _fresh_totals(self, field):
+        # the running totals of an index, after summing again the keys
+        # that lost or changed a record since the last read
+        totals = self._totals[field]
+        stale = self._stale[field]
+        while stale:
+            key = stale.pop()
+            totals[key] = fsum(self._bucket_amounts(field, key))
+        return totals
+
+    def _bucket_amounts(self, field, key):
+        # amounts of the records in one index bucket
+        records = self._records
+        return [records[i].get("amount", 0.0) for i in self._indexes[field][key]]
+
+    def _group_keys(self, record):
+        # yield (field, key) for every index this record belongs to
+        for field, default in self.group_fields.items():
+            yield field, record.get(field, default)
+        for field in self.multi_fields:
+            for key in dict.fromkeys(record.get(field) or ()):
+                yield field, key
+        yield "month", month_of(record.get("date"))
+
+    def _index_column(self, field, ids, keys, amounts, totals):
+        # index a batch under one field
+        index = self._indexes[field]
+        for record_id, key, amount in zip(ids, keys, amounts):
+            bucket = index.get(key)
+            if bucket is None:
+                bucket = index[key] = {}
+            bucket[record_id] = None
+            totals[key] = totals.get(key, 0.0) + amount
+
+    def _index(self, record_id, record, keys=None):
+        amount = record.get("amount", 0.0)
+        for field, key in keys or self._group_keys(record):
+            self._indexes[field].setdefault(key, {})[record_id] = None
+            totals = self._totals[field]
+            totals[key] = totals.get(key, 0.0) + amount
+
+    def _unindex(self, record_id, record):
+        for field, key in self._group_keys(record):
+            index = self._indexes[field]
+            bucket = index.get(key)
+            if bucket is None:
+                continue
+            bucket.pop(record_id, None)
+            # drop empty buckets so keys_for only reports live groups
+            if not bucket:
+                del index[key]
+                del self._totals[field][key]
+                self._stale[field].discard(key)
+            else:
+                # summed again on the next read instead of subtracting
+                self._stale[field].add(key)
+
+
+def in_date_range(date, start, end):
+    """
+    Check that a date string is between start and end (both inclusive).
+    The same-length prefix of the date is compared with each bound, so
+    month bounds ('YYYY-MM') cover whole months.
+    """
+    if not isinstance(date, str):
+        return False
+    return date[:len(start)] >= start and date[:len(end)] <= end
+
+
+def to_columns(records, fields, defaults=None):
+    """
+    Turn a batch of records into a dict of columns (lists).
+
+    Parameters
+    ----------
+    records : dict or iterable
+        Either a dict of columns (field -> sequence) or an iterable of
+        rows, where each row is a dict or a tuple with the values in
+        `fields` order.
+    fields : tuple
+        Names of the fields to collect.
+    defaults : dict, optional
+        Field -> value used when a row or the columns miss that field.
+        Fields without a default are required.
+
+    Returns
+    -------
+    dict
+        Field -> list of values, in `fields` order. Array columns (NumPy
+        arrays, array.array) are turned into lists of Python values, so
+        the stores never keep NumPy scalars like np.str_ as keys.
+
+    Raises
+    ------
+    ValueError
+        If a required field is missing.
+    """
+    defaults = defaults or {}
+    if isinstance(records, dict):
+        count = None
+        for values in records.values():
+            count = len(values)
+            break
+        columns = {}
+        for field in fields:
+            if field in records:
+                values = records[field]
+                tolist = getattr(values, "tolist", None)
+                columns[field] = values if tolist is None else tolist()
+            elif field in defaults:
+                columns[field] = [defaults[field]] * (count or 0)
+            else:
+                raise ValueError("Missing column '{}'.".format(field))
+        return columns
+
+    # rows are completed to full tuples and then turned into columns
+    # with one zip(*rows), instead of appending every value separately
+    missing = object()
+    fallback = [defaults.get(field, missing) for field in fields]
+    width = len(fields)
+    # length of a short tuple row -> the default values that complete it
+    padding = {}
+    for size in range(width):
+        tail = tuple(fallback[size:])
+        if missing not in tail:
+            padding[size] = tail
+    rows = []
+    add_row = rows.append
+    for row in records:
+        if isinstance(row, dict):
+            row = tuple(map(row.get, fields, fallback))
+            if missing in row:
+                field = fields[row.index(missing)]
+                raise ValueError("Missing field '{}' in row.".format(field))
+        elif len(row) != width:
+            tail = padding.get(len(row))
+            if tail is None:
+                if len(row) > width:
+                    raise ValueError("Row has too many values: {}".format(row))
+                field = fields[fallback.index(missing, len(row))]
+                raise ValueError("Missing field '{}' in row.".format(field))
+            row = tuple(row) + tail
+        add_row(row)
+
+    if not rows:
+        return {field: [] for field in fields}
+    return dict(zip(fields, map(list, zip(*rows))))
+
+
+def _check_columns(columns, count):
+    # every column of a batch must have one value per record
+    for field, values in columns.items():
+        if len(values) != count:
+            raise ValueError("Column '{}' has {} values, expected {}.".format(field, len(values), count))
+    return count
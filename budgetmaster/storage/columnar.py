@@ -0,0 +1,642 @@
+# budgetmaster/storage/columnar.py
+
+"""
+Column-oriented (array-backed) record store.
+
+Instead of one dictionary per record, every field is kept in its own
+contiguous array: float64 amounts, int64 ids, int32 day numbers for the
+dates (see storage.dates), and small integer codes for repeated strings like category or
+source (dictionary encoding). This uses a few dozen bytes per row instead
+of several hundred. Record dictionaries are only built when a caller asks
+for rows (iteration, get, records_for, ...).
+
+The store keeps the same methods as IndexedStore, so the entry modules
+can switch between the two without other changes.
+"""
+
+from array import array
+from bisect import bisect_left, insort
+
+from .base_store import IndexedStore, _check_columns
+from .dates import decode_date, parse_date, month_of_day
+
+# only compact the arrays once this many rows are marked as deleted
+_COMPACT_MIN_DEAD = 1024
+
+
+class StringTable:
+    """
+    Dictionary encoding for repeated values: each distinct value gets a
+    small integer code, and columns store the codes.
+    """
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, value):
+        """
+        Return the code of a value, adding it to the table if needed.
+        """
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+    def lookup(self, value):
+        """
+        Return the code of a value, or None if it was never stored.
+        """
+        return self.codes.get(value)
+
+
+class ColumnarStore(IndexedStore):
+    """
+    Array-backed store with the same interface as IndexedStore.
+
+    Ids must be added in increasing order (which is what allocate_ids
+    hands out), so an id is found by binary search on the
+    id column. Deleted rows are only marked as dead and the arrays are
+    compacted once more than half of the rows are dead.
+
+    Subclasses set the class attribute below in addition to the ones
+    from IndexedStore. Values of sparse_fields are only stored for rows
+    where they are not empty; every field in multi_fields must be one of
+    them.
+
+    Attributes
+    ----------
+    encoded_fields : dict
+        Extra dictionary-encoded field name -> default value. Every field
+        in group_fields is dictionary-encoded as well.
+
+    The values live in the columns, so record_type is only kept for
+    interface compatibility: rows are always handed out as new dicts.
+    """
+
+    encoded_fields = {}
+
+    def __init__(self, record_type=None):
+        self.record_type = record_type
+        self._encoded = dict(self.group_fields)
+        self._encoded.update(self.encoded_fields)
+
+        self._ids = array("q")
+        self._amounts = array("d")
+        self._dates = array("i")
+        self._codes = {field: array("I") for field in self._encoded}
+        self._tables = {field: StringTable() for field in self._encoded}
+        self._alive = bytearray()
+        self._dead = 0
+
+        # row -> value, only for rows that need them
+        self._sparse = {field: {} for field in self.sparse_fields}
+
+        # live row count and running 'amount' total per index key, so
+        # keys_for and totals_for do not scan
+        self._counts = {field: {} for field in self.group_fields}
+        for field in self.multi_fields:
+            self._counts[field] = {}
+        self._counts["month"] = {}
+        self._totals = {field: {} for field in self._counts}
+        # keys whose total is summed again on the next read (see
+        # IndexedStore._unindex)
+        self._stale = {field: set() for field in self._counts}
+
+        # month -> sorted array of live rows, so a month query only
+        # touches that month's rows
+        self._month_rows = {}
+        # group field -> {key -> sorted array of live rows}, the same for
+        # category or source; built from the codes on the first lookup
+        # of a field (see _key_rows) and kept up to date from then on
+        self._group_rows = {}
+        # multi field -> {key -> {row: None}}
+        self._multi_rows = {field: {} for field in self.multi_fields}
+        self.version = 0
+
+    def __len__(self):
+        return len(self._ids) - self._dead
+
+    def __iter__(self):
+        alive = self._alive
+        for row in range(len(self._ids)):
+            if alive[row]:
+                yield self._row_dict(row)
+
+    def __contains__(self, record_id):
+        return self._find(record_id) is not None
+
+    def add(self, record):
+        """
+        Append a record to the columns. The record must already have its
+        id field set, and the id must be larger than every stored id.
+
+        Raises
+        ------
+        ValueError
+            If the id is not larger than every stored id or the date is
+            not a valid 'YYYY-MM-DD' date.
+        """
+        record_id = record[self.id_key]
+        if self._ids and record_id <= self._ids[-1]:
+            if self._find(record_id) is not None:
+                raise ValueError("Duplicate {} = {}".format(self.id_key, record_id))
+            raise ValueError("{} must be added in increasing order.".format(self.id_key))
+        day = parse_date(record.get("date"))
+
+        row = len(self._ids)
+        self._ids.append(record_id)
+        self._amounts.append(float(record.get("amount", 0.0)))
+        self._alive.append(1)
+        self._dates.append(day)
+        for field, default in self._encoded.items():
+            code = self._tables[field].encode(record.get(field, default))
+            self._codes[field].append(code)
+        for field in self.sparse_fields:
+            value = record.get(field)
+            if value:
+                self._sparse[field][row] = value
+
+        self._count(row, 1)
+        self.version += 1
+        return self._row_dict(row)
+
+    def add_columns(self, columns):
+        """
+        Append many records at once, given as columns (see
+        IndexedStore.add_columns). Each column is converted into its
+        array in one go, and the index counts, running totals and month
+        buckets are computed for the whole batch with NumPy.
+
+        Returns
+        -------
+        int
+            Number of records added.
+        """
+        # numpy is only needed for bulk loads, so it is imported here to
+        # keep plain imports of the entry modules light
+        import numpy as np
+
+        ids = columns[self.id_key]
+        count = _check_columns(columns, len(ids))
+        if count == 0:
+            return 0
+        if not (isinstance(ids, range) and ids.step > 0):
+            if any(a >= b for a, b in zip(ids, ids[1:])):
+                raise ValueError("{} must be added in increasing order.".format(self.id_key))
+        if self._ids and ids[0] <= self._ids[-1]:
+            raise ValueError("{} must be added in increasing order.".format(self.id_key))
+
+        # convert every column before touching the store, so a bad batch
+        # leaves the store unchanged
+        new_ids = array("q", ids)
+        if "amount" in columns:
+            new_amounts = array("d", columns["amount"])
+        else:
+            new_amounts = array("d", bytes(8 * count))
+        amounts = np.frombuffer(new_amounts, dtype=np.float64)
+
+        # dates: each distinct value is parsed once, then every row gets
+        # its day number and month through a NumPy lookup
+        distinct, local = _local_codes(columns.get("date", [None] * count), np)
+        day_of = np.array([parse_date(value) for value in distinct], dtype=np.int32)
+        month_keys = {}
+        month_of_local = np.array(
+            [month_keys.setdefault(month_of_day(day), len(month_keys)) for day in day_of.tolist()],
+            dtype=np.intp,
+        )
+        new_dates = array("i", day_of[local].tobytes())
+
+        encoded = {}
+        for field, default in self._encoded.items():
+            values = columns.get(field)
+            if values is None:
+                values = [default] * count
+            encoded[field] = self._encode_column(field, values, np)
+
+        first_row = len(self._ids)
+        self._ids.extend(new_ids)
+        self._amounts.extend(new_amounts)
+        self._dates.extend(new_dates)
+        self._alive.extend(b"\x01" * count)
+        for field, codes in encoded.items():
+            self._codes[field].extend(codes)
+        for field in self.sparse_fields:
+            values = columns.get(field)
+            if values is not None:
+                sparse = self._sparse[field]
+                for offset, value in enumerate(values):
+                    if value is not None and len(value):
+                        sparse[first_row + offset] = value
+                        if field in self._multi_rows:
+                            row = first_row + offset
+                            self._count_multi(field, row, 1, self._amounts[row])
+
+        # month buckets: a stable sort of the batch by month gives the
+        # rows of each month in row order
+        month_codes = month_of_local[local]
+        order = np.argsort(month_codes, kind="stable")
+        numbers = np.bincount(month_codes, minlength=len(month_keys))
+        totals = np.bincount(month_codes, weights=amounts, minlength=len(month_keys))
+        position = 0
+        for month, code in month_keys.items():
+            number = int(numbers[code])
+            chunk = order[position:position + number] + first_row
+            position += number
+            self._month_rows.setdefault(month, array("q")).frombytes(chunk.astype(np.int64).tobytes())
+            self._bump("month", month, number, float(totals[code]))
+
+        for field in self.group_fields:
+            codes = np.frombuffer(encoded[field], dtype=np.uint32)
+            size = len(self._tables[field].values)
+            numbers = np.bincount(codes, minlength=size)
+            totals = np.bincount(codes, weights=amounts, minlength=size)
+            values = self._tables[field].values
+            for code in np.flatnonzero(numbers).tolist():
+                self._bump(field, values[code], int(numbers[code]), float(totals[code]))
+            index = self._group_rows.get(field)
+            if index is not None:
+                # same stable sort as for the months, on the codes
+                order = np.argsort(codes, kind="stable").astype(np.int64) + first_row
+                position = 0
+                for code in np.flatnonzero(numbers).tolist():
+                    number = int(numbers[code])
+                    chunk = order[position:position + number]
+                    position += number
+                    index.setdefault(values[code], array("q")).frombytes(chunk.tobytes())
+
+        self.version += 1
+        return count
+
+    def get(self, record_id, default=None):
+        """
+        Return a dictionary for the record with the given id (or default).
+        """
+        row = self._find(record_id)
+        if row is None:
+            return default
+        return self._row_dict(row)
+
+    def max_id(self):
+        """
+        Return the largest stored id, or None if the store is empty.
+        """
+        # ids are sorted, so this is the last live row
+        for row in range(len(self._ids) - 1, -1, -1):
+            if self._alive[row]:
+                return self._ids[row]
+        return None
+
+    def update(self, record_id, **changes):
+        """
+        Change some fields of a stored record and return a fresh
+        dictionary of it.
+
+        Raises
+        ------
+        KeyError
+            If the id is not in the store.
+        ValueError
+            If a field cannot be updated (the id or an unknown field) or
+            the new date is not a valid 'YYYY-MM-DD' date.
+        """
+        row = self._find(record_id)
+        if row is None:
+            raise KeyError(record_id)
+        for field in changes:
+            if field not in ("amount", "date") and field not in self._encoded \
+                    and field not in self.sparse_fields:
+                raise ValueError("Field '{}' cannot be updated.".format(field))
+        if "date" in changes:
+            day = parse_date(changes["date"])
+
+        self._count(row, -1)
+        for field, value in changes.items():
+            if field == "amount":
+                self._amounts[row] = float(value)
+            elif field == "date":
+                self._dates[row] = day
+            elif field in self._encoded:
+                self._codes[field][row] = self._tables[field].encode(value)
+            elif value:
+                self._sparse[field][row] = value
+            else:
+                self._sparse[field].pop(row, None)
+        self._count(row, 1)
+        self.version += 1
+        return self._row_dict(row)
+
+    def delete(self, record_id):
+        """
+        Remove a record by id. Returns a dictionary of the removed record,
+        or None if the id was not found.
+        """
+        row = self._find(record_id)
+        if row is None:
+            return None
+
+        record = self._row_dict(row)
+        self._kill(row)
+        self.version += 1
+        self._maybe_compact()
+        return record
+
+    def delete_many(self, record_ids):
+        """
+        Remove many records by id. Missing ids are skipped. The arrays
+        are compacted at most once, at the end.
+
+        Returns
+        -------
+        int
+            Number of records removed.
+        """
+        removed = 0
+        for record_id in record_ids:
+            row = self._find(record_id)
+            if row is not None:
+                self._kill(row)
+                removed += 1
+        if removed:
+            self.version += 1
+            self._maybe_compact()
+        return removed
+
+    def clear(self):
+        """
+        Remove every record, reset the columns and start the ids over at 1.
+        """
+        version = self.version
+        ColumnarStore.__init__(self, self.record_type)
+        self._next_id = None
+        self.version = version + 1
+
+    def records_for(self, field, key):
+        """
+        Return the records whose indexed `field` equals `key`, in
+        insertion order.
+        """
+        return [self._row_dict(row) for row in self._rows_for(field, key)]
+
+    def records_for_all(self, keys):
+        """
+        Return the records that are in every given index bucket (see
+        IndexedStore.records_for_all), in insertion order.
+        """
+        if not keys:
+            raise ValueError("Give at least one (field, key) pair.")
+        buckets = sorted((self._rows_for(field, key) for field, key in keys), key=len)
+        first = buckets[0]
+        rest = [set(rows) for rows in buckets[1:]]
+        return [self._row_dict(row) for row in first if all(row in rows for rows in rest)]
+
+    def keys_for(self, field):
+        """
+        Return the keys of an index that currently have records.
+        """
+        return list(self._counts[field].keys())
+
+    def columns(self):
+        """
+        Return the raw columns for vectorized code (see analysis.aggregate).
+
+        Returns
+        -------
+        dict
+            'amount', 'date' (day numbers) and 'alive' arrays covering
+            every row (dead rows included, with alive[row] == 0).
+        """
+        return {
+            "amount": self._amounts,
+            "date": self._dates,
+            "alive": self._alive,
+        }
+
+    def encoded_column(self, field):
+        """
+        Return the codes of a dictionary-encoded field (every group field
+        and encoded field) for vectorized code.
+
+        Returns
+        -------
+        tuple
+            (codes, values): an unsigned int array covering every row,
+            like the arrays of columns(), and the list of values the
+            codes stand for.
+
+        Raises
+        ------
+        ValueError
+            If the field is not dictionary-encoded.
+        """
+        if field not in self._codes:
+            raise ValueError("Field {!r} is not dictionary-encoded.".format(field))
+        return self._codes[field], self._tables[field].values
+
+    def month_totals_for(self, field):
+        """
+        Return the 'amount' totals per month and key of a group field,
+        as {month: {key: total}} (see IndexedStore.month_totals_for).
+        Each month's rows are summed per code with numpy.bincount.
+        """
+        import numpy as np
+
+        if field not in self.group_fields:
+            raise ValueError("Field {!r} is not a group field.".format(field))
+        amounts = np.frombuffer(self._amounts, dtype=np.float64)
+        codes = np.frombuffer(self._codes[field], dtype=np.uint32)
+        values = self._tables[field].values
+        result = {}
+        for month in sorted(self._month_rows):
+            # only live rows are in the month rows
+            rows = np.frombuffer(self._month_rows[month], dtype=np.int64)
+            month_codes = codes[rows]
+            sums = np.bincount(month_codes, weights=amounts[rows])
+            used = np.nonzero(np.bincount(month_codes))[0]
+            result[month] = dict(zip([values[code] for code in used.tolist()], sums[used].tolist()))
+        return result
+
+    def _find(self, record_id):
+        # ids are sorted, so use binary search on the id column
+        row = bisect_left(self._ids, record_id)
+        if row < len(self._ids) and self._ids[row] == record_id and self._alive[row]:
+            return row
+        return None
+
+
+    def _row_dict(self, row):
+        record = {}
+        for field in self.fields:
+            if field == self.id_key:
+                record[field] = self._ids[row]
+            elif field == "amount":
+                record[field] = self._amounts[row]
+            elif field == "date":
+                record[field] = decode_date(self._dates[row])
+            elif field in self._encoded:
+                record[field] = self._tables[field].values[self._codes[field][row]]
+            else:
+                factory = self.sparse_fields[field]
+                value = self._sparse[field].get(row)
+                # hand out a copy so callers cannot change the stored value
+                record[field] = factory(value) if value else factory()
+        return record
+
+    def _count(self, row, step):
+        # add (step) to the live count and (step * amount) to the running
+        # total of every index key of this row
+        amount = self._amounts[row] * step
+        for field in self.group_fields:
+            key = self._tables[field].values[self._codes[field][row]]
+            self._bump(field, key, step, amount)
+            index = self._group_rows.get(field)
+            if index is not None:
+                _place(index, key, row, step)
+        for field in self.multi_fields:
+            self._count_multi(field, row, step, amount)
+        month = month_of_day(self._dates[row])
+        self._bump("month", month, step, amount)
+        _place(self._month_rows, month, row, step)
+
+    def _count_multi(self, field, row, step, amount):
+        # same as _count for each key of a multi field (like tags)
+        index = self._multi_rows[field]
+        for key in dict.fromkeys(self._sparse[field].get(row) or ()):
+            self._bump(field, key, step, amount)
+            if step > 0:
+                index.setdefault(key, {})[row] = None
+            else:
+                bucket = index[key]
+                del bucket[row]
+                if not bucket:
+                    del index[key]
+
+    def _bump(self, field, key, step, amount):
+        counts = self._counts[field]
+        totals = self._totals[field]
+        count = counts.get(key, 0) + step
+        if not count:
+            del counts[key]
+            del totals[key]
+            self._stale[field].discard(key)
+            return
+        counts[key] = count
+        if step > 0:
+            totals[key] = totals.get(key, 0.0) + amount
+        else:
+            # a row left the key: its total is summed again from the
+            # remaining rows on the next read, like in IndexedStore
+            self._stale[field].add(key)
+
+    def _bucket_amounts(self, field, key):
+        # amounts of the live rows of one index key
+        if field == "month":
+            rows = self._month_rows[key]
+        elif field in self._multi_rows:
+            rows = self._multi_rows[field][key]
+        else:
+            rows = self._key_rows(field)[key]
+        amounts = self._amounts
+        return [amounts[row] for row in rows]
+
+    def _kill(self, row):
+        # mark one row as deleted and drop it from the indexes
+        self._count(row, -1)
+        self._alive[row] = 0
+        self._dead += 1
+        for values in self._sparse.values():
+            values.pop(row, None)
+
+    def _maybe_compact(self):
+        if self._dead >= _COMPACT_MIN_DEAD and self._dead * 2 > len(self._ids):
+            self._compact()
+
+    def _encode_column(self, field, values, np):
+        # dictionary-encode a whole column: distinct values are looked up
+        # in the table once, then mapped to every row with NumPy
+        distinct, local = _local_codes(values, np)
+        table = self._tables[field]
+        codes = np.array([table.encode(value) for value in distinct], dtype=np.uint32)
+        return array("I", codes[local].tobytes())
+
+    def _month_in_id_order(self, month):
+        # month rows are kept sorted, and rows are in id order
+        return self.records_for("month", month)
+
+    def _rows_for(self, field, key):
+        if field == "month":
+            return list(self._month_rows.get(key, ()))
+        if field in self._multi_rows:
+            return sorted(self._multi_rows[field].get(key, ()))
+        return list(self._key_rows(field).get(key, ()))
+
+    def _key_rows(self, field):
+        # {key -> sorted rows} of a group field; the first call sorts the
+        # live rows by code once, later changes keep it up to date
+        index = self._group_rows.get(field)
+        if index is None:
+            import numpy as np
+
+            if field not in self.group_fields:
+                raise KeyError(field)
+            values = self._tables[field].values
+            live = np.flatnonzero(np.frombuffer(self._alive, dtype=np.uint8))
+            codes = np.frombuffer(self._codes[field], dtype=np.uint32)[live]
+            order = live[np.argsort(codes, kind="stable")].astype(np.int64)
+            numbers = np.bincount(codes, minlength=len(values))
+            index = {}
+            position = 0
+            for code in np.flatnonzero(numbers).tolist():
+                number = int(numbers[code])
+                index[values[code]] = array("q", order[position:position + number].tobytes())
+                position += number
+            self._group_rows[field] = index
+        return index
+
+    def _compact(self):
+        # rebuild the columns without the dead rows
+        keep = [row for row in range(len(self._ids)) if self._alive[row]]
+        new_row = {old: new for new, old in enumerate(keep)}
+
+        self._ids = array("q", (self._ids[row] for row in keep))
+        self._amounts = array("d", (self._amounts[row] for row in keep))
+        self._dates = array("i", (self._dates[row] for row in keep))
+        for field in self._encoded:
+            old_codes = self._codes[field]
+            self._codes[field] = array("I", (old_codes[row] for row in keep))
+        self._alive = bytearray(b"\x01" * len(keep))
+        self._dead = 0
+
+        for month, rows in self._month_rows.items():
+            self._month_rows[month] = array("q", (new_row[row] for row in rows))
+        for index in self._group_rows.values():
+            for key, rows in index.items():
+                index[key] = array("q", (new_row[row] for row in rows))
+        for field, values in self._sparse.items():
+            self._sparse[field] = {new_row[row]: value for row, value in values.items()}
+        for index in self._multi_rows.values():
+            for key, rows in index.items():
+                index[key] = {new_row[row]: None for row in rows}
+
+
+def _place(index, key, row, step):
+    # add a row to (step > 0) or remove it from the sorted rows of a key
+    if step > 0:
+        insort(index.setdefault(key, array("q")), row)
+    else:
+        rows = index[key]
+        rows.pop(bisect_left(rows, row))
+        if not rows:
+            del index[key]
+
+
+def _local_codes(values, np):
+    # number the distinct values of a column in order of first appearance;
+    # returns (distinct values, array of one local code per row).
+    # dict.fromkeys and map keep the per-row work in C.
+    distinct = list(dict.fromkeys(values))
+    code_of = {value: code for code, value in enumerate(distinct)}
+    local = np.fromiter(map(code_of.__getitem__, values), dtype=np.intp, count=len(values))
+    return distinct, local
@@ -0,0 +1,144 @@
+# budgetmaster/storage/dates.py
+
+"""
+Date parsing shared by the stores and the aggregation code.
+
+Dates are parsed and checked once, when a record is stored, into small
+integer keys: the day number (days since 1970-01-01) and the month key
+(year * 100 + month, for example 202503). The stores group records on
+those keys instead of slicing date strings on every query.
+
+Parsing is cached per date string, and month names ('YYYY-MM') come
+from one month table, so the same month is always the same string
+object instead of a new slice for every row.
+"""
+
+from datetime import date as _date
+
+_EPOCH = _date(1970, 1, 1).toordinal()
+
+# the caches are dropped when they grow past this many entries, so a
+# ledger spanning centuries cannot make them grow without bound
+_CACHE_LIMIT = 1 << 16
+
+# date string -> day number
+_days = {}
+# day number -> date string
+_names = {}
+# day number -> month key
+_month_keys = {}
+# month key -> 'YYYY-MM' (the month table)
+_months = {}
+# date string -> 'YYYY-MM', the lookup done for every stored record
+_date_months = {}
+
+
+def parse_date(value):
+    """
+    Convert a date to its day number (days since 1970-01-01).
+
+    Parameters
+    ----------
+    value : str
+        A date string in the exact 'YYYY-MM-DD' form.
+
+    Returns
+    -------
+    int
+
+    Raises
+    ------
+    ValueError
+        If the value is not a valid 'YYYY-MM-DD' date.
+    """
+    day = encode_date(value)
+    if day is None:
+        raise ValueError("Invalid date {!r}, expected 'YYYY-MM-DD'.".format(value))
+    return day
+
+
+def encode_date(value):
+    """
+    Same as parse_date, but returns None instead of raising when the
+    value is not exactly an ISO date string.
+    """
+    if not isinstance(value, str):
+        return None
+    day = _days.get(value)
+    if day is not None:
+        return day
+    if len(value) != 10:
+        return None
+    try:
+        parsed = _date.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.isoformat() != value:
+        return None
+    day = parsed.toordinal() - _EPOCH
+    if len(_days) >= _CACHE_LIMIT:
+        _days.clear()
+    _days[value] = day
+    return day
+
+
+def decode_date(day):
+    """
+    Convert a day number back to its 'YYYY-MM-DD' string. Strings are
+    cached, so rows of the same day share one string.
+    """
+    name = _names.get(day)
+    if name is None:
+        if len(_names) >= _CACHE_LIMIT:
+            _names.clear()
+        name = _names[day] = _date.fromordinal(day + _EPOCH).isoformat()
+    return name
+
+
+def month_key(day):
+    """
+    Return the month key (year * 100 + month) of a day number.
+    """
+    key = _month_keys.get(day)
+    if key is None:
+        parsed = _date.fromordinal(day + _EPOCH)
+        key = parsed.year * 100 + parsed.month
+        if len(_month_keys) >= _CACHE_LIMIT:
+            _month_keys.clear()
+        _month_keys[day] = key
+    return key
+
+
+def month_name(key):
+    """
+    Return the 'YYYY-MM' name of a month key from the month table.
+    """
+    name = _months.get(key)
+    if name is None:
+        name = _months[key] = "{:04d}-{:02d}".format(key // 100, key % 100)
+    return name
+
+
+def month_of_day(day):
+    """
+    Return the 'YYYY-MM' name of the month of a day number.
+    """
+    return month_name(month_key(day))
+
+
+def month_of(value):
+    """
+    Return the 'YYYY-MM' month of a date (see parse_date).
+
+    Raises
+    ------
+    ValueError
+        If the value is not a valid date.
+    """
+    month = _date_months.get(value) if isinstance(value, str) else None
+    if month is None:
+        month = month_of_day(parse_date(value))
+        if len(_date_months) >= _CACHE_LIMIT:
+            _date_months.clear()
+        _date_months[value] = month
+    return month
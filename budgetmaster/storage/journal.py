@@ -0,0 +1,321 @@
+# budgetmaster/storage/journal.py
+
+"""
+Durable storage for the record stores: an append-only log plus snapshots.
+
+A JournaledStore wraps an in-memory store (IndexedStore or ColumnarStore)
+and writes every change -- add, add_columns, update, delete, delete_many,
+clear -- as one JSON line to a log file in its directory. From time to
+time the whole store is written as a compacted snapshot and the log is
+started over, so restarting the program only reads the latest snapshot
+and the short log tail instead of replaying a full import.
+
+Every log entry has a sequence number and the snapshot remembers the
+last one it contains. A crash between writing a snapshot and emptying
+the log is therefore harmless: entries already in the snapshot are
+skipped on load. A half-written last line (a crash in the middle of a
+write) is dropped.
+
+The store's id counter is kept too: the snapshot records next_id(), and
+replaying an add moves the counter past the added ids. So an id whose
+record was deleted is not handed out again after a restart.
+
+fsync policies:
+
+- 'always' : fsync after every change; a call that returned survives
+  a power loss. Slowest (one disk flush per change).
+- 'batch'  : fsync every `fsync_every` changes and on sync()/close();
+  a crash can lose the last few changes.
+- 'never'  : only flush to the operating system, which writes the data
+  when it likes; survives a program crash but not a power loss.
+
+Snapshots are always fsynced and replaced atomically.
+"""
+
+import json
+import os
+
+SNAPSHOT_FILE = "snapshot.json"
+LOG_FILE = "log.jsonl"
+
+FSYNC_POLICIES = ("always", "batch", "never")
+
+
+class JournaledStore:
+    """
+    Wrapper that makes a store durable. Reads go straight to the
+    wrapped store; changes are applied to it and then appended to the log.
+
+    Parameters
+    ----------
+    inner : IndexedStore
+        The store to wrap. If `directory` holds no journal yet, the
+        records already in it are kept and written as the first
+        snapshot; otherwise it must be empty and is filled from disk.
+    directory : str
+        Folder for the snapshot and log files (created if needed).
+    fsync : str
+        'always' (default), 'batch' or 'never', see the module docstring.
+    fsync_every : int
+        Number of changes between fsyncs with the 'batch' policy.
+    snapshot_every : int or None
+        Write a snapshot after this many log entries. None turns
+        automatic snapshots off (snapshot() can still be called).
+
+    Raises
+    ------
+    ValueError
+        If the fsync policy is unknown, a log line in the middle of the
+        file is damaged, or both `inner` and the journal hold records.
+    """
+
+    def __init__(self, inner, directory, fsync="always", fsync_every=100, snapshot_every=10000):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError("Unknown fsync policy: {}".format(fsync))
+        self.inner = inner
+        self.directory = directory
+        self.fsync = fsync
+        self.fsync_every = fsync_every
+        self.snapshot_every = snapshot_every
+
+        os.makedirs(directory, exist_ok=True)
+        self._snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self._log_path = os.path.join(directory, LOG_FILE)
+        self._seq = 0
+        self._logged = 0
+        self._unsynced = 0
+        found = self._load()
+        self._log = open(self._log_path, "ab")
+        if not found and len(inner):
+            # a new journal starts from the records already in the store
+            self.snapshot()
+
+    def __len__(self):
+        return len(self.inner)
+
+    def __iter__(self):
+        return iter(self.inner)
+
+    def __contains__(self, record_id):
+        return record_id in self.inner
+
+    def __getattr__(self, name):
+        # everything that does not change the store is read from it directly
+        return getattr(self.inner, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, record):
+        """
+        Store a record (see IndexedStore.add) and log it.
+        """
+        record = self.inner.add(record)
+        self._write({"op": "add", "record": dict(record)})
+        return record
+
+    def add_columns(self, columns):
+        """
+        Store a batch given as columns (see IndexedStore.add_columns) and
+        log it as one entry.
+        """
+        count = self.inner.add_columns(columns)
+        self._write({"op": "add_columns", "columns": {f: list(v) for f, v in columns.items()}})
+        return count
+
+    def update(self, record_id, **changes):
+        """
+        Change some fields of a record (see IndexedStore.update) and log it.
+        """
+        record = self.inner.update(record_id, **changes)
+        self._write({"op": "update", "id": record_id, "changes": changes})
+        return record
+
+    def delete(self, record_id):
+        """
+        Remove a record by id (see IndexedStore.delete) and log it.
+        """
+        record = self.inner.delete(record_id)
+        if record is not None:
+            self._write({"op": "delete", "id": record_id})
+        return record
+
+    def delete_many(self, record_ids):
+        """
+        Remove many records by id (see IndexedStore.delete_many) and log it.
+        """
+        record_ids = list(record_ids)
+        removed = self.inner.delete_many(record_ids)
+        if removed:
+            self._write({"op": "delete_many", "ids": record_ids})
+        return removed
+
+    def reserve_ids(self, next_id):
+        """
+        Skip the id counter ahead (see IndexedStore.reserve_ids) and log it.
+        """
+        self.inner.reserve_ids(next_id)
+        self._write({"op": "reserve_ids", "next_id": next_id})
+
+    def clear(self):
+        """
+        Remove every record and log it.
+        """
+        self.inner.clear()
+        self._write({"op": "clear"})
+
+    def snapshot(self):
+        """
+        Write the whole store as a new snapshot and start an empty log.
+
+        The snapshot is written to a temporary file, fsynced and then
+        renamed over the old one, so there is always one complete
+        snapshot on disk.
+        """
+        self._log.flush()
+        store = self.inner
+        defaults = dict(store.group_fields)
+        for field, factory in store.sparse_fields.items():
+            defaults[field] = factory()
+        columns = {field: [] for field in store.fields}
+        for rec in store:
+            for field, values in columns.items():
+                value = rec.get(field, defaults.get(field))
+                # tuples (like tags) are written as JSON lists anyway
+                values.append(list(value) if isinstance(value, tuple) else value)
+
+        temp_path = self._snapshot_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"seq": self._seq, "next_id": store.next_id(), "columns": columns}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self._snapshot_path)
+        _fsync_directory(self.directory)
+
+        # everything up to self._seq is in the snapshot now
+        self._log.close()
+        self._log = open(self._log_path, "wb")
+        self._logged = 0
+        self._unsynced = 0
+
+    def sync(self):
+        """
+        Flush the log and fsync it now, whatever the policy.
+        """
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._unsynced = 0
+
+    def close(self):
+        """
+        Sync and close the log file. The wrapped store stays usable in
+        memory, but further changes through this object fail.
+        """
+        if not self._log.closed:
+            self._log.flush()
+            if self.fsync != "never":
+                os.fsync(self._log.fileno())
+            self._log.close()
+
+    def _write(self, entry):
+        self._seq += 1
+        entry["seq"] = self._seq
+        self._log.write(json.dumps(entry).encode("utf-8") + b"\n")
+        self._log.flush()
+        self._unsynced += 1
+        if self.fsync == "always" or (self.fsync == "batch" and self._unsynced >= self.fsync_every):
+            os.fsync(self._log.fileno())
+            self._unsynced = 0
+
+        self._logged += 1
+        if self.snapshot_every is not None and self._logged >= self.snapshot_every:
+            self.snapshot()
+
+    def _load(self):
+        # latest snapshot first, then the log entries written after it;
+        # returns False if there is no journal in the directory yet
+        store = self.inner
+        found = os.path.exists(self._snapshot_path) or (
+            os.path.exists(self._log_path) and os.path.getsize(self._log_path) > 0
+        )
+        if not found:
+            return False
+        if len(store):
+            # records in memory and on disk: neither can replace the other
+            raise ValueError("Cannot open the journal in {} over a store with {} records.".format(
+                self.directory, len(store)))
+        if os.path.exists(self._snapshot_path):
+            with open(self._snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self._seq = snapshot["seq"]
+            if snapshot["columns"][store.id_key]:
+                store.add_columns(snapshot["columns"])
+            store.reserve_ids(snapshot.get("next_id", 1))
+
+        if not os.path.exists(self._log_path):
+            return True
+        with open(self._log_path, "rb") as f:
+            lines = f.readlines()
+        good_bytes = 0
+        for number, line in enumerate(lines, start=1):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                if number == len(lines):
+                    # half-written last line: drop it so new entries
+                    # are not appended after the damaged bytes
+                    with open(self._log_path, "r+b") as f:
+                        f.truncate(good_bytes)
+                    break
+                raise ValueError("Damaged line {} in {}".format(number, self._log_path))
+            good_bytes += len(line)
+            self._logged += 1
+            if entry["seq"] <= self._seq:
+                continue
+            self._apply(entry)
+            self._seq = entry["seq"]
+        return True
+
+    def _apply(self, entry):
+        # replay one log entry on the wrapped store
+        store = self.inner
+        op = entry["op"]
+        # replayed adds also move the id counter, so ids of records
+        # deleted later in the log are not handed out again
+        if op == "add":
+            store.add(entry["record"])
+            store.reserve_ids(entry["record"][store.id_key] + 1)
+        elif op == "add_columns":
+            store.add_columns(entry["columns"])
+            if entry["columns"][store.id_key]:
+                store.reserve_ids(max(entry["columns"][store.id_key]) + 1)
+        elif op == "reserve_ids":
+            store.reserve_ids(entry["next_id"])
+        elif op == "update":
+            store.update(entry["id"], **entry["changes"])
+        elif op == "delete":
+            store.delete(entry["id"])
+        elif op == "delete_many":
+            store.delete_many(entry["ids"])
+        elif op == "clear":
+            store.clear()
+        else:
+            raise ValueError("Unknown log operation: {}".format(op))
+
+
+def _fsync_directory(directory):
+    # make the rename of the snapshot durable; not every platform lets
+    # a directory be opened, in which case this is skipped
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,34 @@
+# budgetmaster/storage/locking.py
+
+"""
+Locking for stores shared between threads.
+
+The stores themselves take no locks. Instead every income and expense
+book (see income.entry.IncomeBook and expense.entry.ExpenseBook) has
+its own re-entrant lock, and every book method holds it. So the id
+allocation and the insert happen as one step, a journal line is never
+interleaved with another one, and a reader never sees an index half
+updated. Each ledger side has its own lock, so threads working on
+different households (or on the incomes and the expenses of one
+household) never wait for each other.
+
+Views (view_incomes, view_expenses) are not locked while they are
+iterated. A thread that reads a view while others write should hold the
+book's lock for the whole read. It can also take a copy instead
+(get_all_incomes, get_all_expenses), or use the Ledger methods, which
+hold the locks they need.
+"""
+
+from functools import wraps
+
+
+def locked(method):
+    """
+    Decorator for methods of an object with a `lock` attribute: the
+    method runs while holding that lock.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
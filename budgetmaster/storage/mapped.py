@@ -0,0 +1,412 @@
+# budgetmaster/storage/mapped.py
+
+"""
+Binary ledger files that are memory-mapped instead of parsed.
+
+A ledger file holds the columns of a ColumnarStore as fixed-width
+binary blocks: int64 ids, float64 amounts, int32 day numbers for the
+dates and uint32 dictionary codes for the encoded fields (category,
+source, description). A small JSON block at the end holds what is not
+fixed-width -- the string tables, the per-key counts and totals of the
+indexes, the rows of each month, and the few rows with tags.
+
+Opening a file with MappedStore does not read the rows: the columns
+are memoryviews on an mmap of the file, so only the pages a query
+touches are read from disk. Totals (per source, category or month)
+come from the JSON block, and month_totals in analysis.aggregate sums
+the mapped amount and date columns directly.
+
+File layout (all integers little-endian on the machines we run on;
+the byte order is recorded and checked on open)::
+
+    header   : magic b'BMLEDGR1', row count, offset and length of the
+               JSON block (struct '<8sQQQ')
+    columns  : one block per column, each starting at a multiple of 8
+    metadata : JSON
+
+The store is read-only while it is mapped. The first change (add,
+update, delete, ...) copies the columns into memory, and from then on
+it behaves like a plain ColumnarStore.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from .columnar import ColumnarStore, StringTable
+from .dates import parse_date
+
+MAGIC = b"BMLEDGR1"
+
+_HEADER = struct.Struct("<8sQQQ")
+
+
+class MappedStore(ColumnarStore):
+    """
+    ColumnarStore whose columns are read from a memory-mapped ledger
+    file (see the module docstring).
+
+    Parameters
+    ----------
+    record_type : class, optional
+        Only kept for interface compatibility; rows are handed out as
+        new dicts.
+    path : str, optional
+        Ledger file written by MappedStore.write. Without a path the
+        store starts empty, like a ColumnarStore.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a ledger file, was written on a machine with
+        another byte order, or was written for another kind of store.
+    """
+
+    def __init__(self, record_type=None, path=None):
+        ColumnarStore.__init__(self, record_type)
+        self.path = path
+        self._mmap = None
+        self._views = []
+        if path is not None:
+            self._open(path)
+
+    @classmethod
+    def write(cls, records, path):
+        """
+        Write records to a ledger file that this class can map.
+
+        The file is written to a temporary name and renamed over `path`,
+        so a crash never leaves a half-written ledger behind.
+
+        Parameters
+        ----------
+        records : iterable of dict or store
+            The records to write, for example a whole store. They are
+            written in id order.
+        path : str
+            Name of the ledger file.
+
+        Returns
+        -------
+        int
+            Number of records written.
+
+        Raises
+        ------
+        ValueError
+            If a record date is not a valid 'YYYY-MM-DD' date.
+        """
+        # numpy is only needed for writing, so it is imported here like
+        # in ColumnarStore.add_columns
+        import numpy as np
+
+        encoded = dict(cls.group_fields)
+        encoded.update(cls.encoded_fields)
+        if isinstance(records, ColumnarStore) and records._encoded.keys() == encoded.keys():
+            columns = _store_columns(records, np)
+        else:
+            columns = _record_columns(cls, records, encoded)
+        ids, amounts, days, codes, tables, sparse = columns
+        count = len(ids)
+        weights = np.frombuffer(amounts, dtype=np.float64)
+
+        # index counts and totals; bincount adds the amounts in row order,
+        # like the running totals of ColumnarStore
+        index = {}
+        for field in cls.group_fields:
+            values = tables[field]
+            keys = np.frombuffer(codes[field], dtype=np.uint32)
+            counts = np.bincount(keys, minlength=len(values)).tolist()
+            totals = np.bincount(keys, weights=weights, minlength=len(values)).tolist()
+            index[field] = [[values[code], counts[code], totals[code]]
+                            for code in range(len(values)) if counts[code]]
+        for field in cls.multi_fields:
+            counts = {}
+            totals = {}
+            for row, value in sparse[field]:
+                for key in dict.fromkeys(value):
+                    counts[key] = counts.get(key, 0) + 1
+                    totals[key] = totals.get(key, 0.0) + amounts[row]
+            index[field] = [[key, counts[key], totals[key]] for key in counts]
+
+        # every row gets the position of its month among the sorted
+        # months; a stable sort on that gives the rows of each month in
+        # row order, stored as one column
+        month_numbers = np.frombuffer(days, dtype=np.int32).astype("datetime64[D]").astype("datetime64[M]")
+        distinct, month_code = np.unique(month_numbers, return_inverse=True)
+        names = np.datetime_as_string(distinct).tolist()
+        order = array("q", np.argsort(month_code, kind="stable").astype(np.int64).tobytes())
+        numbers = np.bincount(month_code, minlength=len(names)).tolist()
+        sums = np.bincount(month_code, weights=weights, minlength=len(names)).tolist()
+        months = []
+        start = 0
+        for code, month in enumerate(names):
+            months.append([month, start, numbers[code], sums[code]])
+            start += numbers[code]
+
+        blocks = [
+            ("id", ids),
+            ("amount", amounts),
+            ("date", days),
+            ("month_rows", order),
+        ]
+        blocks.extend(("code:" + field, values) for field, values in codes.items())
+
+        offset = _HEADER.size
+        columns = {}
+        for name, values in blocks:
+            offset = _align(offset)
+            columns[name] = offset
+            offset += len(values) * values.itemsize
+        meta = json.dumps({
+            "byteorder": sys.byteorder,
+            "id_key": cls.id_key,
+            "fields": list(cls.fields),
+            "columns": columns,
+            "tables": tables,
+            "index": index,
+            "months": months,
+            "sparse": sparse,
+        }).encode("utf-8")
+        meta_offset = _align(offset)
+
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, count, meta_offset, len(meta)))
+            for name, values in blocks:
+                f.write(bytes(columns[name] - f.tell()))
+                values.tofile(f)
+            f.write(bytes(meta_offset - f.tell()))
+            f.write(meta)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        return count
+
+    def add(self, record):
+        """
+        Append a record (see ColumnarStore.add). The mapped columns are
+        copied into memory first.
+        """
+        self._detach()
+        return ColumnarStore.add(self, record)
+
+    def add_columns(self, columns):
+        """
+        Append many records given as columns (see
+        ColumnarStore.add_columns), after copying the mapped columns
+        into memory.
+        """
+        self._detach()
+        return ColumnarStore.add_columns(self, columns)
+
+    def update(self, record_id, **changes):
+        """
+        Change some fields of a record (see ColumnarStore.update), after
+        copying the mapped columns into memory.
+        """
+        self._detach()
+        return ColumnarStore.update(self, record_id, **changes)
+
+    def delete(self, record_id):
+        """
+        Remove a record by id (see ColumnarStore.delete), after copying
+        the mapped columns into memory.
+        """
+        self._detach()
+        return ColumnarStore.delete(self, record_id)
+
+    def delete_many(self, record_ids):
+        """
+        Remove many records by id (see ColumnarStore.delete_many), after
+        copying the mapped columns into memory.
+        """
+        self._detach()
+        return ColumnarStore.delete_many(self, record_ids)
+
+    def clear(self):
+        """
+        Remove every record. The file is unmapped (and left unchanged).
+        """
+        self.close()
+        ColumnarStore.clear(self)
+
+    def is_mapped(self):
+        """
+        Return True while the columns are still read from the file.
+        """
+        return self._mmap is not None
+
+    def close(self):
+        """
+        Unmap the file. Use this when the store is not needed anymore;
+        a store that is still mapped cannot be used after closing.
+        """
+        if self._mmap is None:
+            return
+        # views must be released before the map can be closed; a view
+        # still held elsewhere (for example by a NumPy array) keeps the
+        # map open until it is garbage collected
+        try:
+            for view in reversed(self._views):
+                view.release()
+            self._mmap.close()
+        except BufferError:
+            pass
+        self._views = []
+        self._mmap = None
+
+    def _open(self, path):
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mapped) < _HEADER.size:
+            mapped.close()
+            raise ValueError("Not a ledger file: {}".format(path))
+        magic, count, meta_offset, meta_length = _HEADER.unpack_from(mapped)
+        if magic != MAGIC:
+            mapped.close()
+            raise ValueError("Not a ledger file: {}".format(path))
+        meta = json.loads(mapped[meta_offset:meta_offset + meta_length].decode("utf-8"))
+        if meta["byteorder"] != sys.byteorder:
+            mapped.close()
+            raise ValueError("Ledger file {} was written with another byte order.".format(path))
+        if meta["id_key"] != self.id_key or meta["fields"] != list(self.fields):
+            mapped.close()
+            raise ValueError("Ledger file {} holds other records ({}).".format(path, meta["id_key"]))
+
+        self._mmap = mapped
+        base = memoryview(mapped)
+        self._views.append(base)
+        columns = meta["columns"]
+
+        def column(name, typecode):
+            start = columns[name]
+            view = base[start:start + count * _itemsize[typecode]].cast(typecode)
+            self._views.append(view)
+            return view
+
+        self._ids = column("id", "q")
+        self._amounts = column("amount", "d")
+        self._dates = column("date", "i")
+        for field in self._encoded:
+            self._codes[field] = column("code:" + field, "I")
+            table = self._tables[field]
+            table.values = meta["tables"][field]
+            table.codes = {value: code for code, value in enumerate(table.values)}
+        self._alive = bytearray(b"\x01") * count
+
+        for field in self.sparse_fields:
+            self._sparse[field] = {row: value for row, value in meta["sparse"][field]}
+        for field, entries in meta["index"].items():
+            self._counts[field] = {key: number for key, number, _ in entries}
+            self._totals[field] = {key: total for key, _, total in entries}
+        for field in self.multi_fields:
+            index = self._multi_rows[field]
+            for row, value in self._sparse[field].items():
+                for key in dict.fromkeys(value):
+                    index.setdefault(key, {})[row] = None
+
+        month_rows = column("month_rows", "q")
+        self._counts["month"] = {}
+        self._totals["month"] = {}
+        for month, start, number, total in meta["months"]:
+            rows = month_rows[start:start + number]
+            self._views.append(rows)
+            self._month_rows[month] = rows
+            self._counts["month"][month] = number
+            self._totals["month"][month] = total
+
+    def _detach(self):
+        # copy the mapped columns into arrays so they can be changed
+        if self._mmap is None:
+            return
+        self._ids = _copy("q", self._ids)
+        self._amounts = _copy("d", self._amounts)
+        self._dates = _copy("i", self._dates)
+        for field in self._encoded:
+            self._codes[field] = _copy("I", self._codes[field])
+        for month, rows in self._month_rows.items():
+            self._month_rows[month] = _copy("q", rows)
+        self.close()
+
+
+_itemsize = {"q": 8, "d": 8, "i": 4, "I": 4}
+
+
+def _align(offset):
+    # next multiple of 8, so every column can be cast in place
+    return (offset + 7) & ~7
+
+
+def _copy(typecode, view):
+    # frombytes wants a plain byte view, not the typed one
+    values = array(typecode)
+    values.frombytes(view.cast("B"))
+    return values
+
+
+
+def _record_columns(cls, records, encoded):
+    # columns of any records (dicts or mapping-like objects), in id order
+    rows = list(records)
+    id_key = cls.id_key
+    ids = [rec[id_key] for rec in rows]
+    if any(a >= b for a, b in zip(ids, ids[1:])):
+        rows.sort(key=lambda rec: rec[id_key])
+        ids = [rec[id_key] for rec in rows]
+
+    # each column is converted with one map() or array() call, so the
+    # per-row work stays in C
+    amounts = array("d", [float(rec.get("amount", 0.0)) for rec in rows])
+    days = array("i", [parse_date(rec.get("date")) for rec in rows])
+
+    tables = {}
+    codes = {}
+    for field, default in encoded.items():
+        table = StringTable()
+        codes[field] = array("I", map(table.encode, [rec.get(field, default) for rec in rows]))
+        tables[field] = table.values
+
+    sparse = {}
+    for field in cls.sparse_fields:
+        sparse[field] = [[row, _plain(value)]
+                         for row, value in enumerate(rec.get(field) for rec in rows) if value]
+    return array("q", ids), amounts, days, codes, tables, sparse
+
+
+def _store_columns(store, np):
+    # columns of a ColumnarStore (mapped or not), taken from its arrays
+    # without building rows; dead rows are dropped and the side tables
+    # renumbered
+    live = np.frombuffer(store._alive, dtype=np.uint8).astype(bool)
+    if live.all():
+        def take(typecode, values):
+            return _copy(typecode, memoryview(values))
+
+        def renumber(values):
+            return sorted(values.items())
+    else:
+        keep = np.flatnonzero(live)
+        new_row = {old: new for new, old in enumerate(keep.tolist())}
+
+        def take(typecode, values):
+            column = np.frombuffer(values, dtype=np.dtype(typecode))[keep]
+            return array(typecode, column.tobytes())
+
+        def renumber(values):
+            return sorted((new_row[row], value) for row, value in values.items() if row in new_row)
+
+    codes = {field: take("I", store._codes[field]) for field in store._encoded}
+    tables = {field: list(store._tables[field].values) for field in store._encoded}
+    sparse = {field: [[row, _plain(value)] for row, value in renumber(store._sparse[field])]
+              for field in store.sparse_fields}
+    return (take("q", store._ids), take("d", store._amounts), take("i", store._dates),
+            codes, tables, sparse)
+
+
+def _plain(value):
+    # tuples (like tags) are written as JSON lists anyway
+    return list(value) if isinstance(value, tuple) else value
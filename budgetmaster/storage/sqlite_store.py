@@ -0,0 +1,464 @@
+# budgetmaster/storage/sqlite_store.py
+
+"""
+SQLite-backed record store (stdlib sqlite3).
+
+Each store is one table with a column per field plus a 'month' column
+('YYYY-MM', filled in on insert from the checked date, see
+storage.dates). The date, month and group fields (for
+example category or source) are indexed together with the amount, so
+summaries like "total per category" or "total of one month" are
+answered by SQL aggregates (SUM ... GROUP BY) from the index alone,
+without turning rows into Python dictionaries. Sparse fields (tags) go
+into a side table with one row per value.
+
+Writes run in transactions; add_columns inserts a whole batch with one
+prepared statement (executemany) in a single transaction. When the
+batch is at least as large as the table, the indexes are dropped and
+built again after the insert, which is about twice as fast as updating
+them row by row.
+
+The store keeps the same methods as IndexedStore, so the entry modules
+can switch to it with set_storage_backend('sqlite'). sqlite3 is only
+imported when a store is created.
+"""
+
+from .base_store import IndexedStore, _check_columns
+from .dates import month_of
+
+# ids per statement when deleting or looking up many ids at once
+# (SQLite limits the number of parameters of one statement)
+_CHUNK = 500
+
+
+class SQLiteStore(IndexedStore):
+    """
+    Store with the IndexedStore interface, kept in a SQLite database.
+
+    Subclasses set `table` in addition to the IndexedStore class
+    attributes. Records are handed out as new dictionaries, ordered by
+    id, so change them through update().
+
+    Parameters
+    ----------
+    record_type : class, optional
+        Only kept for interface compatibility; rows are always returned
+        as dicts.
+    path : str
+        Database file. The default ':memory:' keeps the database in
+        memory; with a file, records already in it are kept.
+
+    Attributes
+    ----------
+    table : str
+        Name of the table, for example 'expenses'.
+    """
+
+    table = "records"
+
+    def __init__(self, record_type=None, path=":memory:"):
+        import sqlite3
+
+        self.record_type = record_type
+        self.path = path
+        self.version = 0
+        # the connection may be used from several threads, one at a time
+        # (the income and expense books serialize access, see
+        # storage.locking)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+
+        self._columns = [f for f in self.fields if f not in self.sparse_fields]
+        self._select = "SELECT {} FROM {}".format(", ".join(self._columns), self.table)
+        self._insert = "INSERT INTO {} ({}, month) VALUES ({})".format(
+            self.table, ", ".join(self._columns), ", ".join("?" * (len(self._columns) + 1))
+        )
+        self._create_tables()
+
+    def __len__(self):
+        return self._one("SELECT COUNT(*) FROM {}".format(self.table))
+
+    def __iter__(self):
+        rows = self._conn.execute("{} ORDER BY {}".format(self._select, self.id_key)).fetchall()
+        return iter(self._to_dicts(rows))
+
+    def __contains__(self, record_id):
+        sql = "SELECT 1 FROM {} WHERE {} = ?".format(self.table, self.id_key)
+        return self._conn.execute(sql, (record_id,)).fetchone() is not None
+
+    def add(self, record):
+        """
+        Insert a record and return a dictionary of it.
+
+        Raises
+        ------
+        ValueError
+            If the id is already stored or the date is not a valid
+            'YYYY-MM-DD' date.
+        """
+        record_id = record[self.id_key]
+        row = self._row_values(record)
+        try:
+            with self._conn:
+                self._conn.execute(self._insert, row)
+                for field in self.sparse_fields:
+                    self._insert_sparse(field, [(record_id, record.get(field))])
+        except self._conn.IntegrityError:
+            raise ValueError("Duplicate {} = {}".format(self.id_key, record_id))
+        self.version += 1
+        return self.get(record_id)
+
+    def add_columns(self, columns):
+        """
+        Insert many records at once, given as columns (see
+        IndexedStore.add_columns), with one prepared statement in a
+        single transaction.
+
+        Returns
+        -------
+        int
+            Number of records added.
+        """
+        ids = columns[self.id_key]
+        count = _check_columns(columns, len(ids))
+        values = []
+        for field in self._columns:
+            if field in columns:
+                values.append(columns[field])
+            elif field == "amount":
+                values.append([0.0] * count)
+            else:
+                values.append([self.group_fields.get(field)] * count)
+        dates = columns.get("date")
+        if dates is None:
+            dates = [None] * count
+        values.append([month_of(date) for date in dates])
+        rebuild = count >= len(self)
+
+        try:
+            with self._conn:
+                # an explicit BEGIN keeps the index changes in the same
+                # transaction, so a failed batch leaves them in place
+                self._conn.execute("BEGIN")
+                if rebuild:
+                    self._drop_indexes()
+                self._conn.executemany(self._insert, zip(*values))
+                if rebuild:
+                    self._create_indexes()
+                for field in self.sparse_fields:
+                    if field in columns:
+                        self._insert_sparse(field, zip(ids, columns[field]))
+        except self._conn.IntegrityError:
+            raise ValueError("Duplicate {} in batch.".format(self.id_key))
+        self.version += 1
+        return count
+
+    def get(self, record_id, default=None):
+        """
+        Return a dictionary for the record with the given id (or default).
+        """
+        sql = "{} WHERE {} = ?".format(self._select, self.id_key)
+        rows = self._conn.execute(sql, (record_id,)).fetchall()
+        if not rows:
+            return default
+        return self._to_dicts(rows)[0]
+
+    def max_id(self):
+        """
+        Return the largest stored id, or None if the store is empty.
+        """
+        return self._one("SELECT MAX({}) FROM {}".format(self.id_key, self.table))
+
+    def update(self, record_id, **changes):
+        """
+        Change some fields of a stored record and return a fresh
+        dictionary of it.
+
+        Raises
+        ------
+        KeyError
+            If the id is not in the store.
+        ValueError
+            If a field cannot be updated (the id or an unknown field) or
+            the new date is not a valid 'YYYY-MM-DD' date.
+        """
+        for field in changes:
+            if field == self.id_key or field not in self.fields:
+                raise ValueError("Field '{}' cannot be updated.".format(field))
+        if record_id not in self:
+            raise KeyError(record_id)
+
+        plain = [f for f in changes if f not in self.sparse_fields]
+        params = [changes[f] for f in plain]
+        if "date" in changes:
+            plain.append("month")
+            params.append(month_of(changes["date"]))
+        with self._conn:
+            if plain:
+                sql = "UPDATE {} SET {} WHERE {} = ?".format(
+                    self.table, ", ".join(f + " = ?" for f in plain), self.id_key
+                )
+                self._conn.execute(sql, params + [record_id])
+            for field in self.sparse_fields:
+                if field in changes:
+                    self._conn.execute(
+                        "DELETE FROM {} WHERE id = ?".format(self._side(field)), (record_id,)
+                    )
+                    self._insert_sparse(field, [(record_id, changes[field])])
+        self.version += 1
+        return self.get(record_id)
+
+    def delete(self, record_id):
+        """
+        Remove a record by id. Returns a dictionary of the removed record,
+        or None if the id was not found.
+        """
+        record = self.get(record_id)
+        if record is not None:
+            self.delete_many([record_id])
+        return record
+
+    def delete_many(self, record_ids):
+        """
+        Remove many records by id in one transaction. Missing ids are
+        skipped.
+
+        Returns
+        -------
+        int
+            Number of records removed.
+        """
+        record_ids = list(record_ids)
+        removed = 0
+        with self._conn:
+            for start in range(0, len(record_ids), _CHUNK):
+                chunk = record_ids[start:start + _CHUNK]
+                marks = ", ".join("?" * len(chunk))
+                cursor = self._conn.execute(
+                    "DELETE FROM {} WHERE {} IN ({})".format(self.table, self.id_key, marks), chunk
+                )
+                removed += cursor.rowcount
+                for field in self.sparse_fields:
+                    self._conn.execute(
+                        "DELETE FROM {} WHERE id IN ({})".format(self._side(field), marks), chunk
+                    )
+        if removed:
+            self.version += 1
+        return removed
+
+    def clear(self):
+        """
+        Remove every record and start the ids over at 1.
+        """
+        with self._conn:
+            self._conn.execute("DELETE FROM {}".format(self.table))
+            for field in self.sparse_fields:
+                self._conn.execute("DELETE FROM {}".format(self._side(field)))
+        self._next_id = None
+        self.version += 1
+
+    def records_for(self, field, key):
+        """
+        Return the records whose indexed `field` equals `key`, in id order.
+        """
+        return self.records_for_all([(field, key)])
+
+    def records_for_all(self, keys):
+        """
+        Return the records that are in every given index bucket (see
+        IndexedStore.records_for_all), in id order. SQLite intersects
+        the buckets using the indexes.
+        """
+        if not keys:
+            raise ValueError("Give at least one (field, key) pair.")
+        parts = []
+        params = []
+        for field, key in keys:
+            parts.append(self._ids_where(field))
+            params.append(key)
+        sql = "{} WHERE {} IN ({}) ORDER BY {}".format(
+            self._select, self.id_key, " INTERSECT ".join(parts), self.id_key
+        )
+        return self._to_dicts(self._conn.execute(sql, params).fetchall())
+
+    def keys_for(self, field):
+        """
+        Return the keys of an index that currently have records, in order
+        of first appearance.
+        """
+        if field in self.sparse_fields:
+            sql = "SELECT value FROM {} GROUP BY value ORDER BY MIN(id)".format(self._side(field))
+        else:
+            sql = "SELECT {0} FROM {1} WHERE {0} IS NOT NULL GROUP BY {0} ORDER BY MIN({2})".format(
+                field, self.table, self.id_key
+            )
+        return [row[0] for row in self._conn.execute(sql)]
+
+    def records_between(self, start, end):
+        """
+        Return the records whose date is between `start` and `end` (both
+        inclusive, see IndexedStore.records_between), ordered by month
+        and id. Only the index range of those months is read.
+        """
+        sql = (
+            "{} WHERE month BETWEEN ? AND ? "
+            "AND substr(date, 1, ?) >= ? AND substr(date, 1, ?) <= ? "
+            "ORDER BY month, {}"
+        ).format(self._select, self.id_key)
+        params = (start[:7], end[:7], len(start), start, len(end), end)
+        return self._to_dicts(self._conn.execute(sql, params).fetchall())
+
+    def totals_for(self, field):
+        """
+        Return the 'amount' total per key of an index, computed by SQLite
+        with SUM ... GROUP BY.
+        """
+        if field in self.sparse_fields:
+            sql = (
+                "SELECT s.value, SUM(r.amount) FROM {} AS s JOIN {} AS r ON r.{} = s.id "
+                "GROUP BY s.value ORDER BY MIN(s.id)"
+            ).format(self._side(field), self.table, self.id_key)
+        else:
+            sql = "SELECT {0}, SUM(amount) FROM {1} WHERE {0} IS NOT NULL GROUP BY {0} ORDER BY MIN({2})".format(
+                field, self.table, self.id_key
+            )
+        return dict(self._conn.execute(sql).fetchall())
+
+    def month_totals_for(self, field):
+        """
+        Return the 'amount' totals per month and key of a group field,
+        as {month: {key: total}}, computed by SQLite with one
+        SUM ... GROUP BY month, field.
+        """
+        if field not in self.group_fields:
+            raise ValueError("Field {!r} is not a group field.".format(field))
+        sql = "SELECT month, {0}, SUM(amount) FROM {1} GROUP BY month, {0} ORDER BY month, MIN({2})".format(
+            field, self.table, self.id_key
+        )
+        result = {}
+        for month, key, total in self._conn.execute(sql):
+            totals = result.get(month)
+            if totals is None:
+                totals = result[month] = {}
+            totals[key] = total
+        return result
+
+    def total_for(self, field, key):
+        """
+        Return the 'amount' total of one index key (0.0 if the key has
+        no records), computed by SQLite.
+        """
+        if field in self.sparse_fields:
+            where = "{} IN ({})".format(self.id_key, self._ids_where(field))
+        else:
+            where = "{} = ?".format(field)
+        sql = "SELECT COALESCE(SUM(amount), 0.0) FROM {} WHERE {}".format(self.table, where)
+        return self._one(sql, (key,))
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        self._conn.close()
+
+    def _create_tables(self):
+        columns = []
+        for field in self._columns:
+            if field == self.id_key:
+                columns.append("{} INTEGER PRIMARY KEY".format(field))
+            elif field == "amount":
+                columns.append("amount REAL NOT NULL DEFAULT 0.0")
+            else:
+                columns.append(field)
+        columns.append("month TEXT")
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS {} ({})".format(self.table, ", ".join(columns)))
+            for field in self.sparse_fields:
+                self._conn.execute("CREATE TABLE IF NOT EXISTS {} (id INTEGER, value)".format(self._side(field)))
+            self._create_indexes()
+
+    def _indexes(self):
+        # (index name, table, columns) of every index
+        indexes = []
+        # the amount is part of each index so SUM(amount) GROUP BY is
+        # answered from the index without reading the table
+        for field in ["date", "month"] + list(self.group_fields):
+            indexes.append(("{}_{}".format(self.table, field), self.table, field + ", amount"))
+        for field in self.sparse_fields:
+            side = self._side(field)
+            indexes.append((side + "_value", side, "value, id"))
+            indexes.append((side + "_id", side, "id"))
+        return indexes
+
+    def _create_indexes(self):
+        for name, table, columns in self._indexes():
+            self._conn.execute("CREATE INDEX IF NOT EXISTS {} ON {} ({})".format(name, table, columns))
+
+    def _drop_indexes(self):
+        for name, _, _ in self._indexes():
+            self._conn.execute("DROP INDEX IF EXISTS {}".format(name))
+
+    def _side(self, field):
+        # side table of a sparse field
+        return "{}_{}".format(self.table, field)
+
+    def _ids_where(self, field):
+        # SELECT of the ids whose `field` equals one parameter
+        if field in self.sparse_fields:
+            return "SELECT id FROM {} WHERE value = ?".format(self._side(field))
+        return "SELECT {} FROM {} WHERE {} = ?".format(self.id_key, self.table, field)
+
+    def _row_values(self, record):
+        values = []
+        for field in self._columns:
+            if field == "amount":
+                values.append(float(record.get("amount", 0.0)))
+            elif field in self.group_fields:
+                values.append(record.get(field, self.group_fields[field]))
+            else:
+                values.append(record.get(field))
+        values.append(month_of(record.get("date")))
+        return values
+
+    def _insert_sparse(self, field, pairs):
+        # one side-table row per (id, value); repeated values are stored once
+        rows = [(record_id, value) for record_id, values in pairs
+                if values is not None and len(values)
+                for value in dict.fromkeys(values)]
+        if rows:
+            self._conn.executemany("INSERT INTO {} (id, value) VALUES (?, ?)".format(self._side(field)), rows)
+
+    def _to_dicts(self, rows):
+        columns = self._columns
+        records = [dict(zip(columns, row)) for row in rows]
+        for field, factory in self.sparse_fields.items():
+            values = self._sparse_values(field, [rec[self.id_key] for rec in records])
+            for rec in records:
+                rec[field] = factory(values.get(rec[self.id_key], ()))
+        if self.sparse_fields:
+            # same key order as the other stores
+            records = [{field: rec[field] for field in self.fields} for rec in records]
+        return records
+
+    def _sparse_values(self, field, ids):
+        # id -> list of values of a sparse field, for the given ids
+        values = {}
+        side = self._side(field)
+        if len(ids) > _CHUNK:
+            # many rows (for example a full iteration): one pass over the
+            # whole side table is cheaper than many IN (...) lookups
+            wanted = set(ids)
+            for record_id, value in self._conn.execute("SELECT id, value FROM {} ORDER BY rowid".format(side)):
+                if record_id in wanted:
+                    values.setdefault(record_id, []).append(value)
+            return values
+        for start in range(0, len(ids), _CHUNK):
+            chunk = ids[start:start + _CHUNK]
+            sql = "SELECT id, value FROM {} WHERE id IN ({}) ORDER BY rowid".format(
+                side, ", ".join("?" * len(chunk))
+            )
+            for record_id, value in self._conn.execute(sql, chunk):
+                values.setdefault(record_id, []).append(value)
+        return values
+
+    def _one(self, sql, params=()):
+        return self._conn.execute(sql, params).fetchone()[0]
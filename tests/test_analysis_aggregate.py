@@ -0,0 +1,65 @@
+import unittest
+from budgetmaster.analysis import aggregate
+from budgetmaster.income.store import IncomeStore, ColumnarIncomeStore
+
+
+class TestAnalysisAggregate(unittest.TestCase):
+    """Tests for budgetmaster.analysis.aggregate."""
+
+    @classmethod
+    def setUpClass(cls):
+        print("setUpClass: TestAnalysisAggregate")
+
+    @classmethod
+    def tearDownClass(cls):
+        print("tearDownClass: TestAnalysisAggregate")
+
+    def setUp(self):
+        self.incomes = [
+            {"income_id": 1, "source": "salary", "amount": 3000.0, "date": "2025-02-01"},
+            {"income_id": 2, "source": "freelance", "amount": 500.0, "date": "2025-01-15"},
+            {"income_id": 3, "source": "salary", "amount": 3200.0, "date": "2025-02-20"},
+        ]
+
+    def tearDown(self):
+        self.incomes = []
+
+    def test_month_totals_from_dicts(self):
+        """months are sorted and summed, and bad dates are refused."""
+        totals = aggregate.month_totals(self.incomes)
+        self.assertEqual(list(totals.keys()), ["2025-01", "2025-02"])
+        self.assertEqual(totals["2025-02"], 6200.0)
+        self.assertEqual(aggregate.month_totals([]), {})
+        for date in (None, "2025-02", "2025-02-30", "2025-02-01T08:00"):
+            with self.assertRaises(ValueError):
+                aggregate.month_totals(self.incomes + [{"amount": 1.0, "date": date}])
+
+        months, inc, exp = aggregate.month_totals_pair(
+            self.incomes, [{"amount": 100.0, "date": "2025-03-02"}]
+        )
+        self.assertEqual(months, ["2025-01", "2025-02", "2025-03"])
+        self.assertEqual(inc.tolist(), [500.0, 6200.0, 0.0])
+        self.assertEqual(exp.tolist(), [0.0, 0.0, 100.0])
+
+    def test_columnar_store_matches_dict_path(self):
+        """the vectorized columnar path gives the same totals."""
+        store = ColumnarIncomeStore()
+        for rec in self.incomes:
+            store.add(rec)
+        store.add({"income_id": 5, "source": "x", "amount": 7.0, "date": "2025-03-01"})
+        store.add({"income_id": 6, "source": "x", "amount": 9.0, "date": "2024-12-31"})
+        store.delete(6)
+        with self.assertRaises(ValueError):
+            store.add({"income_id": 7, "source": "x", "amount": 1.0, "date": "2025/03/01"})
+        self.assertEqual(len(store), 4)
+
+        expected = aggregate.month_totals(list(store))
+        self.assertEqual(aggregate.month_totals(store), expected)
+        self.assertEqual(aggregate.month_totals(store.view()), expected)
+        self.assertEqual(expected["2025-03"], 7.0)
+        self.assertNotIn("2024-12", expected)
+
+        indexed = IncomeStore()
+        for rec in store:
+            indexed.add(rec)
+        self.assertEqual(aggregate.month_totals(indexed.view()), expected)
@@ -0,0 +1,144 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from budgetmaster.analysis import aggregate
+from budgetmaster.analysis.parallel import ParallelAggregator
+from budgetmaster.expense.store import ColumnarExpenseStore
+from budgetmaster.income.store import IncomeStore, MappedIncomeStore
+from budgetmaster.ledger import Ledger
+
+
+class TestAnalysisParallel(unittest.TestCase):
+    """Tests for budgetmaster.analysis.parallel."""
+
+    @classmethod
+    def setUpClass(cls):
+        print("setUpClass: TestAnalysisParallel")
+
+    @classmethod
+    def tearDownClass(cls):
+        print("tearDownClass: TestAnalysisParallel")
+
+    def setUp(self):
+        self.store = ColumnarExpenseStore()
+        self.store.add_columns({
+            "expense_id": list(range(1, 401)),
+            "category": [("food", "rent", "transportation")[i % 3] for i in range(400)],
+            "amount": [float(i % 50) + 0.5 for i in range(400)],
+            "date": ["{:04d}-{:02d}-{:02d}".format(2024 + i % 2, i % 12 + 1, i % 28 + 1) for i in range(400)],
+        })
+        # dead rows must be left out of every total
+        self.store.delete_many(range(1, 40, 3))
+
+    def tearDown(self):
+        self.store.clear()
+
+    def expected_matrix(self):
+        matrix = {}
+        for record in self.store:
+            cells = matrix.setdefault(record["date"][:7], {})
+            cells[record["category"]] = cells.get(record["category"], 0.0) + record["amount"]
+        return dict(sorted(matrix.items()))
+
+    def test_pool_matches_running_totals(self):
+        """the workers' sums agree with the store and with the serial pass."""
+        with ParallelAggregator(self.store, processes=2, min_rows=0) as parallel:
+            self.assertEqual(parallel.month_totals(), aggregate.month_totals(self.store))
+            self.assertEqual(list(parallel.month_totals()), self.store.months())
+            self.assertEqual(parallel.group_totals("category"), self.store.totals_for("category"))
+            matrix = parallel.month_group_totals("category")
+            expected = self.expected_matrix()
+            self.assertEqual(list(matrix), list(expected))
+            for month, cells in expected.items():
+                for category, total in cells.items():
+                    self.assertAlmostEqual(matrix[month][category], total)
+
+            # a change to the store is seen by the next request
+            self.store.add({"expense_id": 401, "category": "gifts", "amount": 7.0, "date": "2027-01-01"})
+            self.assertEqual(parallel.group_totals("category")["gifts"], 7.0)
+            self.assertEqual(parallel.month_totals()["2027-01"], 7.0)
+            with self.assertRaises(ValueError):
+                parallel.group_totals("amount")
+
+        # small stores are summed in this process, with the same answers
+        serial = ParallelAggregator(self.store.view())
+        self.assertEqual(serial.group_totals("category"), self.store.totals_for("category"))
+        self.assertEqual(list(serial.month_group_totals("category")), self.store.months())
+        self.store.clear()
+        self.assertEqual(serial.month_totals(), {})
+        serial.close()
+
+    def test_book_is_read_under_its_lock(self):
+        """given a book, the columns are copied under the book's lock while
+        other threads keep adding."""
+        ledger = Ledger("columnar")
+        stop = threading.Event()
+
+        def writer():
+            while not stop.is_set():
+                ledger.add_expenses_bulk([("food", 1.0, "2025-01-01")] * 50)
+
+        thread = threading.Thread(target=writer)
+        with ParallelAggregator(ledger.expense, processes=2, min_rows=0) as parallel:
+            thread.start()
+            try:
+                for _ in range(20):
+                    self.assertEqual(parallel.month_totals()["2025-01"] % 50, 0.0)
+            finally:
+                stop.set()
+                thread.join()
+            self.assertEqual(parallel.group_totals("category"), ledger.total_by_category())
+            ledger.set_storage_backend("dict")
+            with self.assertRaises(TypeError):
+                parallel.month_totals()
+        ledger.close()
+
+    def test_new_store_behind_the_book_is_copied_again(self):
+        """a ledger loaded into the same book is not answered from the old copy,
+        even when its store has the same version."""
+        directory = tempfile.mkdtemp()
+        try:
+            paths = []
+            for name, rows in (("a", [("fun", 10.0, "2025-01-01"), ("gym", 5.0, "2025-01-02")]),
+                               ("b", [("fun", 99.0, "2025-01-01"), ("gym", 1.0, "2025-01-02")]),
+                               ("c", [("fun", 3.0, "2025-02-01")])):
+                with Ledger("columnar") as ledger:
+                    ledger.add_expenses_bulk(rows)
+                    paths.append(os.path.join(directory, name))
+                    ledger.expense.save_ledger(paths[-1])
+
+            book = Ledger("columnar").expense
+            with ParallelAggregator(book, processes=2, min_rows=0) as parallel:
+                book.load_ledger(paths[0])
+                self.assertEqual(parallel.group_totals("category"), {"fun": 10.0, "gym": 5.0})
+                book.load_ledger(paths[1])
+                self.assertEqual(parallel.group_totals("category"), {"fun": 99.0, "gym": 1.0})
+                book.load_ledger(paths[2])
+                self.assertEqual(parallel.month_group_totals("category"), {"2025-02": {"fun": 3.0}})
+            book.load_ledger(paths[0]).close()
+        finally:
+            shutil.rmtree(directory)
+
+    def test_mapped_and_unsupported_stores(self):
+        """a mapped ledger can be aggregated; the dict store cannot."""
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "incomes.bml")
+            source = IncomeStore()
+            for i, name in enumerate(("salary", "gift", "salary")):
+                source.add({"income_id": i + 1, "source": name, "amount": 100.0 * (i + 1), "date": "2025-0{}-01".format(i + 1)})
+            MappedIncomeStore.write(source, path)
+            mapped = MappedIncomeStore(path=path)
+            with ParallelAggregator(mapped, processes=2, min_rows=0) as parallel:
+                self.assertEqual(parallel.group_totals("source"), {"salary": 400.0, "gift": 200.0})
+                self.assertEqual(parallel.month_group_totals("source")["2025-02"], {"gift": 200.0})
+            with self.assertRaises(TypeError):
+                ParallelAggregator(source)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
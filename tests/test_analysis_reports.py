@@ -1,5 +1,9 @@
+import asyncio
+import subprocess
+import sys
 import unittest
 from budgetmaster.analysis import reports as analysis_reports
+from budgetmaster.ledger import Ledger
 
 
 class TestAnalysisReports(unittest.TestCase):
@@ -36,6 +40,43 @@ class TestAnalysisReports(unittest.TestCase):
         self.assertEqual(balance["2025-02"], 2200.0)
         self.assertGreater(balance["2025-02"], balance["2025-01"])
 
+    def test_monthly_balance_async(self):
+        """the async version gives the same result from an executor."""
+        balance = asyncio.run(analysis_reports.monthly_balance_async(self.incomes, self.expenses))
+        self.assertEqual(balance, analysis_reports.monthly_balance(self.incomes, self.expenses))
+
+    def test_summarize(self):
+        """one summary answers like the separate functions, on every backend."""
+        summary = analysis_reports.summarize(self.incomes, self.expenses + [{"amount": 50.0, "date": "2025-03-01"}])
+        self.assertEqual(summary.months, ["2025-01", "2025-02", "2025-03"])
+        self.assertEqual(summary.monthly_balance(), {"2025-01": 1500.0, "2025-02": 2200.0, "2025-03": -50.0})
+        self.assertEqual(summary.income_by_source(), {"unknown": 6200.0})
+        self.assertEqual(summary.expense_matrix["2025-03"], {"uncategorized": 50.0})
+        self.assertEqual(summary.savings_rate(), analysis_reports.savings_rate(6200.0, 2550.0))
+        with self.assertRaises(ValueError):
+            analysis_reports.summarize([{"amount": 1.0, "date": "2025-02-30"}], [])
+
+        for backend in ("dict", "columnar", "sqlite"):
+            ledger = Ledger(backend)
+            ledger.add_incomes_bulk([("salary", 3000, "2025-01-31"), ("gift", 50, "2025-02-03"),
+                                     ("salary", 3000, "2025-02-28")])
+            ledger.add_expenses_bulk([("food", 20, "2025-01-02"), ("rent", 900, "2025-02-01"),
+                                      ("food", 5.5, "2025-02-09"), ("food", 99, "2025-03-01")])
+            ledger.delete_expense(4)
+            summary = ledger.summarize()
+            self.assertEqual(summary.expense_matrix, {"2025-01": {"food": 20.0}, "2025-02": {"rent": 900.0, "food": 5.5}})
+            self.assertEqual(summary.income_matrix["2025-02"], {"gift": 50.0, "salary": 3000.0})
+            self.assertEqual(summary.monthly_balance(), ledger.monthly_balance())
+            self.assertEqual(summary.total_by_category(), ledger.total_by_category())
+            self.assertEqual(summary.income_by_source(), ledger.income_by_source())
+            self.assertEqual(summary.total_monthly_income("2025-02"), ledger.total_monthly_income("2025-02"))
+            self.assertEqual(summary.average_monthly_income(), ledger.average_monthly_income())
+            self.assertEqual(summary.report(), analysis_reports.generate_report(ledger.monthly_balance()))
+            with self.assertRaises(ValueError):
+                ledger.expenses.month_totals_for("amount")
+            ledger.close()
+            self.assertEqual(ledger.summarize().months, [])
+
     def test_savings_rate_and_generate_report(self):
         income_total = sum(rec["amount"] for rec in self.incomes)
         expense_total = sum(rec["amount"] for rec in self.expenses)
@@ -70,3 +111,18 @@ class TestAnalysisReports(unittest.TestCase):
         analysis_reports.plot_category_expense(expenses_with_cat)
         self.assertTrue(True)
 
+    def test_import_does_not_load_matplotlib_or_numpy(self):
+        """importing reports must stay light; plots load on first use."""
+        code = (
+            "import sys, budgetmaster.analysis.reports as r; "
+            "print('matplotlib' in sys.modules, 'numpy' in sys.modules); "
+            "r.plot_monthly_balance; "
+            "print('matplotlib' in sys.modules)"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout.split()
+        self.assertEqual(out, ["False", "False", "True"])
+
+        with self.assertRaises(AttributeError):
+            analysis_reports.no_such_function
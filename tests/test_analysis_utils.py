@@ -1,5 +1,6 @@
 import unittest
 from budgetmaster.analysis import utils
+from budgetmaster.analysis.rules import RuleSet, DEFAULT_RULES
 
 
 class TestAnalysisUtils(unittest.TestCase):
@@ -22,6 +23,8 @@ class TestAnalysisUtils(unittest.TestCase):
 
     def tearDown(self):
         self.base_expense = None
+        utils.set_category_cache_size(utils.CATEGORY_CACHE_SIZE)
+        utils.set_category_rules(DEFAULT_RULES)
 
     def test_categorize_expense_uses_existing_and_keywords(self):
         """check categorize_expense work with existing categories and keywords."""
@@ -42,6 +45,60 @@ class TestAnalysisUtils(unittest.TestCase):
         self.assertEqual(utils.categorize_expense(trans_exp), "transportation")
         self.assertEqual(utils.categorize_expense(other_exp), "other")
 
+    def test_rule_set_keeps_rule_order(self):
+        """the first matching rule wins, also for overlapping keywords."""
+        rules = RuleSet([
+            ("travel", ["bus pass", "airline"]),
+            ("transportation", ["bus", "train"]),
+            ("fun", ["business class", "USA"]),
+        ], default="misc")
+        self.assertEqual(rules.categorize("Monthly BUS PASS"), "travel")
+        self.assertEqual(rules.categorize("business class upgrade"), "transportation")
+        self.assertEqual(rules.categorize("usa trip, airline"), "travel")
+        self.assertEqual(rules.categorize("causal"), "fun")
+        self.assertEqual(rules.categorize("cash"), "misc")
+        self.assertEqual(RuleSet({}).categorize("rent"), "other")
+        with self.assertRaises(ValueError):
+            RuleSet({"x": [""]})
+
+    def test_categorize_expenses_batch_and_custom_rules(self):
+        """the batch API matches categorize_expense and follows set_category_rules."""
+        records = [
+            {"description": "Coffee shop"},
+            {"description": "Netflix"},
+            {"description": "Coffee shop", "category": "treats"},
+            {"description": "uber ride"},
+            {},
+        ]
+        expected = [utils.categorize_expense(rec) for rec in records]
+        self.assertEqual(utils.categorize_expenses(records), expected)
+        self.assertEqual(expected, ["food", "other", "treats", "transportation", "other"])
+
+        utils.set_category_rules({"subscriptions": ["netflix", "spotify"]}, default="misc")
+        self.assertEqual(len(utils.get_category_rules()), 1)
+        self.assertEqual(utils.categorize_expenses(records),
+                         ["misc", "subscriptions", "treats", "misc", "misc"])
+
+    def test_category_cache_counts_and_invalidation(self):
+        """repeated descriptions hit the cache, and new rules empty it."""
+        utils.clear_category_cache()
+        for description in ["Coffee Shop", "coffee  shop ", "COFFEE SHOP", "Rent"]:
+            utils.categorize_expense({"description": description})
+        info = utils.category_cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (2, 2, 2))
+
+        utils.set_category_rules({"treats": ["Coffee   Shop"]})
+        self.assertEqual(utils.category_cache_info().currsize, 0)
+        self.assertEqual(utils.categorize_expense({"description": "coffee shop"}), "treats")
+        self.assertEqual(utils.categorize_expenses([{"description": "Rent"}]), ["other"])
+
+        # least recently used descriptions are dropped first
+        utils.set_category_cache_size(2)
+        for description in ["a", "b", "a", "c", "b"]:
+            utils.categorize_expense({"description": description})
+        info = utils.category_cache_info()
+        self.assertEqual((info.hits, info.misses, info.maxsize), (1, 4, 2))
+
     def test_format_currency_and_validate_amount(self):
         """test format_currency and validate_amount"""
         s1 = utils.format_currency(1234.5)
@@ -59,3 +116,13 @@ class TestAnalysisUtils(unittest.TestCase):
         # when the amount is negative
         with self.assertRaises(ValueError):
             utils.validate_amount(-0.01)
+
+    def test_validate_amounts(self):
+        """validate_amounts checks a whole column and reports the bad row."""
+        values = utils.validate_amounts([1, 2.5, 0])
+        self.assertEqual(list(values), [1.0, 2.5, 0.0])
+        self.assertEqual(len(utils.validate_amounts([])), 0)
+
+        with self.assertRaises(utils.InvalidAmountError) as ctx:
+            utils.validate_amounts([3, 4, -1, -2])
+        self.assertIn("row 2", str(ctx.exception))
@@ -58,3 +58,12 @@ class TestBaseTransaction(unittest.TestCase):
         # negative amounts should also raise an error in update
         with self.assertRaises(ValueError):
             self.tran.update(new_amount=-5)
+
+    def test_slots_and_mapping_access(self):
+        """transactions have no __dict__ and read like a dictionary."""
+        self.assertFalse(hasattr(self.tran, "__dict__"))
+        self.assertEqual(self.tran["amount"], 100.0)
+        self.assertEqual(self.tran.get("missing", "x"), "x")
+        self.assertEqual(dict(self.tran), self.tran.to_dict())
+        with self.assertRaises(KeyError):
+            self.tran["missing"]
@@ -1,3 +1,5 @@
+import copy
+import json
 import unittest
 from budgetmaster.expense import entry as expense_entry
 
@@ -17,15 +19,11 @@ class TestExpenseEntry(unittest.TestCase):
         # reset the in-memory storage and id counter in expense_entry
         if hasattr(expense_entry, "_expenses"):
             expense_entry._expenses.clear()
-        if hasattr(expense_entry, "_next_expense_id"):
-            expense_entry._next_expense_id = 1
     
     def tearDown(self):
         # clean up after each test as well
         if hasattr(expense_entry, "_expenses"):
             expense_entry._expenses.clear()
-        if hasattr(expense_entry, "_next_expense_id"):
-            expense_entry._next_expense_id = 1
 
 
     def test_add_and_total_by_category_and_is_over_budget(self):
@@ -67,3 +65,113 @@ class TestExpenseEntry(unittest.TestCase):
         # when amount is neagtive 
         with self.assertRaises(ValueError):
             expense_entry.add_expense("food", -5, "2025-01-12", "bad amount")
+
+    def test_view_expenses_is_live_and_checks_changes(self):
+        """view_expenses reads the store without copying and detects changes."""
+        expense_entry.add_expense("food", 20.0, "2025-01-01", "lunch")
+        view = expense_entry.view_expenses()
+        expense_entry.add_expense("rent", 800.0, "2025-01-02", "apartment")
+
+        self.assertEqual(len(view), 2)
+        self.assertEqual(sum(rec["amount"] for rec in view), 820.0)
+        self.assertIs(next(iter(view)), expense_entry._expenses.get(1))
+
+        with self.assertRaises(RuntimeError):
+            for rec in view:
+                expense_entry.delete_expense(rec["expense_id"])
+
+    def test_add_expenses_bulk_defaults_description(self):
+        """bulk add fills in missing descriptions and updates category totals."""
+        ids = expense_entry.add_expenses_bulk([
+            ("food", 12.0, "2025-01-01"),
+            ("food", 8.0, "2025-01-02", "coffee"),
+            {"category": "rent", "amount": 900, "date": "2025-01-03"},
+        ])
+        self.assertEqual(list(ids), [1, 2, 3])
+        self.assertEqual(expense_entry.get_expense(1)["description"], "")
+        self.assertEqual(list(expense_entry.get_expense(2)["tags"]), [])
+        self.assertEqual(expense_entry.total_by_category(), {"food": 20.0, "rent": 900.0})
+
+    def test_delete_expenses_by_ids_predicate_and_range(self):
+        """delete_expenses removes many records and returns the count."""
+        expense_entry.add_expenses_bulk([
+            ("food", 10.0, "2025-01-05"),
+            ("food", 0.0, "2025-01-20"),
+            ("rent", 900.0, "2025-02-01"),
+            ("food", 15.0, "2025-02-10"),
+            ("fun", 0.0, "2025-03-01"),
+        ])
+        self.assertEqual(expense_entry.delete_expenses(ids=[1, 99, 1]), 1)
+        self.assertEqual(expense_entry.delete_expenses(where=lambda rec: rec["amount"] == 0), 2)
+        self.assertEqual(
+            expense_entry.delete_expenses(date_range=("2025-02-05", "2025-02"),
+                                          where=lambda rec: rec["category"] == "food"),
+            1,
+        )
+        self.assertEqual([rec["expense_id"] for rec in expense_entry.get_all_expenses()], [3])
+        self.assertEqual(expense_entry.total_by_category(), {"rent": 900.0})
+
+        with self.assertRaises(ValueError):
+            expense_entry.delete_expenses()
+
+    def test_stored_records_are_expense_objects(self):
+        """the store keeps read-only Expense objects; the functions hand out dict copies."""
+        rec = expense_entry.add_expense("food", 12.5, "2025-01-01", "lunch")
+        expected = {
+            "amount": 12.5, "date": "2025-01-01", "description": "lunch",
+            "category": "food", "tags": [], "expense_id": 1,
+        }
+        self.assertEqual(rec, expected)
+        self.assertEqual(json.loads(json.dumps(rec)), expected)
+        self.assertEqual(expense_entry.get_expense(1), expected)
+        self.assertEqual(expense_entry.get_all_expenses(), [expected])
+        rec["amount"] = 0.0
+        expense_entry.get_all_expenses()[0]["amount"] = 0.0
+        self.assertEqual(expense_entry.total_by_category()["food"], 12.5)
+
+        stored = expense_entry._expenses.get(1)
+        self.assertIsInstance(stored, expense_entry.Expense)
+        self.assertIn(stored, {stored})
+        with self.assertRaises(AttributeError):
+            stored.update(new_amount=100)
+        with self.assertRaises(AttributeError):
+            stored.date = "garbage"
+        with self.assertRaises(AttributeError):
+            stored.add_tag("x")
+        copied = copy.copy(stored)
+        copied.update(new_amount=100)
+        self.assertEqual(stored["amount"], 12.5)
+
+        # changes go through the store, which replaces the object
+        self.assertEqual(expense_entry.tag_expense(1, "x")["tags"], ["x"])
+        self.assertIsNot(expense_entry._expenses.get(1), stored)
+        self.assertEqual(expense_entry.total_by_tag(), {"x": 12.5})
+        expense_entry.delete_expense(1)
+        self.assertEqual(expense_entry.total_by_category(), {})
+
+    def test_tags_are_interned_and_indexed(self):
+        """tag_expense updates the tag index used by expenses_tagged and total_by_tag."""
+        exp_obj = expense_entry.Expense("food", 10, "2025-01-01")
+        exp_obj.add_tag("snack")
+        exp_obj.add_tag("snack")
+        self.assertEqual(exp_obj.tags, ("snack",))
+        self.assertTrue(exp_obj.has_tags("snack"))
+        self.assertFalse(exp_obj.has_tags("snack", "never-used-tag"))
+        # each expense keeps its own order, whatever order other expenses use
+        other = expense_entry.Expense.from_record({"amount": 1, "date": "2025-01-01",
+                                                   "tags": ["zeta", "snack", "zeta"]})
+        self.assertEqual(other.tags, ("zeta", "snack"))
+        self.assertIs(other.tags[1], exp_obj.tags[0])
+
+        expense_entry.add_expense("food", 12.0, "2025-01-01", "lunch")
+        expense_entry.add_expense("travel", 300.0, "2025-01-05", "train")
+        expense_entry.tag_expense(1, "work")
+        expense_entry.tag_expense(2, "work", "trip")
+
+        self.assertEqual([rec["expense_id"] for rec in expense_entry.expenses_tagged("work", "trip")], [2])
+        self.assertEqual(len(expense_entry.expenses_tagged("work", month="2025-01")), 2)
+        self.assertEqual(expense_entry.total_by_tag(), {"work": 312.0, "trip": 300.0})
+        self.assertEqual(expense_entry.get_all_expenses()[1]["tags"], ["work", "trip"])
+
+        with self.assertRaises(ValueError):
+            expense_entry.tag_expense(99, "work")
@@ -0,0 +1,76 @@
+import unittest
+from budgetmaster.expense import store as expense_store
+
+
+class TestExpenseStore(unittest.TestCase):
+    """Tests for budgetmaster.expense.store."""
+
+    @classmethod
+    def setUpClass(cls):
+        print("setUpClass: TestExpenseStore")
+
+    @classmethod
+    def tearDownClass(cls):
+        print("tearDownClass: TestExpenseStore")
+
+    def setUp(self):
+        self.store = expense_store.ExpenseStore()
+        self.store.add({"expense_id": 1, "category": "food", "amount": 20.0, "date": "2025-01-01"})
+        self.store.add({"expense_id": 2, "category": "rent", "amount": 800.0, "date": "2025-01-02"})
+        self.store.add({"expense_id": 3, "category": "food", "amount": 30.0, "date": "2025-02-03"})
+
+    def tearDown(self):
+        self.store = None
+
+    def test_add_get_and_indexes(self):
+        """records can be found by id, category and month."""
+        self.assertEqual(len(self.store), 3)
+        self.assertIn(2, self.store)
+        self.assertEqual(self.store.get(2)["category"], "rent")
+        self.assertIsNone(self.store.get(99))
+
+        food_ids = [rec["expense_id"] for rec in self.store.by_category("food")]
+        self.assertEqual(food_ids, [1, 3])
+        self.assertEqual(len(self.store.by_month("2025-01")), 2)
+        self.assertEqual(self.store.months(), ["2025-01", "2025-02"])
+
+        # duplicate ids are rejected
+        with self.assertRaises(ValueError):
+            self.store.add({"expense_id": 1, "category": "food", "amount": 1.0, "date": "2025-01-01"})
+
+    def test_delete_and_clear(self):
+        """delete removes the record from every index."""
+        removed = self.store.delete(2)
+        self.assertEqual(removed["amount"], 800.0)
+        self.assertIsNone(self.store.delete(2))
+        self.assertNotIn("rent", self.store.categories())
+        self.assertEqual(len(self.store.by_month("2025-01")), 1)
+
+        self.store.clear()
+        self.assertEqual(len(self.store), 0)
+        self.assertEqual(self.store.months(), [])
+
+    def test_tag_index_queries_and_totals(self):
+        """the inverted tag index answers tag + month queries on both backends."""
+        for store_class in (expense_store.ExpenseStore, expense_store.ColumnarExpenseStore,
+                            expense_store.SQLiteExpenseStore):
+            with self.subTest(store=store_class.__name__):
+                store = store_class()
+                store.add({"expense_id": 1, "category": "food", "amount": 20.0,
+                           "date": "2025-01-01", "tags": ["work", "travel"]})
+                store.add({"expense_id": 2, "category": "food", "amount": 5.0,
+                           "date": "2025-01-02", "tags": ["work"]})
+                store.add({"expense_id": 3, "category": "rent", "amount": 800.0,
+                           "date": "2025-02-01", "tags": ["work", "travel"]})
+
+                ids = [rec["expense_id"] for rec in store.by_tags(["work", "travel"])]
+                self.assertEqual(sorted(ids), [1, 3])
+                january = store.by_tags(["travel"], month="2025-01")
+                self.assertEqual([rec["expense_id"] for rec in january], [1])
+                self.assertEqual(store.by_tags(["unknown"]), [])
+                self.assertEqual(store.totals_for("tags"), {"work": 825.0, "travel": 820.0})
+
+                store.update(3, tags=["work"])
+                self.assertEqual(store.total_for("tags", "travel"), 20.0)
+                store.delete(1)
+                self.assertEqual(store.tag_names(), ["work"])
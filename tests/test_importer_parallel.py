@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from budgetmaster.expense import entry as expense_entry
+from budgetmaster.income import entry as income_entry
+from budgetmaster.importer import parallel, statements
+
+
+class TestParallelImport(unittest.TestCase):
+    """Tests for budgetmaster.importer.parallel."""
+
+    @classmethod
+    def setUpClass(cls):
+        print("setUpClass: TestParallelImport")
+
+    @classmethod
+    def tearDownClass(cls):
+        print("tearDownClass: TestParallelImport")
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.paths = []
+        for month in range(1, 5):
+            path = os.path.join(self.directory, "2025-{:02d}.csv".format(month))
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("date,description,amount\n")
+                for day in range(1, 4):
+                    date = "2025-{:02d}-{:02d}".format(month, day)
+                    f.write("{},Coffee {},-{}.50\n".format(date, day, month))
+                    f.write("{},Rent,-{}\n".format(date, 1000 + day))
+                f.write("2025-{:02d}-28,ACME payroll,{}\n".format(month, 3000 + month))
+            self.paths.append(path)
+
+    def tearDown(self):
+        income_entry.incomes.clear()
+        expense_entry._expenses.clear()
+        shutil.rmtree(self.directory)
+
+    def test_same_ids_as_serial_import(self):
+        """ids and records do not depend on the number of workers."""
+        expense_entry.add_expense("misc", 1, "2024-12-31")
+        for path in self.paths:
+            statements.import_statement(path)
+        expected = (income_entry.get_all_incomes(), expense_entry.get_all_expenses())
+
+        for workers in (1, 2):
+            income_entry.incomes.clear()
+            expense_entry._expenses.clear()
+            expense_entry.add_expense("misc", 1, "2024-12-31")
+            counts = parallel.import_statements(self.paths, max_workers=workers, chunk_size=2)
+            self.assertEqual(counts, {"incomes": 4, "expenses": 24})
+            self.assertEqual((income_entry.get_all_incomes(), expense_entry.get_all_expenses()), expected)
+        self.assertEqual(expense_entry.get_expense(2)["category"], "food")
+
+    def test_bad_file_adds_nothing(self):
+        """a file that cannot be parsed stops the import before any add."""
+        bad = os.path.join(self.directory, "bad.csv")
+        with open(bad, "w", encoding="utf-8") as f:
+            f.write("date,description,amount\n2025-05-01,Coffee,abc\n")
+        with self.assertRaises(ValueError):
+            parallel.import_statements(self.paths + [bad], max_workers=2)
+        with self.assertRaises(ValueError):
+            parallel.import_statements(self.paths + [os.path.join(self.directory, "missing.csv")])
+        with open(bad, "w", encoding="utf-8") as f:
+            f.write("date,description,amount\n2025-05-01,Payroll,10\n2025-5-2,Coffee,-3\n")
+        with self.assertRaises(ValueError) as caught:
+            parallel.import_statements(self.paths + [bad])
+        self.assertIn(bad, str(caught.exception))
+        self.assertEqual(len(income_entry.get_all_incomes()), 0)
+        self.assertEqual(len(expense_entry.get_all_expenses()), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from budgetmaster.expense import entry as expense_entry
+from budgetmaster.income import entry as income_entry
+from budgetmaster.importer import statements
+
+
+class TestStatementImport(unittest.TestCase):
+    """Tests for budgetmaster.importer.statements."""
+
+    @classmethod
+    def setUpClass(cls):
+        print("setUpClass: TestStatementImport")
+
+    @classmethod
+    def tearDownClass(cls):
+        print("tearDownClass: TestStatementImport")
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        income_entry.incomes.clear()
+        expense_entry._expenses.clear()
+        shutil.rmtree(self.directory)
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_csv_import_in_chunks(self):
+        """CSV rows are split by sign, categorized and added chunk by chunk."""
+        path = self.write("bank.csv", (
+            "Posted,Payee,Amount,Category\n"
+            "01/03/2025,Monthly rent,-1200.00,\n"
+            "01/04/2025,Coffee shop,-4.50,\n"
+            "\n"
+            "01/05/2025,ACME payroll,\"$3,000.00\",\n"
+            "01/06/2025,Movie night,-12,fun\n"
+        ))
+        chunks = list(statements.read_statement(
+            path, chunk_size=2, columns={"date": "Posted", "description": "Payee"},
+            date_format="%m/%d/%Y",
+        ))
+        self.assertEqual([len(chunk["amount"]) for chunk in chunks], [2, 2])
+        self.assertEqual(chunks[1]["amount"], [3000.0, -12.0])
+        self.assertEqual(chunks[0]["date"], ["2025-01-03", "2025-01-04"])
+
+        counts = statements.import_statement(
+            path, chunk_size=2, columns={"date": "Posted", "description": "Payee"},
+            date_format="%m/%d/%Y",
+        )
+        self.assertEqual(counts, {"incomes": 1, "expenses": 3})
+        self.assertEqual(expense_entry.total_by_category(), {"housing": 1200.0, "food": 4.5, "fun": 12.0})
+        self.assertEqual(income_entry.get_income(1)["source"], "ACME payroll")
+        self.assertEqual(expense_entry.get_expense(3)["date"], "2025-01-06")
+
+        bad = self.write("bad.csv", "date,amount\n2025-01-01,12\n2025-01-02,twelve\n")
+        with self.assertRaises(ValueError):
+            statements.import_statement(bad)
+        with self.assertRaises(ValueError):
+            statements.import_statement(self.write("nodate.csv", "when,amount\nx,1\n"))
+
+    def test_bad_date_is_reported_before_anything_is_added(self):
+        """dates kept as written are checked per chunk, naming the row and file."""
+        path = self.write("dates.csv", "date,amount\n2025-01-01,3000\n01/02/2025,-12\n")
+        with self.assertRaises(ValueError) as caught:
+            statements.import_statement(path)
+        self.assertIn("row 2 of {}".format(path), str(caught.exception))
+        self.assertEqual(income_entry.get_all_incomes(), [])
+        self.assertEqual(expense_entry.get_all_expenses(), [])
+
+    def test_ofx_import(self):
+        """OFX transactions are read as a stream of STMTTRN blocks."""
+        path = self.write("bank.ofx", (
+            "OFXHEADER:100\nDATA:OFXSGML\n\n"
+            "<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n"
+            "<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>20250107120000[-5:EST]\n"
+            "<TRNAMT>-45.10\n<FITID>1\n<NAME>Grocery &amp; more\n</STMTTRN>\n"
+            "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250108<TRNAMT>100.00"
+            "<MEMO>Interest</STMTTRN>\n"
+            "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+        ))
+        self.assertEqual(statements.import_statement(path), {"incomes": 1, "expenses": 1})
+        expense = expense_entry.get_expense(1)
+        self.assertEqual((expense["date"], expense["amount"], expense["description"], expense["category"]),
+                         ("2025-01-07", 45.1, "Grocery & more", "food"))
+        self.assertEqual(income_entry.get_all_incomes(),
+                         [{"income_id": 1, "source": "Interest", "amount": 100.0, "date": "2025-01-08"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,11 +15,10 @@ class TestIncomeEntry(unittest.TestCase):
 
     def setUp(self):
         income_entry.incomes.clear()
-        income_entry.next_income_id = 1
 
     def tearDown(self):
+        income_entry.set_storage_backend("dict")
         income_entry.incomes.clear()
-        income_entry.next_income_id = 1
 
     def test_add_income_creates_records_and_ids(self):
         """add_income should create a record and the id should increment."""
@@ -61,3 +60,50 @@ class TestIncomeEntry(unittest.TestCase):
         # when amount is negative 
         with self.assertRaises(ValueError):
             income_entry.add_income("salary", -1, "2025-01-01")
+
+    def test_get_income_and_update_moves_month(self):
+        """get_income finds records by id, and date updates change the month."""
+        rec = income_entry.add_income("salary", 1000, "2025-01-01")
+        self.assertEqual(income_entry.get_income(rec["income_id"]), rec)
+        self.assertIsNone(income_entry.get_income(999))
+
+        income_entry.update_income(rec["income_id"], new_date="2025-03-01")
+        self.assertEqual(len(income_entry.incomes.by_month("2025-01")), 0)
+        self.assertEqual(len(income_entry.incomes.by_month("2025-03")), 1)
+
+    def test_columnar_backend_keeps_module_functions_working(self):
+        """switching to the columnar backend copies records over."""
+        income_entry.add_income("salary", 1000, "2025-01-01")
+        income_entry.set_storage_backend("columnar")
+        rec = income_entry.add_income("freelance", 200, "2025-01-05")
+
+        self.assertEqual(len(income_entry.get_all_incomes()), 2)
+        updated = income_entry.update_income(rec["income_id"], new_amount=250)
+        self.assertEqual(updated["amount"], 250.0)
+        income_entry.delete_income(1)
+        self.assertEqual([r["source"] for r in income_entry.get_all_incomes()], ["freelance"])
+
+        with self.assertRaises(ValueError):
+            income_entry.set_storage_backend("parquet")
+
+    def test_add_incomes_bulk_rows_and_columns(self):
+        """bulk add takes rows or columns, hands out a block of ids, and validates first."""
+        income_entry.add_income("salary", 1000, "2025-01-01")
+        ids = income_entry.add_incomes_bulk([
+            ("freelance", 200, "2025-01-05"),
+            {"source": "salary", "amount": 1000, "date": "2025-02-01"},
+        ])
+        self.assertEqual(list(ids), [2, 3])
+        self.assertEqual(income_entry.get_income(3)["source"], "salary")
+
+        ids = income_entry.add_incomes_bulk(
+            {"source": ["bonus", "gift"], "amount": [50, 25.5], "date": ["2025-02-02", "2025-03-01"]}
+        )
+        self.assertEqual(list(ids), [4, 5])
+        self.assertEqual(income_entry.incomes.total_for("source", "salary"), 2000.0)
+        self.assertEqual(income_entry.add_income("x", 1, "2025-03-02")["income_id"], 6)
+
+        # one bad amount rejects the whole batch
+        with self.assertRaises(ValueError):
+            income_entry.add_incomes_bulk([("a", 1, "2025-01-01"), ("b", -1, "2025-01-01")])
+        self.assertEqual(len(income_entry.get_all_incomes()), 6)
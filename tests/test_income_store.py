@@ -0,0 +1,74 @@
+import unittest
+from budgetmaster.income import store as income_store
+
+
+class TestIncomeStore(unittest.TestCase):
+    """Tests for budgetmaster.income.store."""
+
+    @classmethod
+    def setUpClass(cls):
+        print("setUpClass: TestIncomeStore")
+
+    @classmethod
+    def tearDownClass(cls):
+        print("tearDownClass: TestIncomeStore")
+
+    def setUp(self):
+        self.store = income_store.IncomeStore()
+        self.store.add({"income_id": 1, "source": "salary", "amount": 3000.0, "date": "2025-01-01"})
+        self.store.add({"income_id": 2, "source": "freelance", "amount": 500.0, "date": "2025-01-15"})
+        self.store.add({"income_id": 3, "source": "salary", "amount": 3200.0, "date": "2025-02-01"})
+
+    def tearDown(self):
+        self.store = None
+
+    def test_update_moves_record_between_indexes(self):
+        """update should re-bucket the record when source or date change."""
+        updated = self.store.update(2, source="salary", date="2025-02-20")
+        self.assertEqual(updated["source"], "salary")
+        self.assertNotIn("freelance", self.store.sources())
+        self.assertEqual(len(self.store.by_source("salary")), 3)
+        self.assertEqual(len(self.store.by_month("2025-01")), 1)
+        self.assertEqual(len(self.store.by_month("2025-02")), 2)
+
+        with self.assertRaises(KeyError):
+            self.store.update(99, amount=1.0)
+
+    def test_delete_and_months(self):
+        """delete removes the record and empty months disappear."""
+        self.assertEqual(self.store.months(), ["2025-01", "2025-02"])
+        self.store.delete(3)
+        self.assertEqual(self.store.months(), ["2025-01"])
+        self.assertIsNone(self.store.get(3))
+        self.assertEqual(len(self.store), 2)
+
+    def test_running_totals_follow_changes(self):
+        """per-source and per-month totals are kept up to date."""
+        self.assertEqual(self.store.totals_for("source"), {"salary": 6200.0, "freelance": 500.0})
+        self.assertEqual(self.store.total_for("month", "2025-01"), 3500.0)
+
+        self.store.update(1, amount=2500.0, date="2025-02-01")
+        self.assertEqual(self.store.total_for("source", "salary"), 5700.0)
+        self.assertEqual(self.store.totals_for("month"), {"2025-01": 500.0, "2025-02": 5700.0})
+
+        self.store.delete(2)
+        self.assertNotIn("freelance", self.store.totals_for("source"))
+        self.assertEqual(self.store.total_for("month", "2025-01"), 0.0)
+
+    def test_totals_stay_exact_after_delete(self):
+        """deleting or changing records leaves no rounding error behind."""
+        for store in (income_store.IncomeStore(), income_store.ColumnarIncomeStore()):
+            store.add({"income_id": 1, "source": "gift", "amount": 0.1, "date": "2025-01-01"})
+            store.add({"income_id": 2, "source": "gift", "amount": 0.2, "date": "2025-01-02"})
+            store.add({"income_id": 3, "source": "salary", "amount": 1e16, "date": "2025-02-01"})
+            store.add({"income_id": 4, "source": "salary", "amount": 1.0, "date": "2025-02-02"})
+            store.delete(1)
+            store.delete(3)
+            self.assertEqual(store.totals_for("source"), {"gift": 0.2, "salary": 1.0})
+            self.assertEqual(store.total_for("month", "2025-02"), 1.0)
+
+            store.update(2, amount=0.7)
+            store.add({"income_id": 5, "source": "gift", "amount": 0.3, "date": "2025-01-03"})
+            self.assertEqual(store.total_for("source", "gift"), 1.0)
+            self.assertEqual(store.totals_for("month"), {"2025-01": 1.0, "2025-02": 1.0})
+
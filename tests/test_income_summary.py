@@ -16,14 +16,13 @@ class TestIncomeSummary(unittest.TestCase):
 
     def setUp(self):
         income_entry.incomes.clear()
-        income_entry.next_income_id = 1
         income_entry.add_income("salary", 3000, "2025-01-01")
         income_entry.add_income("freelance", 500, "2025-01-15")
         income_entry.add_income("salary", 3200, "2025-02-01")
 
     def tearDown(self):
         income_entry.incomes.clear()
-        income_entry.next_income_id = 1
+        income_entry.set_storage_backend("dict")
 
     def test_total_monthly_income(self):
         total_jan = income_summary.total_monthly_income("2025-01")
@@ -43,3 +42,46 @@ class TestIncomeSummary(unittest.TestCase):
         self.assertEqual(by_source["salary"], 6200.0)
         self.assertEqual(by_source["freelance"], 500.0)
         self.assertEqual(len(by_source.keys()), 2)
+
+    def test_month_buckets_and_date_ranges(self):
+        """month queries use the buckets, and ranges span several months."""
+        income_entry.add_income("bonus", 1000, "2025-03-10")
+        self.assertEqual(len(income_summary.filter_by_month("2025-01")), 2)
+        self.assertEqual(len(income_summary.filter_by_month("2025")), 4)
+        self.assertEqual(len(income_summary.filter_by_month("2025-01-15")), 1)
+
+        self.assertEqual(income_summary.total_income_between("2025-01", "2025-02"), 6700.0)
+        self.assertEqual(income_summary.total_income_between("2025-01-10", "2025-03-10"), 4700.0)
+        sources = [rec["source"] for rec in income_summary.filter_by_date_range("2025-02-01", "2025-12-31")]
+        self.assertEqual(sources, ["salary", "bonus"])
+
+        # moving an income to another month re-buckets it
+        income_entry.update_income(4, new_date="2025-01-20")
+        self.assertEqual(income_summary.total_monthly_income("2025-01"), 4500.0)
+        self.assertEqual(income_summary.filter_by_month("2025-03"), [])
+
+    def test_filters_return_plain_dicts(self):
+        """filtered incomes are dict copies on the dict and columnar backends."""
+        for backend in ("dict", "columnar"):
+            income_entry.set_storage_backend(backend)
+            records = (income_summary.filter_by_month("2025-01")
+                       + income_summary.filter_by_month("2025")
+                       + income_summary.filter_by_date_range("2025-01-10", "2025-02"))
+            self.assertEqual(len(records), 2 + 3 + 2)
+            for rec in records:
+                self.assertIs(type(rec), dict)
+            # changing a copy leaves the stored income alone
+            records[0]["amount"] = 0.0
+            self.assertEqual(income_summary.total_monthly_income("2025-01"), 3500.0)
+
+    def test_date_range_order_after_update(self):
+        """a record moved into a month keeps its id order on every backend."""
+        for backend in ("dict", "columnar", "sqlite"):
+            income_entry.set_storage_backend(backend)
+            income_entry.incomes.clear()
+            first = income_entry.add_income("bonus", 1000, "2025-03-10")["income_id"]
+            second = income_entry.add_income("gift", 50, "2025-02-20")["income_id"]
+            # the bonus moves into February, after the gift was added there
+            income_entry.update_income(first, new_date="2025-02-25")
+            ids = [rec["income_id"] for rec in income_summary.filter_by_date_range("2025-01", "2025-03")]
+            self.assertEqual(ids, [first, second])
@@ -0,0 +1,197 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from budgetmaster.expense import entry as expense_entry
+from budgetmaster.income import entry as income_entry
+from budgetmaster.income import summary as income_summary
+from budgetmaster.importer.statements import import_statement
+from budgetmaster.ledger import AsyncLedger, Ledger, get_default_ledger
+
+
+class TestLedger(unittest.TestCase):
+    """Tests for budgetmaster.ledger."""
+
+    @classmethod
+    def setUpClass(cls):
+        print("setUpClass: TestLedger")
+
+    @classmethod
+    def tearDownClass(cls):
+        print("tearDownClass: TestLedger")
+
+    def tearDown(self):
+        income_entry.incomes.clear()
+        expense_entry._expenses.clear()
+        income_entry.set_storage_backend("dict")
+        expense_entry.set_storage_backend("dict")
+
+    def test_ledgers_are_independent(self):
+        """each ledger has its own records, ids and totals."""
+        home = Ledger()
+        flat = Ledger(backend="columnar")
+        self.assertEqual(home.add_income("salary", 3000, "2025-01-31")["income_id"], 1)
+        self.assertEqual(flat.add_income("gift", 50, "2025-01-05")["income_id"], 1)
+        self.assertEqual(list(home.add_expenses_bulk([("food", 20, "2025-01-02"), ("rent", 900, "2025-02-01")])),
+                         [1, 2])
+        flat.add_expense("food", 5, "2025-01-03")
+        home.tag_expense(1, "weekly")
+
+        self.assertEqual(home.monthly_balance(), {"2025-01": 2980.0, "2025-02": -900.0})
+        self.assertEqual(flat.monthly_balance(), {"2025-01": 45.0})
+        self.assertEqual(home.total_monthly_income("2025-01"), 3000.0)
+        self.assertEqual(flat.income_by_source(), {"gift": 50.0})
+        self.assertEqual(home.total_by_tag(), {"weekly": 20.0})
+        self.assertEqual(flat.total_by_tag(), {})
+        # the module functions use the default ledger, which is still empty
+        self.assertEqual(income_entry.get_all_incomes(), [])
+        self.assertEqual(income_summary.total_monthly_income("2025-01"), 0.0)
+
+        home.delete_income(1)
+        self.assertEqual(home.add_income("salary", 3000, "2025-02-28")["income_id"], 2)
+        home.clear()
+        self.assertEqual(home.add_income("salary", 3000, "2025-03-31")["income_id"], 1)
+        with self.assertRaises(AttributeError):
+            home.no_such_operation
+
+    def test_default_ledger_and_files(self):
+        """the default ledger is the one of the module functions; a ledger
+        can be journaled, saved, loaded and imported into."""
+        default = get_default_ledger()
+        income_entry.add_income("salary", 3000, "2025-01-31")
+        self.assertEqual(default.get_all_incomes(), income_entry.get_all_incomes())
+        default.set_storage_backend("columnar")
+        self.assertIs(income_entry.incomes, default.incomes)
+        self.assertEqual(income_entry.add_income("bonus", 100, "2025-01-31")["income_id"], 2)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with Ledger() as household:
+                household.open_journal(os.path.join(tmp, "journal"), fsync="never")
+                household.add_income("salary", 1000, "2025-03-01")
+                household.add_expense("food", 10, "2025-03-02", "COFFEE SHOP")
+                household.close_journal()
+                self.assertEqual(household.save_ledger(os.path.join(tmp, "saved")), 2)
+
+            restored = Ledger()
+            restored.open_journal(os.path.join(tmp, "journal"))
+            self.assertEqual(restored.monthly_balance(), {"2025-03": 990.0})
+            self.assertEqual(restored.add_expense("food", 1, "2025-03-03")["expense_id"], 2)
+            restored.close()
+            self.assertEqual(restored.get_all_expenses(), [])
+
+            restored.load_ledger(os.path.join(tmp, "saved"))
+            self.assertEqual(restored.total_by_category(), {"food": 10.0})
+
+            path = os.path.join(tmp, "statement.csv")
+            with open(path, "w") as f:
+                f.write("date,amount,description\n2025-04-01,200,Payroll\n2025-04-02,-30,Uber trip\n")
+            self.assertEqual(import_statement(path, ledger=restored), {"incomes": 1, "expenses": 1})
+            self.assertEqual(restored.total_by_category(), {"food": 10.0, "transportation": 30.0})
+            self.assertEqual(len(income_entry.incomes), 2)
+            restored.close()
+
+    def test_numpy_columns_on_every_backend(self):
+        """NumPy columns go into every backend and come back as plain values."""
+        try:
+            import numpy as np
+        except ImportError:
+            self.skipTest("numpy is not installed")
+        for backend in ("dict", "columnar", "sqlite"):
+            ledger = Ledger(backend)
+            ledger.add_incomes_bulk({
+                "source": np.array(["salary", "bonus"]),
+                "amount": np.array([1000.0, 50.0]),
+                "date": np.array(["2025-01-31", "2025-02-28"]),
+            })
+            tags = np.empty(3, dtype=object)
+            tags[:] = [("home",), (), ("home", "car")]
+            ids = ledger.add_expenses_bulk({
+                "category": np.array(["rent", "food", "rent"]),
+                "amount": np.array([500.0, 20.0, 500.0]),
+                "date": np.array(["2025-01-01", "2025-01-02", "2025-02-01"]),
+                "tags": tags,
+            })
+            self.assertEqual(list(ids), [1, 2, 3])
+            self.assertEqual(ledger.total_by_category(), {"rent": 1000.0, "food": 20.0})
+            self.assertEqual(ledger.total_by_tag(), {"home": 1000.0, "car": 500.0})
+            self.assertEqual(ledger.monthly_balance(), {"2025-01": 480.0, "2025-02": -450.0})
+            # keys are str, not np.str_, so they match plain lookups
+            self.assertEqual([type(key) for key in ledger.total_by_category()], [str, str])
+            for rec in ledger.get_all_expenses():
+                self.assertIs(type(rec["category"]), str)
+                self.assertIs(type(rec["amount"]), float)
+            ledger.close()
+
+    def test_threads_share_a_ledger(self):
+        """writer threads get distinct ids and readers see whole records."""
+        for backend in ("dict", "columnar", "sqlite"):
+            ledger = Ledger(backend)
+            ids = []
+            errors = []
+
+            def write(worker):
+                for i in range(200):
+                    ids.append(ledger.add_expense("food", 1, "2025-01-{:02d}".format(i % 28 + 1))["expense_id"])
+                    if i % 50 == 0:
+                        # tag this thread's own batch; ids[-1] may be another thread's
+                        batch = ledger.add_expenses_bulk([("rent", 2, "2025-02-01")] * 5)
+                        ids.extend(batch)
+                        ledger.tag_expense(batch[-1], "t{}".format(worker))
+
+            def read():
+                for _ in range(100):
+                    # several reads that must agree hold both locks, income first
+                    with ledger.income.lock, ledger.expense.lock:
+                        balance = ledger.monthly_balance()
+                        totals = ledger.total_by_category()
+                    if balance and balance.get("2025-01", 0.0) != -totals.get("food", 0.0):
+                        errors.append((balance, totals))
+
+            threads = [threading.Thread(target=write, args=(w,)) for w in range(6)]
+            threads += [threading.Thread(target=read) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(sorted(ids), list(range(1, 6 * 220 + 1)))
+            self.assertEqual(ledger.monthly_balance(), {"2025-01": -1200.0, "2025-02": -240.0})
+            self.assertEqual(sum(ledger.total_by_tag().values()), 6 * 4 * 2.0)
+            self.assertEqual(errors, [])
+            ledger.close()
+
+    def test_async_ledger(self):
+        """AsyncLedger runs the ledger operations as coroutines."""
+        async def main(directory):
+            async with AsyncLedger() as household:
+                await household.open_journal(directory, fsync="always")
+                records = await asyncio.gather(
+                    *[household.add_expense("food", 10, "2025-01-{:02d}".format(day)) for day in range(1, 11)],
+                    household.add_income("salary", 3000, "2025-01-31"),
+                )
+                ids = sorted(rec["expense_id"] for rec in records[:-1])
+                balance = await household.monthly_balance()
+                totals = await household.total_by_category()
+                income = await household.total_monthly_income("2025-01")
+                self.assertEqual(len(household.ledger.get_all_expenses()), 10)
+            return ids, balance, totals, income
+
+        with tempfile.TemporaryDirectory() as tmp:
+            ids, balance, totals, income = asyncio.run(main(tmp))
+            self.assertEqual(ids, list(range(1, 11)))
+            self.assertEqual(balance, {"2025-01": 2900.0})
+            self.assertEqual(totals, {"food": 100.0})
+            self.assertEqual(income, 3000.0)
+            # the journal kept everything
+            restored = Ledger()
+            restored.open_journal(tmp)
+            self.assertEqual(restored.monthly_balance(), {"2025-01": 2900.0})
+            restored.close()
+
+        with self.assertRaises(AttributeError):
+            AsyncLedger().no_such_operation
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+from budgetmaster.expense.store import ColumnarExpenseStore
+from budgetmaster.income.store import ColumnarIncomeStore
+
+
+class TestColumnarStore(unittest.TestCase):
+    """Tests for budgetmaster.storage.columnar."""
+
+    @classmethod
+    def setUpClass(cls):
+        print("setUpClass: TestColumnarStore")
+
+    @classmethod
+    def tearDownClass(cls):
+        print("tearDownClass: TestColumnarStore")
+
+    def setUp(self):
+        self.incomes = ColumnarIncomeStore()
+        self.incomes.add({"income_id": 1, "source": "salary", "amount": 3000, "date": "2025-01-01"})
+        self.incomes.add({"income_id": 2, "source": "freelance", "amount": 500, "date": "2025-01-15"})
+        self.incomes.add({"income_id": 3, "source": "salary", "amount": 3200, "date": "2025-02-01"})
+
+    def tearDown(self):
+        self.incomes = None
+
+    def test_rows_round_trip_and_indexes(self):
+        """rows come back as the same dictionaries and indexes work."""
+        self.assertEqual(
+            self.incomes.get(2),
+            {"income_id": 2, "source": "freelance", "amount": 500.0, "date": "2025-01-15"},
+        )
+        self.assertEqual([rec["income_id"] for rec in self.incomes], [1, 2, 3])
+        self.assertEqual(len(self.incomes.by_source("salary")), 2)
+        self.assertEqual(self.incomes.months(), ["2025-01", "2025-02"])
+        self.assertEqual(self.incomes.totals_for("source"), {"salary": 6200.0, "freelance": 500.0})
+
+        # update re-buckets and delete removes
+        self.incomes.update(2, source="salary", date="2025-02-20")
+        self.assertEqual(self.incomes.sources(), ["salary"])
+        self.assertEqual(len(self.incomes.by_month("2025-02")), 2)
+        self.assertEqual(self.incomes.totals_for("month"), {"2025-01": 3000.0, "2025-02": 3700.0})
+        self.assertEqual(self.incomes.delete(1)["amount"], 3000.0)
+        self.assertNotIn(1, self.incomes)
+        self.assertEqual(len(self.incomes), 2)
+
+        # ids must be new and increasing
+        with self.assertRaises(ValueError):
+            self.incomes.add({"income_id": 3, "source": "x", "amount": 1, "date": "2025-03-01"})
+        with self.assertRaises(KeyError):
+            self.incomes.update(1, amount=5)
+
+    def test_odd_dates_tags_and_compaction(self):
+        """non-ISO dates are refused, tags survive, and compaction keeps live rows."""
+        store = ColumnarExpenseStore()
+        with self.assertRaises(ValueError):
+            store.add({"amount": 5.0, "date": "2025-01-04T09:30", "description": "bus",
+                       "category": "transportation", "tags": ["work"], "expense_id": 1})
+        self.assertEqual(len(store), 0)
+        store.add({"amount": 5.0, "date": "2025-01-04", "description": "bus",
+                   "category": "transportation", "tags": ["work"], "expense_id": 1})
+        rec = store.get(1)
+        self.assertEqual(rec["date"], "2025-01-04")
+        self.assertEqual(rec["tags"], ["work"])
+        self.assertEqual(store.months(), ["2025-01"])
+
+        for i in range(2, 3001):
+            store.add({"amount": 1.0, "date": "2025-01-01", "description": "",
+                       "category": "food", "tags": [], "expense_id": i})
+        for i in range(2, 2501):
+            store.delete(i)
+        self.assertEqual(len(store), 501)
+        self.assertLess(len(store._ids), 3000)
+        self.assertEqual(store.get(2600)["category"], "food")
+        self.assertEqual(store.get(1)["tags"], ["work"])
+        self.assertEqual(len(store.by_month("2025-01")), 501)
+        self.assertEqual(len(store.records_between("2025-01-02", "2025-01-31")), 1)
+        self.assertEqual(store.delete_many(range(2500, 2801)), 300)
+        self.assertEqual(len(store.select(date_range=("2025-01-01", "2025-01-01"))), 200)
+
+    def test_add_columns_matches_single_adds(self):
+        """a bulk append gives the same rows, buckets and totals as add()."""
+        columns = {
+            "income_id": range(4, 8),
+            "source": ["salary", "bonus", "salary", "gift"],
+            "amount": [10.0, 20.0, 30.0, 40.0],
+            "date": ["2025-02-10", "2025-03-01", "2025-02-28", "2025-01-31"],
+        }
+        self.assertEqual(self.incomes.add_columns(columns), 4)
+
+        single = ColumnarIncomeStore()
+        for rec in self.incomes:
+            single.add(rec)
+        self.assertEqual(list(self.incomes), list(single))
+        self.assertEqual(self.incomes.totals_for("month"), single.totals_for("month"))
+        self.assertEqual(self.incomes.totals_for("source"), single.totals_for("source"))
+        self.assertEqual(
+            [rec["income_id"] for rec in self.incomes.by_month("2025-01")], [1, 2, 7]
+        )
+        self.assertEqual(self.incomes.get(6)["date"], "2025-02-28")
+        with self.assertRaises(ValueError):
+            self.incomes.add_columns({"income_id": [8, 9], "source": ["a", "b"], "amount": [1, 2],
+                                      "date": ["2025-03-01", "not a date"]})
+        self.assertEqual(len(self.incomes), 7)
+        self.assertEqual(self.incomes.sources(), single.sources())
+
+        with self.assertRaises(ValueError):
+            self.incomes.add_columns({"income_id": [8, 9], "source": ["a"], "amount": [1, 2], "date": ["", ""]})
+        with self.assertRaises(ValueError):
+            self.incomes.add_columns({"income_id": [5], "source": ["a"], "amount": [1], "date": [""]})
+
+    def test_group_lookups_follow_changes(self):
+        """by_source reads the rows of one key and follows every change."""
+        self.assertEqual([rec["income_id"] for rec in self.incomes.by_source("salary")], [1, 3])
+        self.incomes.add_columns({"income_id": [4, 5], "source": ["gift", "salary"],
+                                  "amount": [1, 2], "date": ["2025-03-01", "2025-03-02"]})
+        self.incomes.update(2, source="salary")
+        self.incomes.update(3, source="gift")
+        self.incomes.delete(1)
+        self.assertEqual([rec["income_id"] for rec in self.incomes.by_source("salary")], [2, 5])
+        self.assertEqual([rec["income_id"] for rec in self.incomes.by_source("gift")], [3, 4])
+        self.assertEqual(self.incomes.by_source("freelance"), [])
+        self.assertEqual(self.incomes.records_for_all([("source", "gift"), ("month", "2025-03")]),
+                         [self.incomes.get(4)])
+
+        # compaction renumbers the rows of every key
+        self.incomes.add_columns({"income_id": range(6, 2106), "source": ["bonus"] * 2100,
+                                  "amount": [1.0] * 2100, "date": ["2025-04-01"] * 2100})
+        self.incomes.delete_many(range(6, 2006))
+        self.assertLess(len(self.incomes._ids), 2000)
+        self.assertEqual([rec["income_id"] for rec in self.incomes.by_source("salary")], [2, 5])
+        self.assertEqual(len(self.incomes.by_source("bonus")), 100)
+
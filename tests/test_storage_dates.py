@@ -0,0 +1,62 @@
+import unittest
+from budgetmaster.storage import dates
+from budgetmaster.expense import entry as expense_entry
+from budgetmaster.income import entry as income_entry
+from budgetmaster.income import summary as income_summary
+
+
+class TestDates(unittest.TestCase):
+    """Tests for budgetmaster.storage.dates."""
+
+    @classmethod
+    def setUpClass(cls):
+        print("setUpClass: TestDates")
+
+    @classmethod
+    def tearDownClass(cls):
+        print("tearDownClass: TestDates")
+
+    def tearDown(self):
+        income_entry.incomes.clear()
+        expense_entry._expenses.clear()
+        income_entry.set_storage_backend("dict")
+        expense_entry.set_storage_backend("dict")
+
+    def test_day_and_month_keys(self):
+        """dates become day numbers and month keys, and bad dates raise."""
+        self.assertEqual(dates.parse_date("1970-01-02"), 1)
+        day = dates.parse_date("2025-03-04")
+        self.assertEqual(dates.decode_date(day), "2025-03-04")
+        self.assertEqual(dates.month_key(day), 202503)
+        self.assertEqual(dates.month_name(202503), "2025-03")
+        self.assertIs(dates.month_of("2025-03-31"), dates.month_of_day(day))
+        self.assertEqual(dates.month_of("1999-12-31"), "1999-12")
+
+        for value in ("2025-3-4", "2025-02-30", "2025-01-04T09:30", "2025/01/04", "", None, 20250104):
+            self.assertIsNone(dates.encode_date(value))
+            with self.assertRaises(ValueError):
+                dates.parse_date(value)
+
+    def test_entries_refuse_bad_dates(self):
+        """every backend refuses a malformed date and stores nothing."""
+        for backend in ("dict", "columnar", "sqlite"):
+            income_entry.set_storage_backend(backend)
+            income_id = income_entry.add_income("salary", 3000, "2025-01-31")["income_id"]
+            with self.assertRaises(ValueError):
+                income_entry.add_income("salary", 3000, "2025-1-31")
+            with self.assertRaises(ValueError):
+                income_entry.add_incomes_bulk([("gift", 10, "2025-02-01"), ("gift", 20, "31/01/2025")])
+            with self.assertRaises(ValueError):
+                income_entry.update_income(income_id, new_date="2025-02")
+            self.assertEqual(len(income_entry.get_all_incomes()), 1)
+            self.assertEqual(income_entry.get_income(income_id)["date"], "2025-01-31")
+            self.assertEqual(income_summary.total_monthly_income("2025-01"), 3000.0)
+            income_entry.incomes.clear()
+
+        with self.assertRaises(ValueError):
+            expense_entry.add_expense("food", 5, None)
+        self.assertEqual(expense_entry.get_all_expenses(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from budgetmaster.expense.store import ExpenseStore, ColumnarExpenseStore
+from budgetmaster.income import entry as income_entry
+from budgetmaster.income.store import IncomeStore
+from budgetmaster.storage import journal
+from budgetmaster.storage.journal import JournaledStore
+
+
+class TestJournaledStore(unittest.TestCase):
+    """Tests for budgetmaster.storage.journal."""
+
+    @classmethod
+    def setUpClass(cls):
+        print("setUpClass: TestJournaledStore")
+
+    @classmethod
+    def tearDownClass(cls):
+        print("tearDownClass: TestJournaledStore")
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        income_entry.close_journal()
+        income_entry.incomes.clear()
+        shutil.rmtree(self.directory)
+
+    def test_changes_survive_reopen_with_snapshot_and_log_tail(self):
+        """a reopened store has the snapshot plus every change logged after it."""
+        for store_class in (ExpenseStore, ColumnarExpenseStore):
+            with self.subTest(store=store_class.__name__):
+                path = os.path.join(self.directory, store_class.__name__)
+                with JournaledStore(store_class(), path, fsync="batch") as store:
+                    store.add({"expense_id": 1, "category": "food", "amount": 20.0,
+                               "date": "2025-01-01", "tags": ["work"]})
+                    store.add_columns({"expense_id": range(2, 4), "category": ["rent", "food"],
+                                       "amount": [800.0, 5.0], "date": ["2025-01-02", "2025-02-01"]})
+                    store.snapshot()
+                    store.update(2, amount=850.0)
+                    store.delete(3)
+
+                with JournaledStore(store_class(), path) as store:
+                    self.assertEqual(len(store), 2)
+                    self.assertEqual(store.totals_for("category"), {"food": 20.0, "rent": 850.0})
+                    self.assertEqual(store.total_for("tags", "work"), 20.0)
+                    self.assertEqual(list(store.get(1)["tags"]), ["work"])
+
+    def test_half_written_last_line_is_dropped(self):
+        """a crash in the middle of a log write loses only that entry."""
+        with JournaledStore(ExpenseStore(), self.directory, fsync="never", snapshot_every=None) as store:
+            store.add({"expense_id": 1, "category": "food", "amount": 20.0, "date": "2025-01-01"})
+        with open(os.path.join(self.directory, journal.LOG_FILE), "ab") as f:
+            f.write(b'{"op": "add", "record": {"expense_')
+
+        with JournaledStore(ExpenseStore(), self.directory) as store:
+            self.assertEqual(len(store), 1)
+            store.add({"expense_id": 2, "category": "food", "amount": 1.0, "date": "2025-01-02"})
+        with JournaledStore(ExpenseStore(), self.directory) as store:
+            self.assertEqual(len(store), 2)
+
+        with self.assertRaises(ValueError):
+            JournaledStore(ExpenseStore(), self.directory, fsync="sometimes")
+
+    def test_income_entry_open_journal_restores_records_and_ids(self):
+        """open_journal reloads incomes and continues the id counter."""
+        income_entry.open_journal(self.directory)
+        income_entry.add_income("salary", 1000, "2025-01-01")
+        income_entry.add_incomes_bulk([("freelance", 200, "2025-01-05")])
+        income_entry.update_income(1, new_amount=1100)
+        income_entry.close_journal()
+
+        income_entry.incomes.clear()
+        income_entry.open_journal(self.directory)
+        self.assertEqual(income_entry.get_income(1)["amount"], 1100.0)
+        rec = income_entry.add_income("salary", 1000, "2025-02-01")
+        self.assertEqual(rec["income_id"], 3)
+
+    def test_deleted_ids_are_not_handed_out_after_reopen(self):
+        """the id counter is restored from the snapshot and the log."""
+        for snapshot in (False, True):
+            with self.subTest(snapshot=snapshot):
+                path = os.path.join(self.directory, str(snapshot))
+                with JournaledStore(IncomeStore(), path) as store:
+                    for income_id in store.allocate_ids(2):
+                        store.add({"income_id": income_id, "source": "salary",
+                                   "amount": 1.0, "date": "2025-01-01"})
+                    store.delete(2)
+                    store.reserve_ids(5)
+                    if snapshot:
+                        store.snapshot()
+                with JournaledStore(IncomeStore(), path) as store:
+                    self.assertEqual(list(store.allocate_ids(1)), [5])
+
+        path = os.path.join(self.directory, "entry")
+        income_entry.open_journal(path)
+        income_entry.add_income("salary", 1000, "2025-01-01")
+        income_entry.add_income("gift", 50, "2025-01-02")
+        income_entry.delete_income(2)
+        income_entry.close_journal()
+        income_entry.incomes.clear()
+        income_entry.open_journal(path)
+        self.assertEqual(income_entry.add_income("gift", 50, "2025-01-03")["income_id"], 3)
+
+    def test_open_journal_keeps_the_store_in_memory(self):
+        """a new journal starts with the records in memory; an existing one
+        is not opened over them."""
+        path = os.path.join(self.directory, "ledger.db")
+        income_entry.set_storage_backend("sqlite", path=path)
+        try:
+            store = income_entry.incomes
+            income_entry.add_income("salary", 1000, "2025-01-01")
+            journaled = income_entry.open_journal(os.path.join(self.directory, "journal"))
+            self.assertIs(journaled.inner, store)
+            self.assertEqual(store.path, path)
+            self.assertEqual(income_entry.get_income(1)["amount"], 1000.0)
+            income_entry.add_income("gift", 50, "2025-01-02")
+            income_entry.close_journal()
+
+            with self.assertRaises(ValueError):
+                income_entry.open_journal(os.path.join(self.directory, "journal"))
+            self.assertIs(income_entry.incomes, store)
+            self.assertEqual(len(store), 2)
+
+            with JournaledStore(IncomeStore(), os.path.join(self.directory, "journal")) as restored:
+                self.assertEqual(restored.totals_for("month"), {"2025-01": 1050.0})
+        finally:
+            income_entry.set_storage_backend("dict")
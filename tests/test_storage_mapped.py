@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from budgetmaster.analysis import reports
+from budgetmaster.expense import entry as expense_entry
+from budgetmaster.income import entry as income_entry
+from budgetmaster.income import summary as income_summary
+from budgetmaster.income.store import MappedIncomeStore, ColumnarIncomeStore
+
+
+class TestMappedStore(unittest.TestCase):
+    """Tests for budgetmaster.storage.mapped."""
+
+    @classmethod
+    def setUpClass(cls):
+        print("setUpClass: TestMappedStore")
+
+    @classmethod
+    def tearDownClass(cls):
+        print("tearDownClass: TestMappedStore")
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "incomes.bml")
+
+    def tearDown(self):
+        for entry in (income_entry, expense_entry):
+            entry.set_storage_backend("dict")
+        income_entry.incomes.clear()
+        expense_entry._expenses.clear()
+        shutil.rmtree(self.directory)
+
+    def test_mapped_store_matches_columnar_store(self):
+        """a mapped file answers like the store it was written from."""
+        source = ColumnarIncomeStore()
+        source.add_columns({
+            "income_id": [1, 2, 3, 4],
+            "source": ["salary", "freelance", "salary", "gift"],
+            "amount": [3000, 500, 3000, 20],
+            "date": ["2025-01-01", "2025-01-15", "2025-02-01", "2025-03-01"],
+        })
+        self.assertEqual(MappedIncomeStore.write(source, self.path), 4)
+
+        mapped = MappedIncomeStore(path=self.path)
+        self.assertTrue(mapped.is_mapped())
+        self.assertEqual(list(mapped), list(source))
+        self.assertEqual(mapped.get(2), source.get(2))
+        self.assertEqual(mapped.totals_for("source"), source.totals_for("source"))
+        self.assertEqual(mapped.totals_for("month"), source.totals_for("month"))
+        self.assertEqual(mapped.months(), source.months())
+        self.assertEqual(mapped.records_between("2025-01-10", "2025-02"), source.records_between("2025-01-10", "2025-02"))
+        self.assertEqual(mapped.max_id(), 4)
+
+        # the first change copies the columns out of the file
+        mapped.update(3, amount=3100)
+        self.assertFalse(mapped.is_mapped())
+        self.assertEqual(mapped.total_for("source", "salary"), 6100.0)
+        mapped.add({"income_id": 5, "source": "bonus", "amount": 100, "date": "2025-02-10"})
+        self.assertEqual([r["income_id"] for r in mapped.by_month("2025-02")], [3, 5])
+        self.assertEqual(MappedIncomeStore(path=self.path).total_for("source", "salary"), 6000.0)
+
+        with self.assertRaises(ValueError):
+            expense_entry.load_ledger(self.path)
+
+    def test_entry_save_and_load_ledger(self):
+        """reports and summaries work on a loaded ledger, and ids continue."""
+        income_entry.add_income("salary", 3000, "2025-01-01")
+        income_entry.add_income("salary", 3000, "2025-02-01")
+        expense_entry.add_expense("rent", 1200, "2025-01-03", "January rent")
+        expense_entry.add_expense("food", 80, "2025-02-05")
+        expense_entry.tag_expense(2, "groceries")
+        balance = reports.monthly_balance(income_entry.view_incomes(), expense_entry.view_expenses())
+
+        expense_path = os.path.join(self.directory, "expenses.bml")
+        self.assertEqual(income_entry.save_ledger(self.path), 2)
+        self.assertEqual(expense_entry.save_ledger(expense_path), 2)
+        income_entry.incomes.clear()
+        expense_entry._expenses.clear()
+
+        income_entry.load_ledger(self.path)
+        expense_entry.load_ledger(expense_path)
+        self.assertEqual(reports.monthly_balance(income_entry.view_incomes(), expense_entry.view_expenses()), balance)
+        self.assertEqual(income_summary.total_monthly_income("2025-02"), 3000.0)
+        self.assertEqual(income_summary.income_by_source(), {"salary": 6000.0})
+        self.assertEqual(expense_entry.total_by_category(), {"rent": 1200.0, "food": 80.0})
+        self.assertEqual([e["expense_id"] for e in expense_entry.expenses_tagged("groceries")], [2])
+        self.assertEqual(expense_entry.get_expense(1)["description"], "January rent")
+
+        self.assertEqual(income_entry.add_income("bonus", 100, "2025-02-20")["income_id"], 3)
+        self.assertEqual(income_summary.total_monthly_income("2025-02"), 3100.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from budgetmaster.analysis import reports
+from budgetmaster.expense import entry as expense_entry
+from budgetmaster.income import entry as income_entry
+from budgetmaster.income import summary as income_summary
+from budgetmaster.income.store import SQLiteIncomeStore
+
+
+class TestSQLiteStore(unittest.TestCase):
+    """Tests for budgetmaster.storage.sqlite_store."""
+
+    @classmethod
+    def setUpClass(cls):
+        print("setUpClass: TestSQLiteStore")
+
+    @classmethod
+    def tearDownClass(cls):
+        print("tearDownClass: TestSQLiteStore")
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.incomes = SQLiteIncomeStore()
+        self.incomes.add({"income_id": 1, "source": "salary", "amount": 3000, "date": "2025-01-01"})
+        self.incomes.add({"income_id": 2, "source": "freelance", "amount": 500, "date": "2025-01-15"})
+        self.incomes.add({"income_id": 3, "source": "salary", "amount": 3000, "date": "2025-02-01"})
+
+    def tearDown(self):
+        self.incomes.close()
+        for entry in (income_entry, expense_entry):
+            entry.set_storage_backend("dict")
+        income_entry.incomes.clear()
+        expense_entry._expenses.clear()
+        shutil.rmtree(self.directory)
+
+    def test_rows_indexes_and_sql_totals(self):
+        """rows come back as dicts and totals are summed by SQLite."""
+        self.assertEqual(
+            self.incomes.get(2),
+            {"income_id": 2, "source": "freelance", "amount": 500.0, "date": "2025-01-15"},
+        )
+        self.assertEqual([r["income_id"] for r in self.incomes.by_source("salary")], [1, 3])
+        self.assertEqual(self.incomes.totals_for("source"), {"salary": 6000.0, "freelance": 500.0})
+        self.assertEqual(self.incomes.total_for("month", "2025-01"), 3500.0)
+        self.assertEqual(self.incomes.total_for("month", "2030-01"), 0.0)
+        self.assertEqual([r["income_id"] for r in self.incomes.records_between("2025-01-10", "2025-02")], [2, 3])
+
+        self.incomes.update(3, date="2025-03-01", amount=3100)
+        self.assertEqual(self.incomes.months(), ["2025-01", "2025-03"])
+        self.assertEqual(self.incomes.delete_many([1, 2, 99]), 2)
+        self.assertEqual(len(self.incomes), 1)
+        with self.assertRaises(ValueError):
+            self.incomes.add({"income_id": 3, "source": "x", "amount": 1, "date": "2025-01-01"})
+        with self.assertRaises(KeyError):
+            self.incomes.update(99, amount=1)
+
+        # a failed batch is rolled back completely
+        with self.assertRaises(ValueError):
+            self.incomes.add_columns({"income_id": [4, 3], "source": ["a", "b"],
+                                      "amount": [1.0, 2.0], "date": ["2025-01-01", "2025-01-02"]})
+        self.assertEqual(len(self.incomes), 1)
+
+    def test_entry_summaries_and_reports_on_sqlite(self):
+        """the module functions work unchanged on the sqlite backend."""
+        income_entry.set_storage_backend("sqlite")
+        expense_entry.set_storage_backend("sqlite")
+        income_entry.add_incomes_bulk([("salary", 3000, "2025-01-01"), ("bonus", 500, "2025-02-01")])
+        expense_entry.add_expenses_bulk([("food", 100, "2025-01-03"), ("rent", 1200, "2025-02-01")])
+        expense_entry.tag_expense(1, "work")
+
+        self.assertEqual(income_summary.total_monthly_income("2025-01"), 3000.0)
+        self.assertEqual(income_summary.income_by_source(), {"salary": 3000.0, "bonus": 500.0})
+        self.assertEqual(expense_entry.total_by_category(), {"food": 100.0, "rent": 1200.0})
+        self.assertEqual(expense_entry.total_by_tag(), {"work": 100.0})
+        balance = reports.monthly_balance(income_entry.view_incomes(), expense_entry.view_expenses())
+        self.assertEqual(balance, {"2025-01": 2900.0, "2025-02": -700.0})
+
+    def test_database_file_keeps_records_and_ids(self):
+        """reopening a database file keeps the records and continues the ids."""
+        path = os.path.join(self.directory, "ledger.db")
+        income_entry.set_storage_backend("sqlite", path=path)
+        income_entry.add_income("salary", 1000, "2025-01-01")
+
+        # leaving the sqlite backend closes the database
+        income_entry.set_storage_backend("dict")
+        income_entry.incomes.clear()
+        income_entry.set_storage_backend("sqlite", path=path)
+        self.assertEqual(income_entry.get_income(1)["amount"], 1000.0)
+        self.assertEqual(income_entry.add_income("bonus", 10, "2025-01-02")["income_id"], 2)